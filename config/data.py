@@ -111,3 +111,14 @@ BAR_METRICS_DISKS = config.get("bar_metrics_disks", DEFAULTS["bar_metrics_disks"
 METRICS_VISIBLE = config.get("metrics_visible", DEFAULTS["metrics_visible"])
 METRICS_SMALL_VISIBLE = config.get("metrics_small_visible", DEFAULTS["metrics_small_visible"])
 SELECTED_MONITORS = config.get("selected_monitors", DEFAULTS["selected_monitors"])
+# "cliphist" or "native" (built-in SQLite history fed by wl-paste --watch)
+CLIPBOARD_BACKEND = config.get("clipboard_backend", DEFAULTS["clipboard_backend"])
+WALLPAPER_THUMBNAIL_CACHE_MB = config.get(
+    "wallpaper_thumbnail_cache_mb", DEFAULTS["wallpaper_thumbnail_cache_mb"]
+)
+# Also list wallpapers in subdirectories of WALLPAPERS_DIR
+WALLPAPERS_RECURSIVE = config.get("wallpapers_recursive", DEFAULTS["wallpapers_recursive"])
+# Entries kept in the notification history store
+NOTIFICATION_HISTORY_LIMIT = config.get(
+    "notification_history_limit", DEFAULTS["notification_history_limit"]
+)
@@ -102,5 +102,9 @@ DEFAULTS = {
     },
     "limited_apps_history": ["Spotify"],
     "history_ignored_apps": ["Hyprshot"],
+    "clipboard_backend": "cliphist",
+    "wallpaper_thumbnail_cache_mb": 256,
+    "wallpapers_recursive": False,
+    "notification_history_limit": 2000,
     "selected_monitors": [],
 }
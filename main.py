@@ -1,4 +1,5 @@
 import os
+import signal
 
 import gi
 
@@ -41,6 +42,12 @@ if __name__ == "__main__":
     # Every hour
     GLib.timeout_add(3600000, run_updater)
 
+    # Load the shared Hyprland state before any widget subscribes to events,
+    # so its tables are already updated when their handlers run.
+    from services.hyprland_state import get_hyprland_state
+
+    get_hyprland_state()
+
     # Initialize multi-monitor services
     try:
         from utils.monitor_manager import get_monitor_manager
@@ -151,4 +158,8 @@ if __name__ == "__main__":
 
     app.set_css()
 
+    # Quit the main loop on SIGTERM so exit handlers (e.g. the notification
+    # journal flush) still run
+    GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGTERM, app.quit)
+
     app.run()
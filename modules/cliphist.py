@@ -3,9 +3,10 @@ import re
 import subprocess
 import sys
 import tempfile
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
 
-from fabric.utils import idle_add, remove_handler
-from fabric.utils.helpers import get_relative_path
 from fabric.widgets.box import Box
 from fabric.widgets.button import Button
 from fabric.widgets.entry import Entry
@@ -14,7 +15,110 @@ from fabric.widgets.label import Label
 from fabric.widgets.scrolledwindow import ScrolledWindow
 from gi.repository import Gdk, GdkPixbuf, GLib
 
+import config.data as data
 import modules.icons as icons
+from services.clipboard_store import get_clipboard_store
+from utils import frecency
+from utils.thumbnail_cache import ThumbnailCache
+from widgets.recycled_list import RecycledList
+
+# Lines handed to the UI before the rest of `cliphist list` has been read
+FIRST_PAGE_LINES = 30
+# Lines per hand-off after the first page
+CHUNK_LINES = 500
+
+THUMBNAIL_SIZE = 72
+# Threads running `cliphist decode` for image previews
+DECODE_WORKERS = 2
+# Disk space for image previews, and previews kept decoded in memory
+THUMBNAIL_CACHE_BYTES = 32 * 1024 * 1024
+PIXBUF_CACHE_SIZE = 64
+
+
+def is_image_preview(content):
+    """Determine if clipboard content is likely an image"""
+    return (
+        content.startswith("data:image/") or
+        content.startswith("\x89PNG") or
+        content.startswith("GIF8") or
+        content.startswith("\xff\xd8\xff") or
+        re.match(r'^\s*<img\s+', content) is not None or
+        "binary" in content.lower() and any(ext in content.lower() for ext in ["jpg", "jpeg", "png", "bmp", "gif"])
+    )
+
+
+class ClipIndex:
+    """
+    Compact index of `cliphist list` output.
+
+    Ids and previews live in parallel arrays, newest first. Searching scans
+    one casefolded string holding every preview, built on the first search
+    after the index grows, and maps hits back to rows with a bisect.
+    """
+
+    def __init__(self):
+        self.ids: list[str] = []
+        self.previews: list[str] = []
+        self.images = bytearray()
+        self._haystack = ""
+        self._offsets: list[int] = []
+        self._positions = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def extend(self, lines: list[str]):
+        for line in lines:
+            item_id, _, preview = line.partition("\t")
+            if not preview:
+                item_id, preview = "0", line
+            self.ids.append(item_id)
+            self.previews.append(preview)
+            self.images.append(is_image_preview(preview))
+        self._haystack = ""
+        self._positions = None
+
+    def remove(self, item_id: str):
+        try:
+            position = self.ids.index(item_id)
+        except ValueError:
+            return
+        del self.ids[position]
+        del self.previews[position]
+        del self.images[position]
+        self._haystack = ""
+        self._positions = None
+
+    def positions(self, ids: list[str]) -> list[int]:
+        """Positions of the given ids, in the given order, skipping unknown ones."""
+        if self._positions is None:
+            self._positions = {item_id: i for i, item_id in enumerate(self.ids)}
+        return [self._positions[item_id] for item_id in ids if item_id in self._positions]
+
+    def search(self, query: str) -> list[int]:
+        """Positions of the entries whose preview contains query, in history order."""
+        query = query.casefold()
+        if not query:
+            return list(range(len(self.ids)))
+        if not self._haystack and self.previews:
+            self._haystack = "\n".join(self.previews).casefold()
+            self._offsets = []
+            position = 0
+            for preview in self.previews:
+                self._offsets.append(position)
+                position += len(preview.casefold()) + 1
+
+        matches = []
+        offsets = self._offsets
+        pos = self._haystack.find(query)
+        while pos != -1:
+            row = bisect_right(offsets, pos) - 1
+            matches.append(row)
+            # One hit per entry is enough; continue with the next one
+            if row + 1 >= len(offsets):
+                break
+            pos = self._haystack.find(query, offsets[row + 1])
+        return matches
 
 
 class ClipHistory(Box):
@@ -27,14 +131,28 @@ class ClipHistory(Box):
         )
 
         self.tmp_dir = tempfile.mkdtemp(prefix="cliphist-")
-        self.image_cache = {}
+        # Previews are keyed by id and preview line: ids restart after a wipe
+        self.thumbnail_cache = ThumbnailCache("cliphist", THUMBNAIL_CACHE_BYTES)
+        self.image_cache = OrderedDict()
+        # Pending previews, decoded newest first: rows just scrolled into view
+        self._thumbnail_requests = OrderedDict()
+        self._thumbnail_rows = {}
+        self._thumbnail_condition = threading.Condition()
+        self._thumbnail_workers = 0
         
         self.notch = kwargs["notch"]
         self.selected_index = -1
-        self._arranger_handler = 0
-        self.clipboard_items = []
-        self._loading = False
-        self._pending_updates = False
+        self.clip_index = ClipIndex()
+        # Index being filled by the running loader; a newer load replaces it
+        self._loading_index = None
+        self.frecency_store = frecency.get_frecency_store()
+        # Built-in history instead of the cliphist binary, if configured
+        self.store = None
+        self._is_open = False
+        if data.CLIPBOARD_BACKEND == "native":
+            self.store = get_clipboard_store()
+            self.store.start_watching()
+            self.store.connect("changed", self._on_store_changed)
 
         self.viewport = Box(name="viewport", spacing=4, orientation="v")
         self.search_entry = Entry(
@@ -55,7 +173,6 @@ class ClipHistory(Box):
             v_expand=True,
             h_align="fill",
             v_align="fill",
-            child=self.viewport,
             propagate_width=False,
             propagate_height=False,
         )
@@ -91,228 +208,150 @@ class ClipHistory(Box):
             ],
         )
 
+        # Only the rows in view exist as widgets; the index holds everything
+        self.clip_list = RecycledList(
+            self.scrolled_window,
+            create_row=self.create_clipboard_row,
+            bind_row=self.bind_clipboard_row,
+            spacing=4,
+        )
+        self.empty_box = Box(
+            name="no-clip-container",
+            orientation="v",
+            h_align="center",
+            v_align="center",
+            h_expand=True,
+            v_expand=True,
+            children=[
+                Label(
+                    name="no-clip",
+                    markup=icons.clipboard,
+                    h_align="center",
+                    v_align="center",
+                ),
+            ],
+        )
+        self.viewport.add(self.clip_list)
+        self.viewport.add(self.empty_box)
+        self.scrolled_window.add(self.viewport)
+
         self.add(self.history_box)
         self.show_all()
 
     def close(self):
         """Close the clipboard history panel"""
-        self.viewport.children = []
+        self._is_open = False
+        self._loading_index = None
+        self.clip_list.set_items([])
         self.selected_index = -1
         self.notch.close_notch()
 
     def open(self):
         """Open the clipboard history panel and load items"""
-        if self._loading:
-            return
-        self._loading = True
+        self._is_open = True
         self.search_entry.set_text("")
         self.search_entry.grab_focus()
-
-        # Use GLib.Thread for proper async execution
-        GLib.Thread.new("cliphist-loader", self._load_clipboard_items_thread, None)
-
-    def _load_clipboard_items_thread(self, user_data):
-        """Background thread worker for loading clipboard items"""
-        try:
-            result = subprocess.run(
-                ["cliphist", "list"], 
-                capture_output=True, 
-                check=True
+        self.reload()
+
+    def reload(self):
+        """Start reading the history again, superseding any load in progress"""
+        index = ClipIndex()
+        self._loading_index = index
+        GLib.Thread.new("cliphist-loader", self._load_clipboard_items_thread, index)
+
+    def _on_store_changed(self, *_):
+        # Copies made while the picker is open show up right away
+        if self._is_open:
+            self.reload()
+
+    def _load_clipboard_items_thread(self, index):
+        """Background thread worker streaming history lines to the main thread"""
+        process = None
+        if self.store is not None:
+            lines = self.store.iter_lines()
+        else:
+            try:
+                process = subprocess.Popen(
+                    ["cliphist", "list"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            except OSError as e:
+                print(f"Error loading clipboard history: {e}", file=sys.stderr)
+                return
+            lines = (
+                raw_line.decode('utf-8', errors='replace').rstrip('\n')
+                for raw_line in process.stdout
             )
-            # Decode stdout with error handling
-            stdout_str = result.stdout.decode('utf-8', errors='replace')
-            lines = stdout_str.strip().split('\n')
-            new_items = []
-            for line in lines:
-                if not line or "<meta http-equiv" in line:
-                    continue
-                new_items.append(line)
-            # Update UI from main thread
-            GLib.idle_add(self._update_items, new_items)
-        except subprocess.CalledProcessError as e:
-            print(f"Error loading clipboard history: {e}", file=sys.stderr)
-        except Exception as e:
-            print(f"Unexpected error: {e}", file=sys.stderr)
-        finally:
-            GLib.idle_add(self._loading_finished)
-    
-    def _loading_finished(self):
-        """Handle loading completion on main thread"""
-        self._loading = False
-        if self._pending_updates:
-            self._pending_updates = False
-            GLib.Thread.new("cliphist-loader", self._load_clipboard_items_thread, None)
-        return False
-
-    def _update_items(self, new_items):
-        """Update the items list from main thread"""
-        self.clipboard_items = new_items
-        self.display_clipboard_items()
-
-    def display_clipboard_items(self, filter_text=""):
-        """Display clipboard items in the viewport"""
-        remove_handler(self._arranger_handler) if self._arranger_handler else None
-        self.viewport.children = []
-        self.selected_index = -1
-        
-
-        filtered_items = []
-        for item in self.clipboard_items:
-
-            content = item.split('\t', 1)[1] if '\t' in item else item
-            if filter_text.lower() in content.lower():
-                filtered_items.append(item)
-        
-
-        if not filtered_items:
 
-            container = Box(
-                name="no-clip-container",
-                orientation="v",
-                h_align="center",
-                v_align="center",
-                h_expand=True,
-                v_expand=True
-            )
-            
-
-            label = Label(
-                name="no-clip",
-                markup=icons.clipboard,
-                h_align="center",
-                v_align="center",
-            )
-            
-            container.add(label)
-            self.viewport.add(container)
+        batch = []
+        batch_size = FIRST_PAGE_LINES
+        for line in lines:
+            if index is not self._loading_index:
+                if process is not None:
+                    process.kill()
+                break
+            if not line or "<meta http-equiv" in line:
+                continue
+            batch.append(line)
+            if len(batch) >= batch_size:
+                GLib.idle_add(self._append_items, index, batch)
+                batch = []
+                batch_size = CHUNK_LINES
+        GLib.idle_add(self._append_items, index, batch)
+
+        if process is None:
             return
-            
-
-        self._display_items_batch(filtered_items, 0, 10)
-
-    def _display_items_batch(self, items, start, batch_size):
-        """Display items in batches to keep UI responsive"""
-        end = min(start + batch_size, len(items))
-        
-        for i in range(start, end):
-            item = items[i]
-            self.viewport.add(self.create_clipboard_item(item))
-        
+        stderr = process.stderr.read()
+        if process.wait() > 0:
+            message = stderr.decode('utf-8', errors='replace').strip()
+            print(f"Error loading clipboard history: {message}", file=sys.stderr)
+
+    def _append_items(self, index, lines):
+        """Add a chunk of loaded lines to the index from the main thread"""
+        if index is not self._loading_index:
+            return False
+        index.extend(lines)
+        # The previous index stays on screen until the new one has its first page
+        self.clip_index = index
+        self.display_clipboard_items(keep_position=bool(self.clip_list.items))
+        return False
 
-        if end < len(items):
-            GLib.idle_add(self._display_items_batch, items, end, batch_size)
+    def display_clipboard_items(self, keep_position=False):
+        """Show the entries matching the search text"""
+        filter_text = self.search_entry.get_text()
+        if self.store is not None and filter_text:
+            # The built-in store searches the full text, not just the preview line
+            items = self.clip_index.positions(self.store.search(filter_text))
         else:
-
-            if self.search_entry.get_text() and self.viewport.get_children():
-                self.update_selection(0)
-
-    def create_clipboard_item(self, item):
-        """Create a button for a clipboard item"""
-
-        parts = item.split('\t', 1)
-        item_id = parts[0] if len(parts) > 1 else "0"
-        content = parts[1] if len(parts) > 1 else item
-        
-
-        display_text = content.strip()
-        if len(display_text) > 100:
-            display_text = display_text[:97] + "..."
-        
-
-        is_image = self.is_image_data(content)
-        
-        if is_image:
-
-            button = Button(
-                name="slot-button",
-                child=Box(
-                    name="slot-box",
-                    orientation="h",
-                    spacing=10,
-                    children=[
-                        Image(name="clip-icon", h_align="start"),
-                        Label(
-                            name="clip-label",
-                            label="[Image]",
-                            ellipsization="end",
-                            v_align="center",
-                            h_align="start",
-                            h_expand=True,
-                        ),
-                    ],
-                ),
-                tooltip_text="Image in clipboard",
-                on_clicked=lambda *_, id=item_id: self.paste_item(id),
-            )
-
-            self._load_image_preview_async(item_id, button)
+            items = self.clip_index.search(filter_text)
+
+        # While searching, entries pasted often rank above merely recent ones
+        if filter_text:
+            usage = self.frecency_store.scores(frecency.CLIPBOARD)
+            if usage:
+                previews = self.clip_index.previews
+                items.sort(key=lambda i: -usage.get(previews[i], 0.0))
+
+        self.clip_list.set_items(items, keep_position=keep_position)
+        self.empty_box.set_visible(not items)
+        if keep_position:
+            self.selected_index = min(self.selected_index, len(items) - 1)
         else:
+            self.selected_index = -1
+            if filter_text and items:
+                self.update_selection(0)
 
-            button = self.create_text_item_button(item_id, display_text)
-        
-
-        button.connect("key-press-event", lambda widget, event, id=item_id: self.on_item_key_press(widget, event, id))
-        
-
-        button.set_can_focus(True)
-        button.add_events(Gdk.EventMask.KEY_PRESS_MASK)
-            
-        return button
-
-    def _load_image_preview_async(self, item_id, button):
-        """Load image preview asynchronously using background thread"""
-        GLib.Thread.new("image-preview", self._load_image_preview_thread, (item_id, button))
-
-    def _load_image_preview_thread(self, data):
-        """Background thread worker for loading image preview"""
-        item_id, button = data
-        try:
-            if item_id in self.image_cache:
-                pixbuf = self.image_cache[item_id]
-                GLib.idle_add(self._update_image_button, button, pixbuf)
-                return
-            
-            result = subprocess.run(
-                ["cliphist", "decode", item_id],
-                capture_output=True,
-                check=True
-            )
-            loader = GdkPixbuf.PixbufLoader()
-            loader.write(result.stdout)
-            loader.close()
-            pixbuf = loader.get_pixbuf()
-            width, height = pixbuf.get_width(), pixbuf.get_height()
-            max_size = 72
-            if width > height:
-                new_width = max_size
-                new_height = int(height * (max_size / width))
-            else:
-                new_height = max_size
-                new_width = int(width * (max_size / height))
-            pixbuf = pixbuf.scale_simple(new_width, new_height, GdkPixbuf.InterpType.BILINEAR)
-            self.image_cache[item_id] = pixbuf
-            
-            GLib.idle_add(self._update_image_button, button, pixbuf)
-        except Exception as e:
-            print(f"Error loading image preview: {e}", file=sys.stderr)
-
-    def _update_image_button(self, button, pixbuf):
-        """Update the button with the loaded image preview"""
-        box = button.get_child()
-        if box and len(box.get_children()) > 0:
-            image_widget = box.get_children()[0]
-            if isinstance(image_widget, Image):
-                image_widget.set_from_pixbuf(pixbuf)
-
-    def create_text_item_button(self, item_id, display_text):
-        """Create a button for a text clipboard item"""
-        return Button(
+    def create_clipboard_row(self):
+        """Create a reusable row button for clipboard items"""
+        button = Button(
             name="slot-button",
             child=Box(
                 name="slot-box",
                 orientation="h",
                 spacing=10,
                 children=[
+                    Image(name="clip-icon", h_align="start"),
                     Label(
                         name="clip-icon",
                         markup=icons.clip_text,
@@ -320,7 +359,6 @@ class ClipHistory(Box):
                     ),
                     Label(
                         name="clip-label",
-                        label=display_text,
                         ellipsization="end",
                         v_align="center",
                         h_align="start",
@@ -328,45 +366,165 @@ class ClipHistory(Box):
                     ),
                 ],
             ),
-            tooltip_text=display_text,
-            on_clicked=lambda *_: self.paste_item(item_id),
+            on_clicked=lambda button: self.paste_item(button.clip_id, button.clip_preview),
+        )
+        button.clip_id = None
+        button.clip_preview = None
+        button.clip_thumbnail_key = None
+        button.clip_image, button.clip_text_icon, button.clip_label = (
+            button.get_child().get_children()
+        )
+        button.connect(
+            "key-press-event",
+            lambda widget, event: self.on_item_key_press(widget, event, widget.clip_id),
         )
+        button.set_can_focus(True)
+        button.add_events(Gdk.EventMask.KEY_PRESS_MASK)
+        return button
 
-    def is_image_data(self, content):
-        """Determine if clipboard content is likely an image"""
+    def bind_clipboard_row(self, button, position):
+        """Show the index entry at position in a pooled row"""
+        item_id = self.clip_index.ids[position]
+        if button.clip_id == item_id:
+            return
+        preview = self.clip_index.previews[position]
+        is_image = self.clip_index.images[position]
+        if button.clip_thumbnail_key is not None:
+            self._cancel_thumbnail(button)
+        button.clip_id = item_id
+        button.clip_preview = preview
+
+        button.clip_image.set_visible(is_image)
+        button.clip_text_icon.set_visible(not is_image)
+        if is_image:
+            button.clip_label.set_label("[Image]")
+            button.set_tooltip_text("Image in clipboard")
+            self._request_thumbnail(button, item_id, preview)
+        else:
+            display_text = preview.strip()
+            if len(display_text) > 100:
+                display_text = display_text[:97] + "..."
+            button.clip_label.set_label(display_text)
+            button.set_tooltip_text(display_text)
+
+    def _request_thumbnail(self, button, item_id, preview):
+        """Show the preview of an image entry, decoding it in the pool if needed"""
+        key = f"{item_id}\t{preview}"
+        button.clip_thumbnail_key = key
+        pixbuf = self.image_cache.get(key)
+        if pixbuf is not None:
+            self.image_cache.move_to_end(key)
+            button.clip_image.set_from_pixbuf(pixbuf)
+            return
+
+        button.clip_image.clear()
+        self._thumbnail_rows[key] = button
+        with self._thumbnail_condition:
+            self._thumbnail_requests[key] = item_id
+            self._thumbnail_requests.move_to_end(key)
+            self._thumbnail_condition.notify()
+        while self._thumbnail_workers < DECODE_WORKERS:
+            self._thumbnail_workers += 1
+            GLib.Thread.new("clip-thumbnail", self._thumbnail_worker, None)
+
+    def _cancel_thumbnail(self, button):
+        """Drop the pending preview of a row that scrolled out of view"""
+        key, button.clip_thumbnail_key = button.clip_thumbnail_key, None
+        if self._thumbnail_rows.get(key) is button:
+            del self._thumbnail_rows[key]
+            with self._thumbnail_condition:
+                self._thumbnail_requests.pop(key, None)
+
+    def _thumbnail_worker(self, user_data):
+        """Decode pool worker: disk cache first, `cliphist decode` otherwise"""
+        while True:
+            with self._thumbnail_condition:
+                while not self._thumbnail_requests:
+                    self._thumbnail_condition.wait()
+                key, item_id = self._thumbnail_requests.popitem()
+
+            pixbuf = self.thumbnail_cache.load(key)
+            if pixbuf is None:
+                pixbuf = self._decode_thumbnail(item_id)
+                if pixbuf is None:
+                    continue
+                self.thumbnail_cache.store(key, pixbuf)
+            GLib.idle_add(self._thumbnail_ready, key, pixbuf)
 
-        return (
-            content.startswith("data:image/") or
-            content.startswith("\x89PNG") or
-            content.startswith("GIF8") or
-            content.startswith("\xff\xd8\xff") or
-            re.match(r'^\s*<img\s+', content) is not None or
-            "binary" in content.lower() and any(ext in content.lower() for ext in ["jpg", "jpeg", "png", "bmp", "gif"])
+    def _decode_thumbnail(self, item_id):
+        """Decode an image entry straight to preview size"""
+        try:
+            content, _ = self._read_item(item_id)
+            loader = GdkPixbuf.PixbufLoader()
+            loader.connect("size-prepared", self._on_thumbnail_size_prepared)
+            loader.write(content)
+            loader.close()
+            return loader.get_pixbuf()
+        except Exception as e:
+            print(f"Error loading image preview: {e}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def _on_thumbnail_size_prepared(loader, width, height):
+        if width > height:
+            loader.set_size(THUMBNAIL_SIZE, max(1, int(height * (THUMBNAIL_SIZE / width))))
+        else:
+            loader.set_size(max(1, int(width * (THUMBNAIL_SIZE / height))), THUMBNAIL_SIZE)
+
+    def _thumbnail_ready(self, key, pixbuf):
+        """Keep a decoded preview and show it if its row still displays that entry"""
+        self.image_cache[key] = pixbuf
+        while len(self.image_cache) > PIXBUF_CACHE_SIZE:
+            self.image_cache.popitem(last=False)
+        button = self._thumbnail_rows.pop(key, None)
+        if button is not None and button.clip_thumbnail_key == key:
+            button.clip_image.set_from_pixbuf(pixbuf)
+        return False
+
+    def _read_item(self, item_id):
+        """Content of an entry and its mime type, None when unknown"""
+        if self.store is not None:
+            entry = self.store.get(item_id)
+            if entry is None:
+                raise LookupError(f"Clipboard entry {item_id} no longer exists")
+            return entry
+        result = subprocess.run(
+            ["cliphist", "decode", item_id],
+            capture_output=True,
+            check=True
         )
+        return result.stdout, None
 
-    def paste_item(self, item_id):
+    def is_image_data(self, content):
+        """Determine if clipboard content is likely an image"""
+        return is_image_preview(content)
+
+    def paste_item(self, item_id, preview=None):
         """Copy the selected item to the clipboard and close (async)"""
+        # Keyed by content; cliphist ids change when an entry is copied again
+        if preview is not None:
+            self.frecency_store.record(frecency.CLIPBOARD, preview)
         GLib.Thread.new("paste-item", self._paste_item_thread, item_id)
 
     def _paste_item_thread(self, item_id):
         """Background thread worker for pasting clipboard item"""
         try:
-            result = subprocess.run(
-                ["cliphist", "decode", item_id],
-                capture_output=True,
-                check=True
-            )
+            content, mime = self._read_item(item_id)
             subprocess.run(
-                ["wl-copy"],
-                input=result.stdout,
+                ["wl-copy", "--type", mime] if mime else ["wl-copy"],
+                input=content,
                 check=True
             )
             GLib.idle_add(self.close)
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, LookupError) as e:
             print(f"Error pasting clipboard item: {e}", file=sys.stderr)
 
     def delete_item(self, item_id):
         """Delete the selected clipboard item (async)"""
+        if self.store is not None:
+            self.store.delete(item_id)
+            self._remove_item(item_id)
+            return
         GLib.Thread.new("delete-item", self._delete_item_thread, item_id)
 
     def _delete_item_thread(self, item_id):
@@ -376,29 +534,37 @@ class ClipHistory(Box):
                 ["cliphist", "delete", item_id],
                 check=True
             )
-            self._pending_updates = True
-            if not self._loading:
-                GLib.Thread.new("cliphist-loader", self._load_clipboard_items_thread, None)
+            GLib.idle_add(self._remove_item, item_id)
         except subprocess.CalledProcessError as e:
             print(f"Error deleting clipboard item: {e}", file=sys.stderr)
 
+    def _remove_item(self, item_id):
+        """Drop a deleted entry from the index without listing everything again"""
+        self.clip_index.remove(item_id)
+        if self._loading_index is not None:
+            self._loading_index.remove(item_id)
+        self.display_clipboard_items(keep_position=True)
+        return False
+
     def clear_history(self):
         """Clear all clipboard history (async)"""
+        if self.store is not None:
+            self.store.wipe()
+            self.reload()
+            return
         GLib.Thread.new("clear-history", self._clear_history_thread, None)
 
     def _clear_history_thread(self, user_data):
         """Background thread worker for clearing clipboard history"""
         try:
             subprocess.run(["cliphist", "wipe"], check=True)
-            self._pending_updates = True
-            if not self._loading:
-                GLib.Thread.new("cliphist-loader", self._load_clipboard_items_thread, None)
+            GLib.idle_add(self.reload)
         except subprocess.CalledProcessError as e:
             print(f"Error clearing clipboard history: {e}", file=sys.stderr)
 
     def filter_items(self, entry, *_):
         """Filter clipboard items based on search text"""
-        self.display_clipboard_items(entry.get_text())
+        self.display_clipboard_items()
 
     def on_search_entry_key_press(self, widget, event):
         """Handle key presses in the search entry"""
@@ -420,91 +586,48 @@ class ClipHistory(Box):
         return False
 
     def update_selection(self, new_index):
-        """Update the selected item in the viewport"""
-        children = self.viewport.get_children()
-        
-
-        if self.selected_index != -1 and self.selected_index < len(children):
-            current_button = children[self.selected_index]
-            current_button.get_style_context().remove_class("selected")
-            
-
-        if new_index != -1 and new_index < len(children):
-            new_button = children[new_index]
-            new_button.get_style_context().add_class("selected")
-            self.selected_index = new_index
-            self.scroll_to_selected(new_button)
-        else:
-            self.selected_index = -1
+        """Update the selected item in the list"""
+        self.clip_list.set_selected(new_index)
+        self.selected_index = new_index if 0 <= new_index < len(self.clip_list) else -1
 
     def move_selection(self, delta):
         """Move the selection up or down"""
-        children = self.viewport.get_children()
-        if not children:
+        if not len(self.clip_list):
             return
-            
 
         if self.selected_index == -1 and delta == 1:
             new_index = 0
         else:
             new_index = self.selected_index + delta
             
-        new_index = max(0, min(new_index, len(children) - 1))
+        new_index = max(0, min(new_index, len(self.clip_list) - 1))
         self.update_selection(new_index)
 
-    def scroll_to_selected(self, button):
-        """Scroll to ensure the selected item is visible"""
-        def scroll():
-            adj = self.scrolled_window.get_vadjustment()
-            alloc = button.get_allocation()
-            if alloc.height == 0:
-                return False
-
-            y = alloc.y
-            height = alloc.height
-            page_size = adj.get_page_size()
-            current_value = adj.get_value()
-
-            visible_top = current_value
-            visible_bottom = current_value + page_size
-
-            if y < visible_top:
-
-                adj.set_value(y)
-            elif y + height > visible_bottom:
-
-                new_value = y + height - page_size
-                adj.set_value(new_value)
-            return False
-        GLib.idle_add(scroll)
+    def _selected_position(self):
+        """Index position of the selected entry, or -1"""
+        if self.selected_index == -1 or self.selected_index >= len(self.clip_list):
+            return -1
+        return self.clip_list.items[self.selected_index]
 
     def use_selected_item(self):
         """Use (paste) the selected clipboard item"""
-        children = self.viewport.get_children()
-        if not children or self.selected_index == -1 or self.selected_index >= len(self.clipboard_items):
+        position = self._selected_position()
+        if position == -1:
             return
-            
-
-        item_line = self.clipboard_items[self.selected_index]
-        item_id = item_line.split('\t', 1)[0]
-        self.paste_item(item_id)
+        self.paste_item(self.clip_index.ids[position], self.clip_index.previews[position])
 
     def delete_selected_item(self):
         """Delete the selected clipboard item"""
-        children = self.viewport.get_children()
-        if not children or self.selected_index == -1:
+        position = self._selected_position()
+        if position == -1:
             return
-            
-
-        item_line = self.clipboard_items[self.selected_index]
-        item_id = item_line.split('\t', 1)[0]
-        self.delete_item(item_id)
+        self.delete_item(self.clip_index.ids[position])
 
     def on_item_key_press(self, widget, event, item_id):
         """Handle key press events on clipboard items"""
         if event.keyval in (Gdk.KEY_Return, Gdk.KEY_KP_Enter):
 
-            self.paste_item(item_id)
+            self.paste_item(item_id, widget.clip_preview)
             return True
         return False
 
@@ -3,9 +3,8 @@ import logging
 
 import cairo
 from fabric.hyprland.widgets import get_hyprland_connection
-from fabric.utils import (exec_shell_command, exec_shell_command_async,
-                          get_relative_path, idle_add, remove_handler)
-from fabric.utils.helpers import get_desktop_applications
+from fabric.utils import (exec_shell_command_async, get_relative_path,
+                          idle_add, remove_handler)
 from fabric.widgets.box import Box
 from fabric.widgets.button import Button
 from fabric.widgets.eventbox import EventBox
@@ -15,6 +14,9 @@ from gi.repository import Gdk, GLib, Gtk
 
 import config.data as data
 from modules.corners import MyCorner
+from services.app_catalog import get_app_catalog, normalize_window_class
+from services.hyprland_commands import get_hyprland_commands
+from services.hyprland_state import get_hyprland_state
 from utils.icon_resolver import IconResolver
 from widgets.wayland import WaylandWindow as Window
 
@@ -27,14 +29,13 @@ def read_config():
             config_data = json.load(file)
             
         if "pinned_apps" in config_data and config_data["pinned_apps"] and isinstance(config_data["pinned_apps"][0], str):
-            all_apps = get_desktop_applications()
-            app_map = {app.name: app for app in all_apps if app.name}
+            catalog = get_app_catalog()
             
             old_pinned = config_data["pinned_apps"]
             config_data["pinned_apps"] = []
             
             for app_id in old_pinned:
-                app = app_map.get(app_id)
+                app = catalog.find(app_id)
                 if app:
                     app_data_obj = {
                         "name": app.name,
@@ -144,12 +145,11 @@ class Dock(Window):
 
         self.config = read_config()
         self.conn = get_hyprland_connection()
+        self.hypr_state = get_hyprland_state()
         self.icon_resolver = IconResolver() 
         self.pinned = self.config.get("pinned_apps", [])
         self.config_path = get_relative_path("../config/dock.json")
-        self.app_map = {}
-        self._all_apps = get_desktop_applications()
-        self.app_identifiers = self._build_app_identifiers_map()
+        self.app_catalog = get_app_catalog()
         
         self.hide_id = None
         self._arranger_handler = None
@@ -285,45 +285,21 @@ class Dock(Window):
         self.view.connect("drag-begin", self.on_drag_begin)
         self.view.connect("drag-end", self.on_drag_end)
 
+        # update_dock re-evaluates the reveal state, hover/drag handlers and
+        # config changes do the rest, so no polling timer is needed.
         if self.conn.ready:
             self.update_dock()
-            if not self.integrated_mode: GLib.timeout_add(500, self.check_occlusion_state)
         else:
             self.conn.connect("event::ready", self.update_dock)
-            if not self.integrated_mode: self.conn.connect("event::ready", lambda *args: GLib.timeout_add(250, self.check_occlusion_state))
 
         for ev in ("activewindow", "openwindow", "closewindow", "changefloatingmode"):
             self.conn.connect(f"event::{ev}", self.update_dock)
         
         if not self.integrated_mode:
-            self.conn.connect("event::workspace", self.check_hide)
+            self.hypr_state.connect("active-workspace-changed", self.check_hide)
         
+        self.app_catalog.connect("changed", self.update_dock)
         GLib.timeout_add_seconds(2, self.check_config_change)
-            
-    def _build_app_identifiers_map(self):
-        identifiers = {}
-        for app in self._all_apps:
-            if app.name: identifiers[app.name.lower()] = app
-            if app.display_name: identifiers[app.display_name.lower()] = app
-            if app.window_class: identifiers[app.window_class.lower()] = app
-            if app.executable: identifiers[app.executable.split('/')[-1].lower()] = app
-            if app.command_line: identifiers[app.command_line.split()[0].split('/')[-1].lower()] = app
-        return identifiers
-
-    def _normalize_window_class(self, class_name):
-        if not class_name: return ""
-        normalized = class_name.lower()
-        suffixes = [".bin", ".exe", ".so", "-bin", "-gtk"]
-        for suffix in suffixes:
-            if normalized.endswith(suffix):
-                normalized = normalized[:-len(suffix)]
-        return normalized
-        
-    def _classes_match(self, class1, class2):
-        if not class1 or not class2: return False
-        norm1 = self._normalize_window_class(class1)
-        norm2 = self._normalize_window_class(class2)
-        return norm1 == norm2
 
     def on_drag_begin(self, widget, drag_context):
         self._drag_in_progress = True
@@ -343,7 +319,7 @@ class Dock(Window):
         if self.integrated_mode: return 
         self.is_mouse_over_dock_area = False
         if self._forced_occlusion:
-            self.dock_revealer.set_reveal_child(False)
+            self.check_occlusion_state()
         else:
             self.delay_hide()
 
@@ -386,21 +362,7 @@ class Dock(Window):
     
     def find_app_by_key(self, key_value):
         if not key_value: return None
-        normalized_id = str(key_value).lower()
-        if normalized_id in self.app_identifiers:
-            return self.app_identifiers[normalized_id]
-        for app in self._all_apps:
-            if app.name and normalized_id in app.name.lower(): return app
-            if app.display_name and normalized_id in app.display_name.lower(): return app
-            if app.window_class and normalized_id in app.window_class.lower(): return app
-            if app.executable and normalized_id in app.executable.lower(): return app
-            if app.command_line and normalized_id in app.command_line.lower(): return app
-        return None
-
-    def update_app_map(self):
-        self._all_apps = get_desktop_applications()
-        self.app_map = {app.name: app for app in self._all_apps if app.name}
-        self.app_identifiers = self._build_app_identifiers_map()
+        return self.app_catalog.find(key_value) or self.app_catalog.find_by_substring(key_value)
 
     def create_button(self, app_identifier, instances):
         desktop_app = self.find_app(app_identifier)
@@ -473,7 +435,7 @@ class Dock(Window):
             focused = self.get_focused()
             idx = next((i for i, inst in enumerate(instances) if inst["address"] == focused), -1)
             next_inst = instances[(idx + 1) % len(instances)]
-            exec_shell_command(f"hyprctl dispatch focuswindow address:{next_inst['address']}")
+            get_hyprland_commands().dispatch(f"focuswindow address:{next_inst['address']}")
 
     def _on_child_enter(self, widget, event):
         if self.integrated_mode: return False 
@@ -494,8 +456,7 @@ class Dock(Window):
             return False 
         self.hide_id = None 
         if not self.is_mouse_over_dock_area and not self._drag_in_progress and not self._prevent_occlusion:
-            if not self.always_show:
-                self.dock_revealer.set_reveal_child(False)
+            self.check_occlusion_state()
         return False
 
     def check_hide(self, *args):
@@ -504,9 +465,7 @@ class Dock(Window):
         if self.is_mouse_over_dock_area or self._drag_in_progress or self._prevent_occlusion:
             return
 
-        clients = self.get_clients()
-        current_ws = self.get_workspace()
-        ws_clients = [w for w in clients if w["workspace"]["id"] == current_ws]
+        ws_clients = self.hypr_state.get_workspace_clients(self.get_workspace())
 
         if self.always_show:
             if not self.dock_revealer.get_reveal_child():
@@ -518,7 +477,6 @@ class Dock(Window):
             self.dock_full.add_style_class("occluded")
 
     def update_dock(self, *args):
-        self.update_app_map()
         arranger_handler = getattr(self, "_arranger_handler", None)
         if arranger_handler: remove_handler(arranger_handler)
         clients = self.get_clients()
@@ -534,7 +492,7 @@ class Dock(Window):
                 else: window_id = title
             if not window_id: window_id = "unknown-app"
             running_windows.setdefault(window_id, []).append(c)
-            normalized_id = self._normalize_window_class(window_id)
+            normalized_id = normalize_window_class(window_id)
             if normalized_id != window_id:
                 running_windows.setdefault(normalized_id, []).extend(running_windows[window_id])
         
@@ -566,7 +524,7 @@ class Dock(Window):
             for identifier in possible_identifiers:
                 if identifier in running_windows:
                     instances = running_windows[identifier]; matched_class = identifier; break
-                normalized = self._normalize_window_class(identifier)
+                normalized = normalize_window_class(identifier)
                 if normalized in running_windows:
                     instances = running_windows[normalized]; matched_class = normalized; break
                 for window_class_key in running_windows: 
@@ -577,19 +535,14 @@ class Dock(Window):
             
             if matched_class:
                 used_window_classes.add(matched_class)
-                used_window_classes.add(self._normalize_window_class(matched_class))
+                used_window_classes.add(normalize_window_class(matched_class))
             
             pinned_buttons.append(self.create_button(app_data_item, instances))
         
         open_buttons = []
         for class_name, instances in running_windows.items():
             if class_name not in used_window_classes:
-                app = None
-                app = self.app_identifiers.get(class_name)
-                if not app:
-                    norm_class = self._normalize_window_class(class_name)
-                    app = self.app_identifiers.get(norm_class)
-                if not app: app = self.find_app_by_key(class_name)
+                app = self.find_app_by_key(class_name)
                 if not app and instances and instances[0].get("title"):
                     title = instances[0].get("title", "")
                     potential_name = title.split(" - ")[0].strip()
@@ -625,16 +578,13 @@ class Dock(Window):
         return False
 
     def get_clients(self):
-        try: return json.loads(self.conn.send_command("j/clients").reply.decode())
-        except json.JSONDecodeError: return []
+        return self.hypr_state.get_clients()
 
     def get_focused(self):
-        try: return json.loads(self.conn.send_command("j/activewindow").reply.decode()).get("address", "")
-        except json.JSONDecodeError: return ""
+        return self.hypr_state.get_active_window_address()
 
     def get_workspace(self):
-        try: return json.loads(self.conn.send_command("j/activeworkspace").reply.decode()).get("id", 0)
-        except json.JSONDecodeError: return 0
+        return self.hypr_state.get_active_workspace_id()
 
     def check_occlusion_state(self):
         if self.integrated_mode:
@@ -650,14 +600,14 @@ class Dock(Window):
                 if self.dock_revealer.get_reveal_child():
                     self.dock_revealer.set_reveal_child(False)
                 self.dock_full.add_style_class("occluded")
-            return True
+            return False
 
         if self.is_mouse_over_dock_area or self._drag_in_progress or self._prevent_occlusion:
             if not self.dock_revealer.get_reveal_child():
                 self.dock_revealer.set_reveal_child(True)
             if not self.always_show:
                  self.dock_full.remove_style_class("occluded")
-            return True
+            return False
 
         if self.always_show:
             if not self.dock_revealer.get_reveal_child():
@@ -668,7 +618,7 @@ class Dock(Window):
                 self.dock_revealer.set_reveal_child(False)
             self.dock_full.add_style_class("occluded")
 
-        return True
+        return False
 
     def _find_drag_target(self, widget):
         children = self.view.get_children()
@@ -746,7 +696,7 @@ class Dock(Window):
                 elif instances_dragged:
                     address = instances_dragged[0].get("address")
                     if address:
-                        exec_shell_command(f"hyprctl dispatch focuswindow address:{address}")
+                        get_hyprland_commands().dispatch(f"focuswindow address:{address}")
 
             self._drag_in_progress = False
             if not self.integrated_mode:
@@ -764,7 +714,6 @@ class Dock(Window):
         if new_config.get("pinned_apps", []) != self.config.get("pinned_apps", []):
             self.config = new_config
             self.pinned = self.config.get("pinned_apps", [])
-            self.update_app_map()
             self.update_dock()
         return True 
 
@@ -818,7 +767,6 @@ class Dock(Window):
         if new_config.get("pinned_apps", []) != self.config.get("pinned_apps", []):
             self.config = new_config
             self.pinned = self.config.get("pinned_apps", [])
-            self.update_app_map()
             self.update_dock()
         return False 
 
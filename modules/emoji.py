@@ -13,6 +13,7 @@ from gi.repository import Gdk
 
 import config.data as data
 import modules.icons as icons
+from utils import frecency
 
 vertical_mode = data.PANEL_THEME == "Panel" and (data.BAR_POSITION in ["Left", "Right"] or data.PANEL_POSITION in ["Start", "End"])
 
@@ -37,6 +38,7 @@ class EmojiPicker(Box):
 
         self._arranger_handler: int = 0
         self._all_emojis = self._load_emoji_data()
+        self.frecency_store = frecency.get_frecency_store()
 
         self.stack = Stack(
             name="viewport",
@@ -119,6 +121,10 @@ class EmojiPicker(Box):
             for emoji_char, emoji_info in self._all_emojis.items()
             if query.casefold() in (emoji_info.get("name", "") + " " + emoji_info.get("group", "")).casefold()
         ]
+        # Frequently picked emojis first; the sort is stable for the rest
+        usage = self.frecency_store.scores(frecency.EMOJI)
+        if usage:
+            self.filtered_emojis.sort(key=lambda item: -usage.get(item[0], 0.0))
         self.total_pages = (len(self.filtered_emojis) + self.emojis_per_page - 1) // self.emojis_per_page if self.filtered_emojis else 0
 
         self.load_page(self.current_page_index)
@@ -315,6 +321,7 @@ class EmojiPicker(Box):
         self.update_selection(new_index)
 
     def copy_emoji_to_clipboard(self, emoji_char: str):
+        self.frecency_store.record(frecency.EMOJI, emoji_char)
         try:
             subprocess.run(["wl-copy"], input=emoji_char.encode('utf-8'), check=True)
         except subprocess.CalledProcessError as e:
@@ -1,14 +1,8 @@
 import json
-import math
-import operator
 import os
-import re
 import subprocess
-from collections.abc import Iterator
 
-import numpy as np
-from fabric.utils import (DesktopApp, exec_shell_command_async,
-                          get_desktop_applications, idle_add, remove_handler)
+from fabric.utils import exec_shell_command_async
 from fabric.utils.helpers import get_relative_path
 from fabric.widgets.box import Box
 from fabric.widgets.button import Button
@@ -22,11 +16,18 @@ import config.data as data
 import modules.icons as icons
 from modules.dock import Dock
 from modules.updater import run_updater
+from services.app_catalog import get_app_catalog
+from utils import frecency
+from utils.app_search import AppSearchIndex
+from utils.calculator import Calculator
 from utils.conversion import Conversion
+from widgets.recycled_list import RecycledList
 
 tooltip_settings = f"<b>Open {data.APP_NAME_CAP} Settings</b>"
 tooltip_close = "<b>Close</b>"
 
+HISTORY_SAVE_DELAY_MS = 1000
+
 class AppLauncher(Box):
     def __init__(self, **kwargs):
         super().__init__(
@@ -39,24 +40,21 @@ class AppLauncher(Box):
         self.notch = kwargs["notch"]
         self.selected_index = -1
 
-        self._arranger_handler: int = 0
-        self._all_apps = get_desktop_applications()
+        self.app_catalog = get_app_catalog()
+        self._all_apps = self.app_catalog.get_apps()
+        self._search_index = AppSearchIndex(self._all_apps)
+        self.frecency_store = frecency.get_frecency_store()
+        self.app_catalog.connect("changed", self._on_apps_changed)
 
 
         self.converter = Conversion()
+        self.calculator = Calculator()
+        self._pending_calculation = None
+        # Histories are read on first use and written behind a debounce
         self.calc_history_path = f"{data.CACHE_DIR}/calc.json"
-        if os.path.exists(self.calc_history_path):
-            with open(self.calc_history_path, "r") as f:
-                self.calc_history = json.load(f)
-        else:
-            self.calc_history = []
-        
         self.conversion_history_path = f"{data.CACHE_DIR}/conversion.json"
-        if os.path.exists(self.conversion_history_path):
-            with open(self.conversion_history_path, "r") as f:
-                self.conversion_history = json.load(f)
-        else:
-            self.conversion_history = []
+        self._histories = {}
+        self._history_save_ids = {}
 
         self.viewport = Box(name="viewport", spacing=4, orientation="v")
         self.search_entry = Entry(
@@ -76,10 +74,20 @@ class AppLauncher(Box):
             v_expand=True,
             h_align="fill",
             v_align="fill",
-            child=self.viewport,
             propagate_width=False,
             propagate_height=False,
         )
+        # Application results reuse a fixed pool of rows; calculator and
+        # conversion history keep using the plain viewport box.
+        self.app_list = RecycledList(
+            self.scrolled_window,
+            create_row=self.create_app_row,
+            bind_row=self.bind_app_row,
+            spacing=4,
+        )
+        self.scrolled_window.add(
+            Box(orientation="v", children=[self.app_list, self.viewport])
+        )
 
         self.header_box = Box(
             name="header_box",
@@ -120,12 +128,17 @@ class AppLauncher(Box):
         self.show_all()
 
     def close_launcher(self):
+        self._discard_pending_calculation()
         self.viewport.children = []
+        self.app_list.set_items([])
         self.selected_index = -1
         self.notch.close_notch()
 
+    def _on_apps_changed(self, *_):
+        self._all_apps = self.app_catalog.get_apps()
+        self._search_index.set_apps(self._all_apps)
+
     def open_launcher(self):
-        self._all_apps = get_desktop_applications()
         self.arrange_viewport()
         
 
@@ -144,8 +157,6 @@ class AppLauncher(Box):
     def ensure_initialized(self):
         """Make sure the launcher is initialized with apps list before opening"""
         if not hasattr(self, '_initialized'):
-
-            self._all_apps = get_desktop_applications()
             self._initialized = True
             return True
         return False
@@ -158,69 +169,26 @@ class AppLauncher(Box):
         if query.startswith(";"):
             # In conversion mode, update history view once (not per keystroke)
             self.update_conversion_viewport()
+            # Have fresh currency rates ready by the time the expression is entered
+            if self.converter.rates.is_stale():
+                self.converter.rates.refresh_in_background()
             return
-        remove_handler(self._arranger_handler) if self._arranger_handler else None
         self.viewport.children = []
+        self.app_list.set_visible(True)
         self.selected_index = -1
 
-        def extract_command_name(command_line):
-            """Extract base command name from command line, removing paths and arguments"""
-            if not command_line:
-                return ""
-            # Remove common shell wrappers
-            if command_line.startswith("/bin/sh -c"):
-                # Handle wrapped commands like "/bin/sh -c "\$SHELL -i -c scrcpy""
-                return ""
-            # Split by spaces and take first part (the command)
-            cmd = command_line.split()[0] if command_line.split() else ""
-            # Extract just the command name from full paths
-            if "/" in cmd:
-                cmd = cmd.split("/")[-1]
-            return cmd
-
-        filtered_apps_iter = iter(
-            sorted(
-                [
-                    app
-                    for app in self._all_apps
-                    if query.casefold()
-                    in (
-                        (app.display_name or "")
-                        + (" " + app.name + " ")
-                        + (app.generic_name or "")
-                        + (" " + (app.command_line or "") + " ")
-                        + (" " + (app.executable or "") + " ")
-                        + (" " + extract_command_name(app.command_line) + " ")
-                    ).casefold()
-                ],
-                key=lambda app: (app.display_name or "").casefold(),
-            )
+        self.app_list.set_items(
+            self._search_index.search(query, self.frecency_store.scores(frecency.APPS))
         )
-        should_resize = operator.length_hint(filtered_apps_iter) == len(self._all_apps)
-
-        self._arranger_handler = idle_add(
-            lambda apps_iter: self.add_next_application(apps_iter) or self.handle_arrange_complete(should_resize, query),
-            filtered_apps_iter,
-            pin=True,
-        )
-
-    def handle_arrange_complete(self, should_resize, query):
-        if query.strip() != "" and self.viewport.get_children():
+        if query.strip() != "" and len(self.app_list):
             self.update_selection(0)
-        return False
-
-    def add_next_application(self, apps_iter: Iterator[DesktopApp]):
-        if not (app := next(apps_iter, None)):
-            return False
-        self.viewport.add(self.bake_application_slot(app))
-        return True
 
     def resize_viewport(self):
         # Removed set_min_content_width to prevent size retention issues
         # when switching between modules in the notch stack
         pass
 
-    def bake_application_slot(self, app: DesktopApp, **kwargs) -> Button:
+    def create_app_row(self) -> Button:
         button = Button(
             name="slot-button",
             child=Box(
@@ -228,17 +196,15 @@ class AppLauncher(Box):
                 orientation="h",
                 spacing=10,
                 children=[
-                    Image(name="app-icon", pixbuf=app.get_icon_pixbuf(size=24), h_align="start"),
+                    Image(name="app-icon", h_align="start"),
                     Label(
                         name="app-label",
-                        label=app.display_name or "Unknown",
                         ellipsization="end",
                         v_align="center",
                         h_align="center",
                     ),
                     Label(
                         name="app-desc",
-                        label=app.description or "",
                         ellipsization="end",
                         v_align="center",
                         h_align="start",
@@ -246,13 +212,31 @@ class AppLauncher(Box):
                     ),
                 ],
             ),
-            tooltip_text=app.description,
-            on_clicked=lambda *_: (app.launch(), self.close_launcher()),
-            **kwargs,
+            on_clicked=lambda button: self.launch_app(button.app),
         )
+        button.app = None
+        button.app_icon, button.app_label, button.app_desc = button.get_child().get_children()
         return button
 
+    def bind_app_row(self, button: Button, app):
+        if button.app is app:
+            return
+        button.app = app
+        button.app_icon.set_from_pixbuf(app.get_icon_pixbuf(size=24))
+        button.app_label.set_label(app.display_name or "Unknown")
+        button.app_desc.set_label(app.description or "")
+        button.set_tooltip_text(app.description)
+
+    def launch_app(self, app):
+        app.launch()
+        self.frecency_store.record(frecency.APPS, app.id)
+        self.close_launcher()
+
     def update_selection(self, new_index: int):
+        if self.app_list.get_visible():
+            self.app_list.set_selected(new_index)
+            self.selected_index = new_index if 0 <= new_index < len(self.app_list) else -1
+            return
 
         if self.selected_index != -1 and self.selected_index < len(self.viewport.get_children()):
             current_button = self.viewport.get_children()[self.selected_index]
@@ -313,14 +297,14 @@ class AppLauncher(Box):
             case ":update":
                 GLib.idle_add(lambda: run_updater(force=True))
             case _:
-                children = self.viewport.get_children()
-                if children:
+                apps = self.app_list.items
+                if apps:
 
                     if text.strip() == "" and self.selected_index == -1:
                         return
                     selected_index = self.selected_index if self.selected_index != -1 else 0
-                    if 0 <= selected_index < len(children):
-                        children[selected_index].clicked()
+                    if 0 <= selected_index < len(apps):
+                        self.launch_app(apps[selected_index])
 
     def on_search_entry_key_press(self, widget, event):
         text = widget.get_text()
@@ -417,15 +401,11 @@ class AppLauncher(Box):
 
     def add_selected_app_to_dock(self):
         """Adds the currently selected application to the dock.json file with comprehensive metadata."""
-        children = self.viewport.get_children()
-        if not children or self.selected_index == -1 or self.selected_index >= len(children):
+        apps = self.app_list.items
+        if not apps or self.selected_index == -1 or self.selected_index >= len(apps):
             return
 
-        selected_button = children[self.selected_index]
-
-        selected_app = next((app for app in self._all_apps if app.display_name == selected_button.get_child().get_children()[1].props.label), None)
-        if not selected_app:
-            return
+        selected_app = apps[self.selected_index]
 
         app_data = {k: v for k, v in {
             "name": selected_app.name,
@@ -468,24 +448,65 @@ class AppLauncher(Box):
         Dock.notify_config_change()
 
     def move_selection(self, delta: int):
-        children = self.viewport.get_children()
-        if not children:
+        if self.app_list.get_visible():
+            count = len(self.app_list)
+        else:
+            count = len(self.viewport.get_children())
+        if not count:
             return
 
         if self.selected_index == -1 and delta == 1:
             new_index = 0
         else:
             new_index = self.selected_index + delta
-        new_index = max(0, min(new_index, len(children) - 1))
+        new_index = max(0, min(new_index, count - 1))
         self.update_selection(new_index)
 
+    @property
+    def calc_history(self) -> list:
+        return self._load_history(self.calc_history_path)
+
+    @property
+    def conversion_history(self) -> list:
+        return self._load_history(self.conversion_history_path)
+
+    def _load_history(self, path: str) -> list:
+        if path not in self._histories:
+            try:
+                with open(path, "r") as f:
+                    self._histories[path] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._histories[path] = []
+        return self._histories[path]
+
+    def _save_history_later(self, path: str):
+        if path not in self._history_save_ids:
+            self._history_save_ids[path] = GLib.timeout_add(
+                HISTORY_SAVE_DELAY_MS, self._write_history, path
+            )
+
+    def _write_history(self, path: str):
+        self._history_save_ids.pop(path, None)
+        tmp_path = f"{path}.tmp"
+        # A calculation still running is shown in the list but never saved
+        history = [
+            entry
+            for entry in self._histories.get(path, [])
+            if entry != self._pending_calculation
+        ]
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(history, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to save history {path}: {e}")
+        return False
+
     def save_calc_history(self):
-        with open(self.calc_history_path, "w") as f:
-            json.dump(self.calc_history, f)
+        self._save_history_later(self.calc_history_path)
 
     def save_conversion_history(self):
-        with open(self.conversion_history_path, "w") as f:
-            json.dump(self.conversion_history, f)
+        self._save_history_later(self.conversion_history_path)
 
     def evaluate_calculator_expression(self, text: str):
 
@@ -495,71 +516,33 @@ class AppLauncher(Box):
         expr = text.lstrip("=").strip()
         if not expr:
             return
-            
-
-        replacements = {
-            "^": "**",
-            "×": "*",
-            "÷": "/",
-            "π": "np.pi",
-            "pi": "np.pi",
-            "e": "np.e",
-            "sin(": "np.sin(",
-            "cos(": "np.cos(",
-            "tan(": "np.tan(",
-            "log(": "np.log10(",
-            "ln(": "np.log(",
-            "sqrt(": "np.sqrt(",
-            "abs(": "np.abs(",
-            "exp(": "np.exp("
-        }
-        
-
-        for old, new in replacements.items():
-            expr = expr.replace(old, new)
-            
-
-        expr = re.sub(r'(\d+)!', r'np.factorial(\1)', expr)
-        
-
-        for old, new in [("[", "("), ("]", ")"), ("{", "("), ("}", ")")]:
-            expr = expr.replace(old, new)
-            
 
-        safe_dict = {
-            'np': np,
-            'math': math,
-            'arange': np.arange,
-            'linspace': np.linspace,
-            'array': np.array
-        }
-        
-        try:
+        # A newer expression supersedes one that is still being evaluated
+        self._discard_pending_calculation()
+        self._pending_calculation = f"{text} => Calculating..."
+        self.calc_history.insert(0, self._pending_calculation)
+        self.update_calculator_viewport()
 
-            result = eval(expr, {"__builtins__": None}, safe_dict)
-            
+        self.calculator.evaluate(
+            expr, lambda result_str: self._update_calculator_result(text, result_str)
+        )
 
-            if isinstance(result, np.ndarray):
-                if result.size > 10:
-                    result_str = f"Array of shape {result.shape}"
-                else:
-                    result_str = str(result)
-            elif isinstance(result, (int, float, np.number)):
+    def _discard_pending_calculation(self):
+        self.calculator.cancel()
+        if self._pending_calculation in self.calc_history:
+            self.calc_history.remove(self._pending_calculation)
+        self._pending_calculation = None
 
-                if isinstance(result, (int, np.integer)) or result.is_integer():
-                    result_str = str(int(result))
-                else:
-                    result_str = f"{float(result):.10g}"
-            else:
-                result_str = str(result)
-                
-        except Exception as e:
-            result_str = f"Error: {str(e)}"
-            
-
-        self.calc_history.insert(0, f"{text} => {result_str}")
+    def _update_calculator_result(self, text: str, result_str: str):
+        entry = f"{text} => {result_str}"
+        if self._pending_calculation in self.calc_history:
+            self.calc_history[self.calc_history.index(self._pending_calculation)] = entry
+        else:
+            self.calc_history.insert(0, entry)
+        self._pending_calculation = None
         self.save_calc_history()
-        self.update_calculator_viewport()
+        if self.search_entry.get_text().startswith("="):
+            self.update_calculator_viewport()
 
     def evaluate_conversion_expression(self, text: str):
         print(f"Evaluating conversion expression: {text}")
@@ -599,6 +582,7 @@ class AppLauncher(Box):
         self.update_conversion_viewport()
         
     def update_calculator_viewport(self):
+        self.app_list.set_visible(False)
         self.viewport.children = []
         for item in self.calc_history:
             btn = self.create_calc_history_button(item)
@@ -608,6 +592,7 @@ class AppLauncher(Box):
             self.selected_index = -1
     
     def update_conversion_viewport(self):
+        self.app_list.set_visible(False)
         self.viewport.children = []
         for item in self.conversion_history:
             btn = self.create_conversion_history_button(item)
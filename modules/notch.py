@@ -1,5 +1,5 @@
 from fabric.hyprland.widgets import HyprlandActiveWindow as ActiveWindow
-from fabric.utils.helpers import FormattedString, get_desktop_applications
+from fabric.utils.helpers import FormattedString
 from fabric.widgets.box import Box
 from fabric.widgets.centerbox import CenterBox
 from fabric.widgets.image import Image
@@ -19,8 +19,10 @@ from modules.player import PlayerSmall
 from modules.power import PowerMenu
 from modules.tmux import TmuxManager
 from modules.tools import Toolbox
+from services.app_catalog import get_app_catalog
+from services.hyprland_state import get_hyprland_state
 from utils.icon_resolver import IconResolver
-from utils.occlusion import check_occlusion
+from utils.occlusion import get_occlusion_engine
 from widgets.wayland import WaylandWindow as Window
 
 
@@ -148,10 +150,13 @@ class Notch(Window):
         self._prevent_occlusion = False
         self._occlusion_timer_id = None
         self._forced_occlusion = False
+        self._occlusion_active = (
+            data.PANEL_THEME == "Notch" and data.BAR_POSITION != "Top"
+        )
 
+        self.hypr_state = get_hyprland_state()
         self.icon_resolver = IconResolver()
-        self._all_apps = get_desktop_applications()
-        self.app_identifiers = self._build_app_identifiers_map()
+        self.app_catalog = get_app_catalog()
 
         self.dashboard = Dashboard(notch=self)
         self.nhistory = self.dashboard.widgets.notification_history
@@ -412,6 +417,9 @@ class Notch(Window):
         )
 
         self.update_window_icon()
+        self.hypr_state.connect(
+            "active-window-changed", lambda *_: self.update_window_icon()
+        )
 
         self.active_window.connect(
             "button-press-event",
@@ -424,8 +432,12 @@ class Notch(Window):
 
         self._current_window_class = self._get_current_window_class()
 
-        if data.PANEL_THEME == "Notch" and data.BAR_POSITION != "Top":
-            GLib.timeout_add(500, self._check_occlusion)
+        self.occlusion_engine = get_occlusion_engine()
+        self.occlusion_engine.watch(self.monitor_id, "top", 40)
+        self.occlusion_engine.connect("occlusion-changed", self._on_occlusion_changed)
+
+        if self._occlusion_active:
+            self._check_occlusion()
         elif data.PANEL_THEME == "Notch":
             self.notch_revealer.set_reveal_child(True)
         else:
@@ -448,6 +460,7 @@ class Notch(Window):
         window = widget.get_window()
         if window:
             window.set_cursor(None)
+        self._update_occlusion()
         return True
 
     def on_notch_hover_area_enter(self, widget, event):
@@ -464,6 +477,7 @@ class Notch(Window):
             return False
 
         self.is_hovered = False
+        self._update_occlusion()
 
         return False
 
@@ -491,6 +505,8 @@ class Notch(Window):
             else:
                 self.set_margin("-40px 8px 8px 8px")
 
+        self._update_occlusion()
+
     def open_notch(self, widget_name: str):
         # Debug info for troubleshooting
         if hasattr(self, '_debug_monitor_focus') and self._debug_monitor_focus:
@@ -530,42 +546,11 @@ class Notch(Window):
         self._open_notch_internal(widget_name)
     
     def _get_real_focused_monitor_id(self):
-        """Get the real focused monitor ID directly from Hyprland."""
-        # Use thread to avoid blocking UI
-        self._focused_monitor_result = None
-        GLib.Thread.new("get-focused-monitor", self._get_focused_monitor_thread, None)
-        # Wait for result (not ideal, but for compatibility)
-        import time
-        start = time.time()
-        while self._focused_monitor_result is None and time.time() - start < 2.0:
-            time.sleep(0.01)
-        return self._focused_monitor_result
-
-    def _get_focused_monitor_thread(self, user_data):
-        try:
-            import json
-            import subprocess
-
-            # Get focused monitor from Hyprland
-            result = subprocess.run(
-                ["hyprctl", "monitors", "-j"],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=2.0
-            )
-
-            monitors = json.loads(result.stdout)
-            for i, monitor in enumerate(monitors):
-                if monitor.get('focused', False):
-                    self._focused_monitor_result = i
-                    return
-
-        except (subprocess.CalledProcessError, json.JSONDecodeError,
-                FileNotFoundError, subprocess.TimeoutExpired) as e:
-            print(f"Warning: Could not get focused monitor from Hyprland: {e}")
-
-        self._focused_monitor_result = None
+        """Get the real focused monitor ID from the event-fed Hyprland state."""
+        for i, monitor in enumerate(self.hypr_state.get_monitors()):
+            if monitor.get('focused', False):
+                return i
+        return None
     
     def _open_notch_internal(self, widget_name: str):
         
@@ -767,33 +752,9 @@ class Notch(Window):
 
             self.update_window_icon()
 
-    def _build_app_identifiers_map(self):
-        """Build a mapping of app identifiers (class names, executables, names) to DesktopApp objects"""
-        identifiers = {}
-        for app in self._all_apps:
-            if app.name:
-                identifiers[app.name.lower()] = app
-
-            if app.display_name:
-                identifiers[app.display_name.lower()] = app
-
-            if app.window_class:
-                identifiers[app.window_class.lower()] = app
-
-            if app.executable:
-                exe_basename = app.executable.split("/")[-1].lower()
-                identifiers[exe_basename] = app
-
-            if app.command_line:
-                cmd_base = app.command_line.split()[0].split("/")[-1].lower()
-                identifiers[cmd_base] = app
-
-        return identifiers
-
     def find_app(self, app_id: str):
-        """Find a DesktopApp object by various identifiers using the pre-built map."""
-        normalized_id = app_id.lower()
-        return self.app_identifiers.get(normalized_id)
+        """Find an application by window class, executable or name."""
+        return self.app_catalog.find(app_id)
 
     def update_window_icon(self, *args):
         """Update the window icon based on the current active window title"""
@@ -809,55 +770,38 @@ class Notch(Window):
 
         self.window_icon.set_visible(True)
 
-        from fabric.hyprland.widgets import get_hyprland_connection
-
-        conn = get_hyprland_connection()
-        if conn:
-            try:
-                import json
-
-                active_window_json = conn.send_command("j/activewindow").reply.decode()
-                active_window_data = json.loads(active_window_json)
-                app_id = active_window_data.get(
-                    "initialClass", ""
-                ) or active_window_data.get("class", "")
+        try:
+            app_id = self.hypr_state.get_active_window_class()
 
-                icon_size = 20
-                desktop_app = self.find_app(app_id)
+            icon_size = 20
+            desktop_app = self.find_app(app_id)
 
-                icon_pixbuf = None
-                if desktop_app:
-                    icon_pixbuf = desktop_app.get_icon_pixbuf(size=icon_size)
+            icon_pixbuf = None
+            if desktop_app:
+                icon_pixbuf = desktop_app.get_icon_pixbuf(size=icon_size)
 
-                if not icon_pixbuf:
-                    icon_pixbuf = self.icon_resolver.get_icon_pixbuf(app_id, icon_size)
+            if not icon_pixbuf:
+                icon_pixbuf = self.icon_resolver.get_icon_pixbuf(app_id, icon_size)
 
-                if not icon_pixbuf and "-" in app_id:
-                    base_app_id = app_id.split("-")[0]
-                    icon_pixbuf = self.icon_resolver.get_icon_pixbuf(
-                        base_app_id, icon_size
-                    )
+            if not icon_pixbuf and "-" in app_id:
+                base_app_id = app_id.split("-")[0]
+                icon_pixbuf = self.icon_resolver.get_icon_pixbuf(
+                    base_app_id, icon_size
+                )
 
-                if icon_pixbuf:
-                    self.window_icon.set_from_pixbuf(icon_pixbuf)
-                else:
-                    try:
-                        self.window_icon.set_from_icon_name(
-                            "application-x-executable", 20
-                        )
-                    except:
-                        self.window_icon.set_from_icon_name(
-                            "application-x-executable-symbolic", 20
-                        )
-            except Exception as e:
-                print(f"Error updating window icon: {e}")
+            if icon_pixbuf:
+                self.window_icon.set_from_pixbuf(icon_pixbuf)
+            else:
                 try:
-                    self.window_icon.set_from_icon_name("application-x-executable", 20)
+                    self.window_icon.set_from_icon_name(
+                        "application-x-executable", 20
+                    )
                 except:
                     self.window_icon.set_from_icon_name(
                         "application-x-executable-symbolic", 20
                     )
-        else:
+        except Exception as e:
+            print(f"Error updating window icon: {e}")
             try:
                 self.window_icon.set_from_icon_name("application-x-executable", 20)
             except:
@@ -871,26 +815,29 @@ class Notch(Window):
         and update the notch_revealer accordingly.
         """
 
-        occlusion_edge = "top"
-        occlusion_size = 40
-
         if self._forced_occlusion:
             # When forced occlusion is active, show only on hover
             self.notch_revealer.set_reveal_child(self.is_hovered)
         elif not (self.is_hovered or self._is_notch_open or self._prevent_occlusion):
-            is_occluded = check_occlusion((occlusion_edge, occlusion_size))
+            is_occluded = self.occlusion_engine.is_occluded(self.monitor_id, "top")
             self.notch_revealer.set_reveal_child(not is_occluded)
 
-        return True
+        return False
+
+    def _update_occlusion(self):
+        """Re-evaluate occlusion after a hover/open state change, when it applies."""
+        if self._occlusion_active or self._forced_occlusion:
+            self._check_occlusion()
+
+    def _on_occlusion_changed(self, _, monitor_id: int, edge: str, occluded: bool):
+        if monitor_id == self.monitor_id and edge == "top":
+            self._update_occlusion()
     
     def force_occlusion(self):
         """Force notch to occlusion mode (hidden)."""
         self._forced_occlusion = True
         self._prevent_occlusion = False
         self.notch_revealer.set_reveal_child(False)
-        # Start occlusion check timer if in vertical mode (left/right)
-        if data.BAR_POSITION in ["Left", "Right"]:
-            GLib.timeout_add(100, self._check_occlusion)
     
     def restore_from_occlusion(self):
         """Restore notch from occlusion mode."""
@@ -901,24 +848,11 @@ class Notch(Window):
                 self.notch_revealer.set_reveal_child(True)
             else:
                 self._prevent_occlusion = False
+                self._check_occlusion()
 
     def _get_current_window_class(self):
         """Get the class of the currently active window"""
-        try:
-            from fabric.hyprland.widgets import get_hyprland_connection
-
-            conn = get_hyprland_connection()
-            if conn:
-                import json
-
-                active_window_json = conn.send_command("j/activewindow").reply.decode()
-                active_window_data = json.loads(active_window_json)
-                return active_window_data.get(
-                    "initialClass", ""
-                ) or active_window_data.get("class", "")
-        except Exception as e:
-            print(f"Error getting window class: {e}")
-        return ""
+        return self.hypr_state.get_active_window_class()
 
     def on_active_window_changed(self, *args):
         """
@@ -950,6 +884,7 @@ class Notch(Window):
 
         self._prevent_occlusion = False
         self._occlusion_timer_id = None
+        self._update_occlusion()
 
         return False
 
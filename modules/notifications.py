@@ -1,4 +1,3 @@
-import json
 import locale
 import os
 import uuid
@@ -8,6 +7,7 @@ from fabric.notifications.service import Notification, NotificationAction, Notif
 from fabric.widgets.box import Box
 from fabric.widgets.button import Button
 from fabric.widgets.centerbox import CenterBox
+from fabric.widgets.entry import Entry
 from fabric.widgets.image import Image
 from fabric.widgets.label import Label
 from fabric.widgets.revealer import Revealer
@@ -17,11 +17,21 @@ from loguru import logger
 
 import config.data as data
 import modules.icons as icons
+from utils.notification_images import NotificationImageCache
+from utils.notification_ingest import AppRateLimiter, ExpiryScheduler
+from utils.notification_search import (
+    NotificationSearchIndex,
+    highlight_markup,
+    search_terms,
+)
+from utils.notification_store import NotificationStore
 from widgets.image import CustomImage
 from widgets.wayland import WaylandWindow as Window
 
 PERSISTENT_DIR = f"/tmp/{data.APP_NAME}/notifications"
+# Single-file history of earlier versions, imported into the journal once
 PERSISTENT_HISTORY_FILE = os.path.join(PERSISTENT_DIR, "notification_history.json")
+HISTORY_JOURNAL_FILE = os.path.join(PERSISTENT_DIR, "notification_history.jsonl")
 
 
 # Get configurable app lists from settings
@@ -35,39 +45,9 @@ def get_history_ignored_apps():
     return config.get("history_ignored_apps", ["Hyprshot"])
 
 
-def cache_notification_pixbuf(notification_box):
-    """
-    Saves a scaled pixbuf (48x48) in the cache directory and returns the cache file path.
-    """
-    notification = notification_box.notification
-    if notification.image_pixbuf:
-        os.makedirs(PERSISTENT_DIR, exist_ok=True)
-        cache_file = os.path.join(
-            PERSISTENT_DIR, f"notification_{notification_box.uuid}.png"
-        )
-        logger.debug(
-            f"Caching image for notification {notification.id} to: {cache_file}"
-        )
-        try:
-            scaled = notification.image_pixbuf.scale_simple(
-                48, 48, GdkPixbuf.InterpType.BILINEAR
-            )
-            scaled.savev(cache_file, "png", [], [])
-            logger.info(
-                f"Successfully cached image for notification {notification.id} to: {cache_file}"
-            )
-            return cache_file
-        except Exception as e:
-            logger.error(f"Error caching image for notification {notification.id}: {e}")
-            return None
-    else:
-        logger.debug(f"Notification {notification.id} has no image_pixbuf to cache.")
-        return None
-
-
 def load_scaled_pixbuf(notification_box, width, height):
     """
-    Loads and scales a pixbuf for a notification_box, prioritizing cached images.
+    Loads and scales a pixbuf for a notification_box: its image, else its app icon.
     """
     notification = notification_box.notification
     if not hasattr(notification_box, "notification") or notification is None:
@@ -76,44 +56,13 @@ def load_scaled_pixbuf(notification_box, width, height):
         )
         return None
 
-    pixbuf = None
-    if (
-        hasattr(notification_box, "cached_image_path")
-        and notification_box.cached_image_path
-        and os.path.exists(notification_box.cached_image_path)
-    ):
-        try:
-            logger.debug(
-                f"Attempting to load cached image from: {notification_box.cached_image_path} for notification {notification.id}"
-            )
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file(notification_box.cached_image_path)
-            if pixbuf:
-                pixbuf = pixbuf.scale_simple(
-                    width, height, GdkPixbuf.InterpType.BILINEAR
-                )
-                logger.info(
-                    f"Successfully loaded cached image from: {notification_box.cached_image_path} for notification {notification.id}"
-                )
-            return pixbuf
-        except Exception as e:
-            logger.error(
-                f"Error loading cached image from {notification_box.cached_image_path} for notification {notification.id}: {e}"
-            )
-            logger.warning(
-                f"Falling back to notification.image_pixbuf for notification {notification.id}"
-            )
-
     if notification.image_pixbuf:
-        logger.debug(
-            f"Loading image directly from notification.image_pixbuf for notification {notification.id}"
-        )
-        pixbuf = notification.image_pixbuf.scale_simple(
+        return notification.image_pixbuf.scale_simple(
             width, height, GdkPixbuf.InterpType.BILINEAR
         )
-        return pixbuf
 
     logger.debug(
-        f"No image_pixbuf or cached image found, trying app icon for notification {notification.id}"
+        f"No image_pixbuf found, trying app icon for notification {notification.id}"
     )
     return get_app_icon_pixbuf(notification.app_icon, width, height)
 
@@ -137,6 +86,27 @@ def get_app_icon_pixbuf(icon_path, width, height):
         return None
 
 
+def load_note_pixbuf(note, image_cache, width, height):
+    """
+    Loads and scales the image of a history entry: its cached image, else
+    its app icon.
+    """
+    pixbuf = image_cache.load(note.get("image_key"))
+    if pixbuf is not None:
+        if (pixbuf.get_width(), pixbuf.get_height()) == (width, height):
+            return pixbuf
+        return pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+    # Entries from before the shared image cache have a file of their own
+    cached_image_path = note.get("cached_image_path")
+    if cached_image_path and os.path.exists(cached_image_path):
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file(cached_image_path)
+            return pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+        except Exception as e:
+            logger.error(f"Error loading cached image from {cached_image_path}: {e}")
+    return get_app_icon_pixbuf(note.get("app_icon"), width, height)
+
+
 class ActionButton(Button):
     def __init__(
         self, action: NotificationAction, index: int, total: int, notification_box
@@ -187,38 +157,18 @@ class NotificationBox(Box):
         )
         self.notification = notification
         self.uuid = str(uuid.uuid4())
+        # How many notifications this popup stands for once repeats are grouped
+        self.count = 1
 
-        if timeout_ms == 0:
-            self.timeout_ms = 0
-        else:
-            live_timeout = getattr(self.notification, "timeout", -1)
-            self.timeout_ms = live_timeout if live_timeout != -1 else timeout_ms
-        self._timeout_id = None
+        self._default_timeout_ms = timeout_ms
+        self.timeout_ms = self._timeout_for(notification)
         self._container = None
-        self.cached_image_path = None
-
-        if self.timeout_ms > 0:
-            self.start_timeout()
-
-        if self.notification.image_pixbuf:
-            cache_path = cache_notification_pixbuf(self)
-            if cache_path:
-                self.cached_image_path = cache_path
-                logger.debug(
-                    f"NotificationBox {self.uuid}: Cached image path set to: {self.cached_image_path}"
-                )
-            else:
-                logger.warning(
-                    f"NotificationBox {self.uuid}: Caching failed, cached_image_path not set."
-                )
-        else:
-            logger.debug(f"NotificationBox {self.uuid}: No image to cache.")
 
         content = self.create_content()
-        action_buttons = self.create_action_buttons()
+        self.action_buttons = self.create_action_buttons()
         self.add(content)
-        if action_buttons:
-            self.add(action_buttons)
+        if self.action_buttons:
+            self.add(self.action_buttons)
 
         self.connect("enter-notify-event", self.on_hover_enter)
         self.connect("leave-notify-event", self.on_hover_leave)
@@ -229,6 +179,31 @@ class NotificationBox(Box):
             f"NotificationBox {self.uuid} created for notification {notification.id}"
         )
 
+    def _timeout_for(self, notification):
+        if self._default_timeout_ms == 0:
+            return 0
+        live_timeout = getattr(notification, "timeout", -1)
+        return live_timeout if live_timeout != -1 else self._default_timeout_ms
+
+    def bind(self, notification: Notification, count: int = 1):
+        """Show another notification in this box, e.g. an update or a repeat of the one shown."""
+        self.notification = notification
+        self.count = count
+        self.timeout_ms = self._timeout_for(notification)
+        self.notification_image.set_from_pixbuf(load_scaled_pixbuf(self, 48, 48))
+        self.notification_summary_label.set_markup(notification.summary or "")
+        self.notification_app_name_label_content.set_markup(notification.app_name or "")
+        self.notification_body_label.set_markup(notification.body or "")
+        self.notification_body_label.set_visible(bool(notification.body))
+        self.notification_count_label.set_label(f"×{count}")
+        self.notification_count_label.set_visible(count > 1)
+        if self.action_buttons:
+            self.action_buttons.destroy()
+        self.action_buttons = self.create_action_buttons()
+        if self.action_buttons:
+            self.add(self.action_buttons)
+            self.action_buttons.show_all()
+
     def set_is_history(self, is_history):
         self._is_history = is_history
 
@@ -275,10 +250,11 @@ class NotificationBox(Box):
     def create_content(self):
         notification = self.notification
         pixbuf = load_scaled_pixbuf(self, 48, 48)
+        self.notification_image = CustomImage(pixbuf=pixbuf)
         self.notification_image_box = Box(
             name="notification-image",
             orientation="v",
-            children=[CustomImage(pixbuf=pixbuf), Box(v_expand=True)],
+            children=[self.notification_image, Box(v_expand=True)],
         )
         self.notification_summary_label = Label(
             name="notification-summary",
@@ -294,19 +270,21 @@ class NotificationBox(Box):
             max_chars_width=16,
             ellipsization="end",
         )
-        self.notification_body_label = (
-            Label(
-                markup=notification.body,
-                h_align="start",
-                max_chars_width=34,
-                ellipsization="end",
-            )
-            if notification.body
-            else Box()
+        self.notification_count_label = Label(
+            name="notification-count",
+            h_align="start",
+        )
+        self.notification_count_label.set_no_show_all(True)
+        # Kept when empty so bind() can fill it in
+        self.notification_body_label = Label(
+            markup=notification.body or "",
+            h_align="start",
+            max_chars_width=34,
+            ellipsization="end",
         )
-        self.notification_body_label.set_single_line_mode(
-            True
-        ) if notification.body else None
+        self.notification_body_label.set_single_line_mode(True)
+        self.notification_body_label.set_no_show_all(True)
+        self.notification_body_label.set_visible(bool(notification.body))
         self.notification_text_box = Box(
             name="notification-text",
             orientation="v",
@@ -327,6 +305,7 @@ class NotificationBox(Box):
                             v_align="center",
                         ),
                         self.notification_app_name_label_content,
+                        self.notification_count_label,
                     ],
                 ),
                 self.notification_body_label,
@@ -386,13 +365,16 @@ class NotificationBox(Box):
             self._container.resume_all_timeouts()
 
     def start_timeout(self):
-        self.stop_timeout()
-        self._timeout_id = GLib.timeout_add(self.timeout_ms, self.close_notification)
+        if self._container is None:
+            return
+        if self.timeout_ms > 0:
+            self._container.expiry.schedule(self, self.timeout_ms, self.close_notification)
+        else:
+            self._container.expiry.cancel(self)
 
     def stop_timeout(self):
-        if self._timeout_id is not None:
-            GLib.source_remove(self._timeout_id)
-            self._timeout_id = None
+        if self._container is not None:
+            self._container.expiry.cancel(self)
 
     def close_notification(self):
         if not self._destroyed:
@@ -412,19 +394,6 @@ class NotificationBox(Box):
         logger.debug(
             f"NotificationBox destroy called for notification: {self.notification.id}, from_history_delete: {from_history_delete}, is_history: {self._is_history}"
         )
-        if (
-            hasattr(self, "cached_image_path")
-            and self.cached_image_path
-            and os.path.exists(self.cached_image_path)
-            and (not self._is_history or from_history_delete)
-        ):
-            try:
-                os.remove(self.cached_image_path)
-                logger.info(f"Deleted cached image: {self.cached_image_path}")
-            except Exception as e:
-                logger.error(
-                    f"Error deleting cached image {self.cached_image_path}: {e}"
-                )
         self._destroyed = True
         self.stop_timeout()
         super().destroy()
@@ -438,27 +407,132 @@ class NotificationBox(Box):
             self._container.resume_all_timeouts()
 
 
-class HistoricalNotification(object):
-    def __init__(
-        self, id, app_icon, summary, body, app_name, timestamp, cached_image_path=None
-    ):
-        self.id = id
-        self.app_icon = app_icon
-        self.summary = summary
-        self.body = body
-        self.app_name = app_name
-        self.timestamp = timestamp
-        self.cached_image_path = cached_image_path
-        self.image_pixbuf = None
-        self.actions = []
-        self.cached_scaled_pixbuf = None
+class HistoryRow(Box):
+    """
+    One history entry. Rows are rebound to other entries rather than
+    rebuilt, so scrolling through history and churn in it reuse widgets.
+    """
+
+    def __init__(self, image_cache, on_close):
+        super().__init__(
+            name="notification-container",
+            orientation="v",
+            h_align="fill",
+            h_expand=True,
+        )
+        self.note = None
+        self.arrival_time = None
+        self._image_cache = image_cache
+
+        self.image = CustomImage()
+        self.summary_label = Label(
+            name="notification-summary", h_align="start", ellipsization="end"
+        )
+        self.app_name_label = Label(
+            name="notification-app-name", h_align="start", ellipsization="end"
+        )
+        self.time_label = Label(
+            name="notification-timestamp", h_align="start", ellipsization="end"
+        )
+        self.body_label = Label(
+            name="notification-body",
+            h_align="start",
+            ellipsization="end",
+            line_wrap="word-char",
+        )
+        self.body_label.set_single_line_mode(True)
+        self.close_button = Button(
+            name="notif-close-button",
+            child=Label(name="notif-close-label", markup=icons.cancel),
+            on_clicked=lambda *_: on_close(self),
+        )
+
+        summary_box = Box(
+            name="notification-summary-box",
+            orientation="h",
+            children=[
+                self.summary_label,
+                Box(
+                    name="notif-sep",
+                    h_expand=False,
+                    v_expand=False,
+                    h_align="center",
+                    v_align="center",
+                ),
+                self.app_name_label,
+                Box(
+                    name="notif-sep",
+                    h_expand=False,
+                    v_expand=False,
+                    h_align="center",
+                    v_align="center",
+                ),
+                self.time_label,
+            ],
+        )
+        self.add(
+            Box(
+                name="notification-box-hist",
+                spacing=8,
+                children=[
+                    Box(
+                        name="notification-image",
+                        orientation="v",
+                        children=[self.image, Box(v_expand=True)],
+                    ),
+                    Box(
+                        name="notification-text",
+                        orientation="v",
+                        v_align="center",
+                        h_expand=True,
+                        children=[summary_box, self.body_label],
+                    ),
+                    Box(
+                        orientation="v",
+                        children=[self.close_button, Box(v_expand=True)],
+                    ),
+                ],
+            )
+        )
+
+    def bind(self, note, terms=()):
+        self.note = note
+        try:
+            self.arrival_time = datetime.fromisoformat(note.get("timestamp"))
+        except Exception:
+            self.arrival_time = datetime.now()
+        self.time_label.set_markup(self.arrival_time.strftime("%H:%M"))
+        self.highlight(terms)
+        self.image.set_from_pixbuf(load_note_pixbuf(note, self._image_cache, 48, 48))
+
+    def highlight(self, terms):
+        """Relabel the texts with the words matching search terms highlighted."""
+        note = self.note
+        self.summary_label.set_markup(highlight_markup(note.get("summary"), terms))
+        self.app_name_label.set_markup(highlight_markup(note.get("app_name"), terms))
+        self.body_label.set_markup(highlight_markup(note.get("body"), terms))
 
 
 class NotificationHistory(Box):
+    # History rows built on open and per page when scrolling down
+    PAGE_SIZE = 30
+    # Distance from the bottom, in pixels, at which the next page loads
+    PAGE_THRESHOLD_PX = 300
+    # Unbound rows kept around for reuse
+    ROW_POOL_SIZE = 16
+    # Typing pause after which a search runs
+    SEARCH_DELAY_MS = 80
+
     def __init__(self, **kwargs):
         super().__init__(name="notification-history", orientation="v", **kwargs)
 
-        self.containers = []
+        # Shown rows, newest first; always the newest len(rows) entries of the
+        # store, or of the search results while searching
+        self.rows = []
+        self._rows_by_id = {}
+        # date -> separator shown above that day's first row
+        self._separators = {}
+        self._row_pool = []
         self.header_label = Label(
             name="nhh",
             label="Notifications",
@@ -485,6 +559,18 @@ class NotificationHistory(Box):
             center_children=[self.header_label],
             end_children=[self.header_clean],
         )
+        self.search_index = NotificationSearchIndex()
+        # Matching notes, newest first, and the query words; None when not searching
+        self._results = None
+        self._search_terms = []
+        self._search_id = None
+        self.search_entry = Entry(
+            name="notification-search-entry",
+            placeholder="Search notifications...",
+            h_expand=True,
+            h_align="fill",
+            notify_text=self._on_search_changed,
+        )
         self.notifications_list = Box(
             name="notifications-list",
             orientation="v",
@@ -526,10 +612,24 @@ class NotificationHistory(Box):
             children=[self.notifications_list, self.no_notifications_box],
         )
         self.scrolled_window.add_with_viewport(self.scrolled_window_viewport_box)
-        self.persistent_notifications = []
+        self.store = NotificationStore(
+            HISTORY_JOURNAL_FILE,
+            data.NOTIFICATION_HISTORY_LIMIT,
+            legacy_path=PERSISTENT_HISTORY_FILE,
+        )
+        # Images are shared between entries with identical pixels
+        self.image_cache = NotificationImageCache()
+        for note in self.store.iter_newest():
+            self.image_cache.retain(note.get("image_key"))
+        vadjustment = self.scrolled_window.get_vadjustment()
+        vadjustment.connect("value-changed", self._on_scroll)
+        # Rows loaded or removed change the bounds without any scrolling, e.g.
+        # a first page too short to fill the view, or rows closed near the end
+        vadjustment.connect("changed", self._on_scroll)
         self.add(self.history_header)
+        self.add(self.search_entry)
         self.add(self.scrolled_window)
-        GLib.idle_add(self._load_persistent_history().__next__)
+        GLib.idle_add(self._load_persistent_history)
 
     def get_ordinal(self, n):
         if 11 <= (n % 100) <= 13:
@@ -572,52 +672,189 @@ class NotificationHistory(Box):
         GLib.timeout_add_seconds(int(delta_seconds), self.on_midnight)
 
     def on_midnight(self):
-        self.rebuild_with_separators()
+        # "Today" becomes "Yesterday" and so on; only the labels change
+        for date, separator in self._separators.items():
+            separator.label.set_label(
+                self.get_date_header(datetime.combine(date, datetime.min.time()))
+            )
         self.schedule_midnight_update()
         return GLib.SOURCE_REMOVE
 
-    def create_date_separator(self, date_header):
-        return Box(
-            name="notif-date-sep",
-            children=[
-                Label(
-                    name="notif-date-sep-label",
-                    label=date_header,
-                    h_align="center",
-                    h_expand=True,
-                )
-            ],
+    def create_date_separator(self, date):
+        label = Label(
+            name="notif-date-sep-label",
+            label=self.get_date_header(datetime.combine(date, datetime.min.time())),
+            h_align="center",
+            h_expand=True,
         )
+        separator = Box(name="notif-date-sep", children=[label])
+        separator.label = label
+        separator.show_all()
+        return separator
+
+    # ------------------------------------------------------------------
+    # Rows
+    # ------------------------------------------------------------------
+
+    def _obtain_row(self, note):
+        row = (
+            self._row_pool.pop()
+            if self._row_pool
+            else HistoryRow(self.image_cache, self._on_row_closed)
+        )
+        row.bind(note, self._search_terms)
+        row.show_all()
+        row.body_label.set_visible(bool(note.get("body")))
+        self._rows_by_id[str(note["id"])] = row
+        return row
+
+    def _release_row(self, row):
+        self._rows_by_id.pop(str(row.note["id"]), None)
+        self.notifications_list.remove(row)
+        row.note = None
+        if len(self._row_pool) < self.ROW_POOL_SIZE:
+            row.image.clear()
+            self._row_pool.append(row)
+        else:
+            row.destroy()
+
+    def _insert_newest(self, note):
+        """Show a new entry at the top, below its day's separator."""
+        row = self._obtain_row(note)
+        date = row.arrival_time.date()
+        if self.rows and self.rows[0].arrival_time.date() == date:
+            position = 1
+        else:
+            separator = self.create_date_separator(date)
+            self._separators[date] = separator
+            self.notifications_list.add(separator)
+            self.notifications_list.reorder_child(separator, 0)
+            position = 1
+        self.notifications_list.add(row)
+        self.notifications_list.reorder_child(row, position)
+        self.rows.insert(0, row)
+
+    def _append_oldest(self, note, row=None):
+        """Show an older entry at the bottom, e.g. while paging; row is one already showing it."""
+        if row is None:
+            row = self._obtain_row(note)
+        date = row.arrival_time.date()
+        if not self.rows or self.rows[-1].arrival_time.date() != date:
+            separator = self.create_date_separator(date)
+            self._separators[date] = separator
+            self.notifications_list.add(separator)
+        if row.get_parent() is None:
+            self.notifications_list.add(row)
+        else:
+            self.notifications_list.reorder_child(row, -1)
+        self.rows.append(row)
+
+    def _remove_row(self, row):
+        """Take a row out, along with its day's separator if it was the last of that day."""
+        index = self.rows.index(row)
+        del self.rows[index]
+        date = row.arrival_time.date()
+        self._release_row(row)
+        neighbours = self.rows[max(0, index - 1) : index + 1]
+        if not any(r.arrival_time.date() == date for r in neighbours):
+            separator = self._separators.pop(date, None)
+            if separator is not None:
+                self.notifications_list.remove(separator)
+                separator.destroy()
+
+    def _remove_notes(self, notes):
+        for note in notes:
+            row = self._rows_by_id.get(str(note["id"]))
+            if row is not None:
+                self._remove_row(row)
+            self._forget_note(note)
+
+    def _forget_note(self, note):
+        """Drop what is kept about a note besides its row once it leaves history."""
+        self.search_index.remove(note["id"])
+        if self._results is not None:
+            self._results = [result for result in self._results if result is not note]
+        self._release_image(note)
+
+    def _next_page(self):
+        if self._results is None:
+            return self.store.last(self.PAGE_SIZE, offset=len(self.rows))
+        return self._results[len(self.rows) : len(self.rows) + self.PAGE_SIZE]
+
+    def _load_more(self):
+        notes = self._next_page()
+        for note in notes:
+            self._append_oldest(note)
+        return bool(notes)
+
+    def _show_first_page(self):
+        """
+        Replace the shown rows with the first page, keeping the rows of
+        entries that are on it too: while a query is refined those only
+        get their highlights updated.
+        """
+        self.rows, old_rows = [], self.rows
+        for separator in self._separators.values():
+            self.notifications_list.remove(separator)
+            separator.destroy()
+        self._separators = {}
+        notes = self._next_page()
+        wanted = {str(note["id"]) for note in notes}
+        for row in old_rows:
+            if str(row.note["id"]) not in wanted:
+                self._release_row(row)
+        for note in notes:
+            row = self._rows_by_id.get(str(note["id"]))
+            if row is not None:
+                row.highlight(self._search_terms)
+            self._append_oldest(note, row)
+
+    def _on_scroll(self, adjustment):
+        bottom = adjustment.get_value() + adjustment.get_page_size()
+        if adjustment.get_upper() - bottom < self.PAGE_THRESHOLD_PX:
+            self._load_more()
+
+    def _on_row_closed(self, row):
+        note = row.note
+        if note is None:
+            return
+        if self.store.delete(note["id"]) is not None:
+            logger.info(
+                f"Notification with ID {note['id']} was removed from the history store."
+            )
+        self._remove_row(row)
+        self._forget_note(note)
+        self.update_no_notifications_label_visibility()
 
-    def rebuild_with_separators(self):
-        GLib.idle_add(self._do_rebuild_with_separators)
-
-    def _do_rebuild_with_separators(self):
-        children = list(self.notifications_list.get_children())
-        for child in children:
-            self.notifications_list.remove(child)
-
-        current_date_header = None
-        last_date_header = None
-        for container in sorted(
-            self.containers, key=lambda x: x.arrival_time, reverse=True
-        ):
-            arrival_time = container.arrival_time
-            date_header = self.get_date_header(arrival_time)
-            if date_header != current_date_header:
-                sep = self.create_date_separator(date_header)
-                self.notifications_list.add(sep)
-                current_date_header = date_header
-                last_date_header = date_header
-            self.notifications_list.add(container)
-
-        if not self.containers and last_date_header:
-            for child in list(self.notifications_list.get_children()):
-                if child.get_name() == "notif-date-sep":
-                    self.notifications_list.remove(child)
-
-        self.notifications_list.show_all()
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _on_search_changed(self, entry, *_):
+        if self._search_id is not None:
+            GLib.source_remove(self._search_id)
+        self._search_id = GLib.timeout_add(self.SEARCH_DELAY_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_id = None
+        query = self.search_entry.get_text()
+        ids = self.search_index.search(query)
+        if ids is None:
+            self._results = None
+            self._search_terms = []
+        else:
+            self._results = [
+                note for note in self.store.iter_newest() if str(note["id"]) in ids
+            ]
+            self._search_terms = search_terms(query)
+        self._show_first_page()
+        self.scrolled_window.get_vadjustment().set_value(0)
         self.update_no_notifications_label_visibility()
+        return False
+
+    # ------------------------------------------------------------------
+    # History changes
+    # ------------------------------------------------------------------
 
     def on_do_not_disturb_changed(self, switch, pspec):
         self.do_not_disturb_enabled = switch.get_active()
@@ -626,487 +863,98 @@ class NotificationHistory(Box):
         )
 
     def clear_history(self, *args):
-        for child in self.notifications_list.get_children()[:]:
-            container = child
-            notif_box = (
-                container.notification_box
-                if hasattr(container, "notification_box")
-                else None
-            )
-            if notif_box:
-                notif_box.destroy(from_history_delete=True)
+        for child in self.notifications_list.get_children():
             self.notifications_list.remove(child)
             child.destroy()
-
-        if os.path.exists(PERSISTENT_HISTORY_FILE):
-            try:
-                os.remove(PERSISTENT_HISTORY_FILE)
-                logger.info("Notification history cleared and persistent file deleted.")
-            except Exception as e:
-                logger.error(f"Error deleting persistent history file: {e}")
-        self.persistent_notifications = []
-        self.containers = []
-        self.rebuild_with_separators()
+        self.rows = []
+        self._rows_by_id = {}
+        self._separators = {}
+        self.search_index.clear()
+        if self._results is not None:
+            self._results = []
+        # Entries beyond the shown ones have cached images too
+        for note in self.store.clear():
+            self._release_image(note)
+        logger.info("Notification history cleared.")
+        self.update_no_notifications_label_visibility()
 
     def _load_persistent_history(self):
-        if not os.path.exists(PERSISTENT_DIR):
-            os.makedirs(PERSISTENT_DIR, exist_ok=True)
-        if os.path.exists(PERSISTENT_HISTORY_FILE):
-            try:
-                with open(PERSISTENT_HISTORY_FILE, "r") as f:
-                    self.persistent_notifications = json.load(f)
-                for note in reversed(self.persistent_notifications):
-                    self._add_historical_notification(note)
-                    yield True
-            except Exception as e:
-                logger.error(f"Error loading persistent history: {e}")
-        GLib.idle_add(self.update_no_notifications_label_visibility)
-        self._cleanup_orphan_cached_images()
-        self.schedule_midnight_update()
-
-    def _save_persistent_history(self):
-        try:
-            with open(PERSISTENT_HISTORY_FILE, "w") as f:
-                json.dump(self.persistent_notifications, f)
-        except Exception as e:
-            logger.error(f"Error saving persistent history: {e}")
-
-    def delete_historical_notification(self, note_id, container):
-        if hasattr(container, "notification_box"):
-            notif_box = container.notification_box
-            notif_box.destroy(from_history_delete=True)
-
-        target_note_id_str = str(note_id)
-
-        new_persistent_notifications = []
-        removed_from_list = False
-        for note_in_list in self.persistent_notifications:
-            current_note_id_str = str(note_in_list.get("id"))
-            if current_note_id_str == target_note_id_str:
-                removed_from_list = True
-
-                continue
-            new_persistent_notifications.append(note_in_list)
-
-        if removed_from_list:
-            self.persistent_notifications = new_persistent_notifications
-            logger.info(
-                f"Notification with ID {target_note_id_str} was marked for removal from persistent_notifications list."
-            )
-        else:
-            logger.warning(
-                f"Notification with ID {target_note_id_str} was NOT found in persistent_notifications list. The list remains unchanged."
-            )
-
-        self._save_persistent_history()
-        container.destroy()
-        self.containers = [c for c in self.containers if c != container]
-        self.rebuild_with_separators()
-
-    def _add_historical_notification(self, note):
-        hist_notif = HistoricalNotification(
-            id=note.get("id"),
-            app_icon=note.get("app_icon"),
-            summary=note.get("summary"),
-            body=note.get("body"),
-            app_name=note.get("app_name"),
-            timestamp=note.get("timestamp"),
-            cached_image_path=note.get("cached_image_path"),
-        )
-
-        hist_box = NotificationBox(hist_notif, timeout_ms=0)
-        hist_box.uuid = hist_notif.id
-        hist_box.cached_image_path = hist_notif.cached_image_path
-        hist_box.set_is_history(True)
-        for child in hist_box.get_children():
-            if child.get_name() == "notification-action-buttons":
-                hist_box.remove(child)
-        container = Box(
-            name="notification-container",
-            orientation="v",
-            h_align="fill",
-            h_expand=True,
-        )
-        container.notification_box = hist_box
-        try:
-            arrival = datetime.fromisoformat(hist_notif.timestamp)
-        except Exception:
-            arrival = datetime.now()
-        container.arrival_time = arrival
-
-        def compute_time_label(arrival_time):
-            return arrival_time.strftime("%H:%M")
-
-        self.hist_time_label = Label(
-            name="notification-timestamp",
-            markup=compute_time_label(container.arrival_time),
-            h_align="start",
-            ellipsization="end",
-        )
-        self.hist_notif_image_box = Box(
-            name="notification-image",
-            orientation="v",
-            children=[
-                CustomImage(pixbuf=load_scaled_pixbuf(hist_box, 48, 48)),
-                Box(v_expand=True),
-            ],
-        )
-        self.hist_notif_summary_label = Label(
-            name="notification-summary",
-            markup=hist_notif.summary,
-            h_align="start",
-            ellipsization="end",
-        )
-
-        self.hist_notif_app_name_label = Label(
-            name="notification-app-name",
-            markup=f"{hist_notif.app_name}",
-            h_align="start",
-            ellipsization="end",
-        )
-
-        self.hist_notif_body_label = (
-            Label(
-                name="notification-body",
-                markup=hist_notif.body,
-                h_align="start",
-                ellipsization="end",
-                line_wrap="word-char",
-            )
-            if hist_notif.body
-            else Box()
-        )
-        self.hist_notif_body_label.set_single_line_mode(
-            True
-        ) if hist_notif.body else None
-
-        self.hist_notif_summary_box = Box(
-            name="notification-summary-box",
-            orientation="h",
-            children=[
-                self.hist_notif_summary_label,
-                Box(
-                    name="notif-sep",
-                    h_expand=False,
-                    v_expand=False,
-                    h_align="center",
-                    v_align="center",
-                ),
-                self.hist_notif_app_name_label,
-                Box(
-                    name="notif-sep",
-                    h_expand=False,
-                    v_expand=False,
-                    h_align="center",
-                    v_align="center",
-                ),
-                self.hist_time_label,
-            ],
-        )
-        self.hist_notif_text_box = Box(
-            name="notification-text",
-            orientation="v",
-            v_align="center",
-            h_expand=True,
-            children=[
-                self.hist_notif_summary_box,
-                self.hist_notif_body_label,
-            ],
-        )
-        self.hist_notif_close_button = Button(
-            name="notif-close-button",
-            child=Label(name="notif-close-label", markup=icons.cancel),
-            on_clicked=lambda *_: self.delete_historical_notification(
-                hist_notif.id, container
+        for note in self.store.iter_newest():
+            self.search_index.add(note)
+        self._load_more()
+        self.update_no_notifications_label_visibility()
+        # Drops images whose entries went away while the shell was not running
+        self.image_cache.collect(
+            note.get("image_key") for note in self.store.iter_newest() if note.get("image_key")
+        )
+        # Entries from before the shared cache owned one image file each
+        self.image_cache.sweep_legacy(
+            PERSISTENT_DIR,
+            (
+                note["cached_image_path"]
+                for note in self.store.iter_newest()
+                if note.get("cached_image_path")
             ),
         )
-        self.hist_notif_close_button_box = Box(
-            orientation="v",
-            children=[
-                self.hist_notif_close_button,
-                Box(v_expand=True),
-            ],
-        )
-        content_box = Box(
-            name="notification-box-hist",
-            spacing=8,
-            children=[
-                self.hist_notif_image_box,
-                self.hist_notif_text_box,
-                self.hist_notif_close_button_box,
-            ],
-        )
-        container.add(content_box)
-        self.containers.insert(0, container)
-        self.rebuild_with_separators()
-        self.update_no_notifications_label_visibility()
+        self.schedule_midnight_update()
+        return False
+
+    def _release_image(self, note):
+        self.image_cache.release(note.get("image_key"))
+        cached_image_path = note.get("cached_image_path")
+        if cached_image_path and os.path.exists(cached_image_path):
+            try:
+                os.remove(cached_image_path)
+            except Exception as e:
+                logger.error(f"Error deleting cached image {cached_image_path}: {e}")
 
     def add_notification(self, notification_box):
-        app_name = notification_box.notification.app_name
+        """Record a notification in history; the box itself is left to its owner."""
+        notification_box.set_is_history(True)
+        self.record_notification(notification_box.notification, notification_box.uuid)
+
+    def record_notification(self, notification, note_id=None):
+        """Record a notification that never had a box of its own, e.g. one grouped into another's popup."""
+        app_name = notification.app_name
         if app_name in get_history_ignored_apps():
             logger.info(
                 f"Ignoring notification from {app_name} as it is in the ignored list."
             )
-            notification_box.destroy(from_history_delete=True)
             return
 
         if app_name in get_limited_apps_history():
             self.clear_history_for_app(app_name)
 
-        if len(self.containers) >= 50:
-            oldest_container = self.containers.pop()
-            if (
-                hasattr(oldest_container, "notification_box")
-                and hasattr(oldest_container.notification_box, "cached_image_path")
-                and oldest_container.notification_box.cached_image_path
-                and os.path.exists(oldest_container.notification_box.cached_image_path)
-            ):
-                try:
-                    os.remove(oldest_container.notification_box.cached_image_path)
-                    logger.info(
-                        f"Deleted cached image of oldest notification due to history limit: {oldest_container.notification_box.cached_image_path}"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Error deleting cached image of oldest notification: {e}"
-                    )
-            oldest_container.destroy()
-
-        def on_container_destroy(container):
-            if (
-                hasattr(container, "_timestamp_timer_id")
-                and container._timestamp_timer_id
-            ):
-                GLib.source_remove(container._timestamp_timer_id)
-            if hasattr(container, "notification_box"):
-                notif_box = container.notification_box
-            container.destroy()
-            self.containers.remove(container)
-            self.rebuild_with_separators()
-            self.update_no_notifications_label_visibility()
-
-        container = Box(
-            name="notification-container",
-            orientation="v",
-            h_align="fill",
-            h_expand=True,
-        )
-        container.arrival_time = datetime.now()
-
-        def compute_time_label(arrival_time):
-            return arrival_time.strftime("%H:%M")
-
-        self.current_time_label = Label(
-            name="notification-timestamp",
-            markup=compute_time_label(container.arrival_time),
-        )
-        self.current_notif_image_box = Box(
-            name="notification-image",
-            orientation="v",
-            children=[
-                CustomImage(pixbuf=load_scaled_pixbuf(notification_box, 48, 48)),
-                Box(v_expand=True, v_align="fill"),
-            ],
-        )
-        self.current_notif_summary_label = Label(
-            name="notification-summary",
-            markup=notification_box.notification.summary,
-            h_align="start",
-            ellipsization="end",
-        )
-        self.current_notif_app_name_label = Label(
-            name="notification-app-name",
-            markup=f"{notification_box.notification.app_name}",
-            h_align="start",
-            ellipsization="end",
-        )
-        self.current_notif_body_label = (
-            Label(
-                name="notification-body",
-                markup=notification_box.notification.body,
-                h_align="start",
-                ellipsization="end",
-                line_wrap="word-char",
-            )
-            if notification_box.notification.body
-            else Box()
-        )
-        self.current_notif_body_label.set_single_line_mode(
-            True
-        ) if notification_box.notification.body else None
-        self.current_notif_summary_box = Box(
-            name="notification-summary-box",
-            orientation="h",
-            children=[
-                self.current_notif_summary_label,
-                Box(
-                    name="notif-sep",
-                    h_expand=False,
-                    v_expand=False,
-                    h_align="center",
-                    v_align="center",
-                ),
-                self.current_notif_app_name_label,
-                Box(
-                    name="notif-sep",
-                    h_expand=False,
-                    v_expand=False,
-                    h_align="center",
-                    v_align="center",
-                ),
-                self.current_time_label,
-            ],
-        )
-        self.current_notif_text_box = Box(
-            name="notification-text",
-            orientation="v",
-            v_align="center",
-            h_expand=True,
-            children=[
-                self.current_notif_summary_box,
-                self.current_notif_body_label,
-            ],
-        )
-        self.current_notif_close_button = Button(
-            name="notif-close-button",
-            child=Label(name="notif-close-label", markup=icons.cancel),
-            on_clicked=lambda *_: on_container_destroy(container),
-        )
-        self.current_notif_close_button_box = Box(
-            orientation="v",
-            children=[
-                self.current_notif_close_button,
-                Box(v_expand=True),
-            ],
-        )
-        content_box = Box(
-            name="notification-content",
-            spacing=8,
-            children=[
-                self.current_notif_image_box,
-                self.current_notif_text_box,
-                self.current_notif_close_button_box,
-            ],
-        )
-        container.notification_box = notification_box
-        hist_box = Box(
-            name="notification-box-hist",
-            orientation="v",
-            h_align="fill",
-            h_expand=True,
-        )
-        hist_box.add(content_box)
-        content_box.get_children()[2].get_children()[0].connect(
-            "clicked", lambda *_: on_container_destroy(container)
-        )
-        container.add(hist_box)
-        self.containers.insert(0, container)
-        self.rebuild_with_separators()
-        self._append_persistent_notification(notification_box, container.arrival_time)
-        self.update_no_notifications_label_visibility()
-
-    def _append_persistent_notification(self, notification_box, arrival_time):
         note = {
-            "id": notification_box.uuid,
-            "app_icon": notification_box.notification.app_icon,
-            "summary": notification_box.notification.summary,
-            "body": notification_box.notification.body,
-            "app_name": notification_box.notification.app_name,
-            "timestamp": arrival_time.isoformat(),
-            "cached_image_path": notification_box.cached_image_path,
-        }
-        self.persistent_notifications.insert(0, note)
-        self.persistent_notifications = self.persistent_notifications[:50]
-        self._save_persistent_history()
-
-    def _cleanup_orphan_cached_images(self):
-        logger.debug("Starting orphan cached image cleanup.")
-        if not os.path.exists(PERSISTENT_DIR):
-            logger.debug("Cache directory does not exist, skipping cleanup.")
-            return
-
-        cached_files = [
-            f
-            for f in os.listdir(PERSISTENT_DIR)
-            if f.startswith("notification_") and f.endswith(".png")
-        ]
-        if not cached_files:
-            logger.debug("No cached image files found, skipping cleanup.")
-            return
-
-        history_uuids = {
-            note.get("id") for note in self.persistent_notifications if note.get("id")
+            "id": note_id or str(uuid.uuid4()),
+            "app_icon": notification.app_icon,
+            "summary": notification.summary,
+            "body": notification.body,
+            "app_name": notification.app_name,
+            "timestamp": datetime.now().isoformat(),
+            "image_key": (
+                self.image_cache.add(notification.image_pixbuf)
+                if notification.image_pixbuf
+                else None
+            ),
         }
-        deleted_count = 0
-        for cached_file in cached_files:
-            try:
-                uuid_from_filename = cached_file[len("notification_") : -len(".png")]
-                if uuid_from_filename not in history_uuids:
-                    cache_file_path = os.path.join(PERSISTENT_DIR, cached_file)
-                    os.remove(cache_file_path)
-                    logger.info(f"Deleted orphan cached image: {cache_file_path}")
-                    deleted_count += 1
-                else:
-                    logger.debug(
-                        f"Cached image {cached_file} found in history, keeping it."
-                    )
-            except Exception as e:
-                logger.error(
-                    f"Error processing cached file {cached_file} during cleanup: {e}"
-                )
-
-        if deleted_count > 0:
-            logger.info(
-                f"Orphan cached image cleanup finished. Deleted {deleted_count} images."
-            )
-        else:
-            logger.info("Orphan cached image cleanup finished. No orphan images found.")
+        self._remove_notes(self.store.add(note))
+        self.search_index.add(note)
+        if self._results is None:
+            self._insert_newest(note)
+        elif self.search_index.matches(note["id"], self._search_terms):
+            self._results.insert(0, note)
+            self._insert_newest(note)
+        self.update_no_notifications_label_visibility()
 
     def update_no_notifications_label_visibility(self):
-        has_notifications = bool(self.containers)
+        has_notifications = bool(self.rows)
         self.no_notifications_box.set_visible(not has_notifications)
         self.notifications_list.set_visible(has_notifications)
 
     def clear_history_for_app(self, app_name):
         """Clears all notifications in history for a specific app."""
-        containers_to_remove = []
-        persistent_notes_to_remove_ids = set()
-        for container in list(self.containers):
-            if (
-                hasattr(container, "notification_box")
-                and container.notification_box.notification.app_name == app_name
-            ):
-                containers_to_remove.append(container)
-                persistent_notes_to_remove_ids.add(container.notification_box.uuid)
-
-        for container in containers_to_remove:
-            if (
-                hasattr(container, "notification_box")
-                and hasattr(container.notification_box, "cached_image_path")
-                and container.notification_box.cached_image_path
-                and os.path.exists(container.notification_box.cached_image_path)
-            ):
-                try:
-                    os.remove(container.notification_box.cached_image_path)
-                    logger.info(
-                        f"Deleted cached image of replaced history notification: {container.notification_box.cached_image_path}"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Error deleting cached image of replaced history notification: {e}"
-                    )
-            self.containers.remove(container)
-            self.notifications_list.remove(container)
-            container.notification_box.destroy(from_history_delete=True)
-            container.destroy()
-
-        self.persistent_notifications = [
-            note
-            for note in self.persistent_notifications
-            if note.get("id") not in persistent_notes_to_remove_ids
-        ]
-        self._save_persistent_history()
-        self.rebuild_with_separators()
+        self._remove_notes(self.store.delete_app(app_name))
         self.update_no_notifications_label_visibility()
 
 
@@ -1123,6 +971,9 @@ class NotificationContainer(Box):
         self._server.connect("notification-added", self.on_new_notification)
         self._pending_removal = False
         self._is_destroying = False
+        # One timer for every popup's timeout
+        self.expiry = ExpiryScheduler()
+        self.rate_limiter = AppRateLimiter()
 
         self.stack = Gtk.Stack(
             name="notification-stack",
@@ -1195,74 +1046,104 @@ class NotificationContainer(Box):
 
     def on_new_notification(self, fabric_notif, id):
         notification_history_instance = self.notification_history
+        notification = fabric_notif.get_notification_from_id(id)
         if notification_history_instance.do_not_disturb_enabled:
             logger.info(
                 "Do Not Disturb mode enabled: adding notification directly to history."
             )
-            notification = fabric_notif.get_notification_from_id(id)
-            new_box = NotificationBox(notification)
-            if notification.image_pixbuf:
-                cache_notification_pixbuf(new_box)
-            notification_history_instance.add_notification(new_box)
+            notification_history_instance.record_notification(notification)
+            notification.close("expired")
             return
 
-        notification = fabric_notif.get_notification_from_id(id)
-        new_box = NotificationBox(notification)
-        new_box.set_container(self)
-        notification.connect("closed", self.on_notification_closed)
-
+        # Ids come back with replaces_id, so an earlier close must not stick
+        self._destroyed_notifications.discard(id)
         app_name = notification.app_name
-        if app_name in get_limited_apps_history():
+        limited_app = app_name in get_limited_apps_history()
+        if limited_app:
             notification_history_instance.clear_history_for_app(app_name)
 
-            existing_notification_index = -1
-            for index, existing_box in enumerate(self.notifications):
-                if existing_box.notification.app_name == app_name:
-                    existing_notification_index = index
-                    break
-
-            if existing_notification_index != -1:
-                old_notification_box = self.notifications.pop(
-                    existing_notification_index
-                )
-                self.stack.remove(old_notification_box)
-                old_notification_box.destroy()
-
-                self.stack.add_named(new_box, str(id))
-                self.notifications.append(new_box)
-                self.current_index = len(self.notifications) - 1
-                self.stack.set_visible_child(new_box)
-            else:
-                while len(self.notifications) >= 5:
-                    oldest_notification = self.notifications[0]
-                    notification_history_instance.add_notification(oldest_notification)
-                    self.stack.remove(oldest_notification)
-                    self.notifications.pop(0)
-                    if self.current_index > 0:
-                        self.current_index -= 1
-                self.stack.add_named(new_box, str(id))
-                self.notifications.append(new_box)
-                self.current_index = len(self.notifications) - 1
-                self.stack.set_visible_child(new_box)
+        box = self._find_box(lambda n: n.id == id)
+        if box is not None:
+            # An update of a notification on screen
+            self._rebind(box, notification, box.count, to_history=False)
+        elif limited_app:
+            # Such apps only ever have their latest notification shown
+            box = self._find_box(lambda n: n.app_name == app_name)
+            if box is not None:
+                self._rebind(box, notification, 1, to_history=False)
         else:
-            while len(self.notifications) >= 5:
-                oldest_notification = self.notifications[0]
-                notification_history_instance.add_notification(oldest_notification)
-                self.stack.remove(oldest_notification)
-                self.notifications.pop(0)
-                if self.current_index > 0:
-                    self.current_index -= 1
-            self.stack.add_named(new_box, str(id))
-            self.notifications.append(new_box)
-            self.current_index = len(self.notifications) - 1
-            self.stack.set_visible_child(new_box)
-
+            box = self._group_target(notification)
+            if box is not None:
+                self._rebind(box, notification, box.count + 1, to_history=True)
+
+        if box is None:
+            box = NotificationBox(notification)
+            box.set_container(self)
+            notification.connect("closed", self.on_notification_closed)
+            self._make_room()
+            self.stack.add_named(box, box.uuid)
+            self.notifications.append(box)
+            self.main_revealer.show_all()
+
+        self.current_index = self.notifications.index(box)
+        self.stack.set_visible_child(box)
         for notification_box in self.notifications:
             notification_box.start_timeout()
-        self.main_revealer.show_all()
+        # Every arrival restarts the timeouts, even under a hover pause whose
+        # leave event may never come (e.g. the hovered popup was dismissed)
+        self.expiry.resume()
         self.main_revealer.set_reveal_child(True)
         self.update_navigation_buttons()
 
+    def _find_box(self, predicate):
+        for notification_box in reversed(self.notifications):
+            if predicate(notification_box.notification):
+                return notification_box
+        return None
+
+    def _group_target(self, notification):
+        """
+        The popup a new notification is folded into instead of getting its
+        own: one showing the same text from the same app, or, once the app
+        is over its rate, the app's latest popup.
+        """
+        app_name = notification.app_name
+        repeat = self._find_box(
+            lambda n: n.app_name == app_name
+            and n.summary == notification.summary
+            and n.body == notification.body
+        )
+        if repeat is not None:
+            return repeat
+        if self.rate_limiter.allow(app_name):
+            return None
+        return self._find_box(lambda n: n.app_name == app_name)
+
+    def _rebind(self, box, notification, count, to_history):
+        """Show notification in box in place of the one it had."""
+        if box.notification is not notification:
+            self._retire(box.notification, to_history)
+            notification.connect("closed", self.on_notification_closed)
+        box.bind(notification, count)
+
+    def _retire(self, notification, to_history):
+        """Let go of a notification whose popup goes to another one."""
+        notification.disconnect_by_func(self.on_notification_closed)
+        if to_history:
+            self.notification_history.record_notification(notification)
+        # Unless its id now belongs to an update of it, the sender learns it is gone
+        if self._server.get_notification_from_id(notification.id) is notification:
+            notification.close("expired")
+
+    def _make_room(self):
+        while len(self.notifications) >= 5:
+            oldest_notification = self.notifications.pop(0)
+            self._retire(oldest_notification.notification, to_history=True)
+            self.stack.remove(oldest_notification)
+            oldest_notification.destroy()
+            if self.current_index > 0:
+                self.current_index -= 1
+
     def show_previous(self, *args):
         if self.current_index > 0:
             self.current_index -= 1
@@ -1314,9 +1195,8 @@ class NotificationContainer(Box):
                 logger.info(
                     f"Adding notification {notification.id} to history (reason: {reason_str})"
                 )
-                notif_box.set_is_history(True)
                 notification_history_instance.add_notification(notif_box)
-                notif_box.stop_timeout()
+                notif_box.destroy()
             else:
                 logger.warning(
                     f"Unknown close reason: {reason_str} for notification {notification.id}. Defaulting to destroy."
@@ -1352,6 +1232,8 @@ class NotificationContainer(Box):
 
     def _destroy_container(self):
         try:
+            # A hover pause must not outlive the popups it was for
+            self.expiry.clear()
             self.notifications.clear()
             self._destroyed_notifications.clear()
             for child in self.stack.get_children():
@@ -1367,22 +1249,12 @@ class NotificationContainer(Box):
     def pause_and_reset_all_timeouts(self):
         if self._is_destroying:
             return
-        for notification in self.notifications[:]:
-            try:
-                if not notification._destroyed and notification.get_parent():
-                    notification.stop_timeout()
-            except Exception as e:
-                logger.error(f"Error pausing timeout: {e}")
+        self.expiry.pause()
 
     def resume_all_timeouts(self):
         if self._is_destroying:
             return
-        for notification in self.notifications[:]:
-            try:
-                if not notification._destroyed and notification.get_parent():
-                    notification.start_timeout()
-            except Exception as e:
-                logger.error(f"Error resuming timeout: {e}")
+        self.expiry.resume()
 
     def close_all_notifications(self, *args):
         notifications_to_close = self.notifications.copy()
@@ -1,10 +1,7 @@
 # Thanks to https://github.com/muhchaudhary for the original code. You are a legend.
-import json
 
 import cairo
 import gi
-from fabric.hyprland.service import Hyprland
-from fabric.utils.helpers import get_desktop_applications
 from fabric.widgets.box import Box
 from fabric.widgets.button import Button
 from fabric.widgets.eventbox import EventBox
@@ -15,18 +12,20 @@ from loguru import logger
 
 import config.data as data
 import modules.icons as icons
+from services.app_catalog import get_app_catalog
+from services.hyprland_commands import get_hyprland_commands
+from services.hyprland_state import get_hyprland_state
 # WIP icon resolver (app_id to guessing the icon name)
 from utils.icon_resolver import IconResolver
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gdk, Gtk
+from gi.repository import Gdk, GLib, Gtk
 
 screen = Gdk.Screen.get_default()
 CURRENT_WIDTH = screen.get_width()
 CURRENT_HEIGHT = screen.get_height()
 
 icon_resolver = IconResolver()
-connection = Hyprland()
 BASE_SCALE = 0.1  # Base scale factor for overview
 
 # Credit to Aylur for the drag and drop code
@@ -101,8 +100,8 @@ class HyprlandWindowButton(Button):
             tooltip_text=title,
             size=size,
             on_clicked=self.on_button_click,
-            on_button_press_event=lambda _, event: connection.send_command(
-                f"/dispatch closewindow address:{address}"
+            on_button_press_event=lambda _, event: get_hyprland_commands().dispatch(
+                f"closewindow address:{address}"
             )
             if event.button == 3
             else None,
@@ -128,7 +127,7 @@ class HyprlandWindowButton(Button):
     def on_key_press_event(self, widget, event):
         if event.get_state() & Gdk.ModifierType.SHIFT_MASK:
             if event.keyval in (Gdk.KEY_Return, Gdk.KEY_KP_Enter, Gdk.KEY_space):
-                connection.send_command(f"/dispatch closewindow address:{self.address}")
+                get_hyprland_commands().dispatch(f"closewindow address:{self.address}")
                 return True
         return False
 
@@ -171,7 +170,7 @@ class HyprlandWindowButton(Button):
         )
 
     def on_button_click(self, *_):
-        connection.send_command(f"/dispatch focuswindow address:{self.address}")
+        get_hyprland_commands().dispatch(f"focuswindow address:{self.address}")
 
 
 class WorkspaceEventBox(EventBox):
@@ -199,8 +198,8 @@ class WorkspaceEventBox(EventBox):
                 v_expand=True,
                 markup=icons.circle_plus,
             ),
-            on_drag_data_received=lambda _w, _c, _x, _y, data, *_: connection.send_command(
-                f"/dispatch movetoworkspacesilent {workspace_id},address:{data.get_data().decode()}"
+            on_drag_data_received=lambda _w, _c, _x, _y, data, *_: get_hyprland_commands().dispatch(
+                f"movetoworkspacesilent {workspace_id},address:{data.get_data().decode()}"
             ),
         )
         self.drag_dest_set(
@@ -242,117 +241,21 @@ class Overview(Box):
         super().__init__(name="overview", orientation="v", spacing=8, **kwargs)
         self.workspace_boxes: dict[int, Box] = {}
         self.clients: dict[str, HyprlandWindowButton] = {}
+        self._update_id = None
+        self.hypr_state = get_hyprland_state()
         
-        # Initialize app registry for better icon resolution
-        self._all_apps = get_desktop_applications()
-        self.app_identifiers = self._build_app_identifiers_map()
-        
-        # Remove the window_class_aliases dictionary completely
+        # Shared application catalog for icon resolution
+        self.app_catalog = get_app_catalog()
 
-        connection.connect("event::openwindow", self.do_update)
-        connection.connect("event::closewindow", self.do_update)
-        connection.connect("event::movewindow", self.do_update)
+        self.hypr_state.connect("clients-changed", self.do_update)
+        self.app_catalog.connect("changed", self.do_update)
         self.update()
         
-    def _normalize_window_class(self, class_name):
-        """Normalize window class by removing common suffixes and lowercase."""
-        if not class_name:
-            return ""
-            
-        normalized = class_name.lower()
-        
-        # Remove common suffixes
-        suffixes = [".bin", ".exe", ".so", "-bin", "-gtk"]
-        for suffix in suffixes:
-            if normalized.endswith(suffix):
-                normalized = normalized[:-len(suffix)]
-                
-        return normalized
-    
-    def _classes_match(self, class1, class2):
-        """Check if two window class names match with stricter comparison."""
-        if not class1 or not class2:
-            return False
-            
-        # Normalize both classes
-        norm1 = self._normalize_window_class(class1)
-        norm2 = self._normalize_window_class(class2)
-        
-        # Direct match after normalization
-        if norm1 == norm2:
-            return True
-            
-        # Don't do substring matching as it's too error-prone
-        # This avoids incorrectly matching flatpak apps and others
-        return False
-        
-    def _build_app_identifiers_map(self):
-        """Build a mapping of app identifiers (class names, executables, names) to DesktopApp objects"""
-        identifiers = {}
-        for app in self._all_apps:
-            # Map by name (lowercase)
-            if app.name:
-                identifiers[app.name.lower()] = app
-                
-            # Map by display name
-            if app.display_name:
-                identifiers[app.display_name.lower()] = app
-                
-            # Map by window class if available
-            if app.window_class:
-                identifiers[app.window_class.lower()] = app
-                
-            # Map by executable name if available
-            if app.executable:
-                exe_basename = app.executable.split('/')[-1].lower()
-                identifiers[exe_basename] = app
-                
-            # Map by command line if available (without parameters)
-            if app.command_line:
-                cmd_base = app.command_line.split()[0].split('/')[-1].lower()
-                identifiers[cmd_base] = app
-                
-        return identifiers
-        
     def find_app(self, app_identifier):
-        """Return the DesktopApp object by matching any app identifier."""
-        if not app_identifier:
-            return None
-        
-        # Try direct lookup in our identifiers map
-        normalized_id = str(app_identifier).lower()
-        if normalized_id in self.app_identifiers:
-            return self.app_identifiers[normalized_id]
-            
-        # Try with normalized class name
-        norm_id = self._normalize_window_class(normalized_id)
-        if norm_id in self.app_identifiers:
-            return self.app_identifiers[norm_id]
-            
-        # More targeted matching with exact names only
-        for app in self._all_apps:
-            if app.name and app.name.lower() == normalized_id:
-                return app
-            if app.window_class and app.window_class.lower() == normalized_id:
-                return app
-            if app.display_name and app.display_name.lower() == normalized_id:
-                return app
-            # Try with executable basename
-            if app.executable:
-                exe_base = app.executable.split('/')[-1].lower()
-                if exe_base == normalized_id:
-                    return app
-            # Try with command basename
-            if app.command_line:
-                cmd_base = app.command_line.split()[0].split('/')[-1].lower()
-                if cmd_base == normalized_id:
-                    return app
-                
-        return None
+        """Return the application matching a window class or any other app identifier."""
+        return self.app_catalog.find(app_identifier)
 
     def update(self, signal_update=False):
-        self._all_apps = get_desktop_applications()
-        self.app_identifiers = self._build_app_identifiers_map()
         for client in self.clients.values():
             client.destroy()
         self.clients.clear()
@@ -387,20 +290,21 @@ class Overview(Box):
 
         monitors = {
             monitor["id"]: (monitor["x"], monitor["y"], monitor["transform"])
-            for monitor in json.loads(connection.send_command("j/monitors").reply.decode())
+            for monitor in self.hypr_state.get_monitors()
         }
         
         # Filter clients to only show those in this monitor's workspace range
-        for client in json.loads(connection.send_command("j/clients").reply.decode()):
+        for client in self.hypr_state.get_clients():
             workspace_id = client["workspace"]["id"]
             if workspace_id > 0 and self.workspace_start <= workspace_id <= self.workspace_end:
+                monitor_x, monitor_y, monitor_transform = monitors.get(client["monitor"], (0, 0, 0))
                 btn = HyprlandWindowButton(
                     window=self,
                     title=client["title"],
                     address=client["address"],
                     app_id=client["initialClass"],
                     size=(client["size"][0] * effective_scale, client["size"][1] * effective_scale),
-                    transform=monitors[client["monitor"]][2],
+                    transform=monitor_transform,
                 )
                 self.clients[client["address"]] = btn
                 w_id = workspace_id
@@ -408,8 +312,8 @@ class Overview(Box):
                     self.workspace_boxes[w_id] = Gtk.Fixed.new()
                 self.workspace_boxes[w_id].put(
                     btn,
-                    abs(client["at"][0] - monitors[client["monitor"]][0]) * effective_scale,
-                    abs(client["at"][1] - monitors[client["monitor"]][1]) * effective_scale,
+                    abs(client["at"][0] - monitor_x) * effective_scale,
+                    abs(client["at"][1] - monitor_y) * effective_scale,
                 )
 
         # Generate workspaces only for this monitor's range
@@ -438,5 +342,13 @@ class Overview(Box):
             )
 
     def do_update(self, *_):
-        logger.info(f"[Overview] Updating for :{_[1].name}")
+        # The state service can report several changes in one burst (e.g. a
+        # window opening and its geometry arriving), rebuild once per idle.
+        if self._update_id is None:
+            self._update_id = GLib.idle_add(self._do_update_idle)
+
+    def _do_update_idle(self):
+        self._update_id = None
+        logger.info(f"[Overview] Updating for monitor {self.monitor_id}")
         self.update(signal_update=True)
+        return False
@@ -1,10 +1,7 @@
 import colorsys
-import concurrent.futures
-import hashlib
 import os
 import random  # <--- AÑADIDO
 import shutil
-from concurrent.futures import ThreadPoolExecutor
 
 from fabric.utils.helpers import exec_shell_command_async
 from fabric.widgets.box import Box
@@ -13,30 +10,56 @@ from fabric.widgets.entry import Entry
 from fabric.widgets.label import Label
 from fabric.widgets.scrolledwindow import ScrolledWindow
 from gi.repository import Gdk, GdkPixbuf, Gio, GLib, Gtk, Pango
-from PIL import Image
 
 import config.config
 import config.data as data
 import modules.icons as icons
+from utils.matugen_cache import get_matugen_cache
+from utils.thumbnail_cache import ThumbnailCache
+from utils.wallpaper_index import WallpaperIndex, is_image
+from utils.wallpaper_thumbnails import ThumbnailPipeline
 
 
 class WallpaperSelector(Box):
-    CACHE_DIR = f"{data.CACHE_DIR}/thumbs"  # Changed from wallpapers to thumbs
+    # Thumbnail directories of earlier versions, keyed on the file name only
+    OLD_CACHE_DIRS = (f"{data.CACHE_DIR}/wallpapers", f"{data.CACHE_DIR}/thumbs")
+    # Pause after the hue slider moves before re-sorting the grid
+    HUE_SORT_DELAY_MS = 80
+    # Quiet time after the last monitor event of a file before it is indexed
+    MONITOR_SETTLE_MS = 300
 
     def __init__(self, **kwargs):
-        # Delete the old cache directory if it exists
-        old_cache_dir = f"{data.CACHE_DIR}/wallpapers"
-        if os.path.exists(old_cache_dir):
-            shutil.rmtree(old_cache_dir)
+        # Delete the old cache directories if they exist
+        for old_cache_dir in self.OLD_CACHE_DIRS:
+            if os.path.exists(old_cache_dir):
+                GLib.Thread.new("wallpaper-cache-cleanup", shutil.rmtree, old_cache_dir)
 
         super().__init__(name="wallpapers", spacing=4, orientation="v", h_expand=False, v_expand=False, **kwargs)
-        os.makedirs(self.CACHE_DIR, exist_ok=True)
+        # Keyed on path, size and mtime, so replacing a file under the same name
+        # gets a fresh thumbnail and the stale one is collected
+        self.thumbnail_cache = ThumbnailCache(
+            "wallpapers", data.WALLPAPER_THUMBNAIL_CACHE_MB * 1024 * 1024
+        )
 
-        self.files = []
-        GLib.idle_add(self._load_wallpapers_async().__next__)
+        # Loaded from the cache in one read; reconciled with the directory below
+        self.wallpaper_index = WallpaperIndex(
+            data.WALLPAPERS_DIR, recursive=data.WALLPAPERS_RECURSIVE
+        )
+        # Sorted file names relative to WALLPAPERS_DIR, kept up to date by the index
+        self.files = self.wallpaper_index.names
         self.thumbnails = []
         self.thumbnail_queue = []
-        self.executor = ThreadPoolExecutor(max_workers=4)  # Shared executor
+        self.thumbnail_pipeline = ThumbnailPipeline()
+        # Thumbnail path being generated -> (file name, cache key, whether it is new)
+        self._pending_thumbnails = {}
+        # Re-applying a wallpaper and scheme restores matugen's earlier output
+        self.matugen_cache = get_matugen_cache()
+        # File name -> thumbnail path currently in the grid
+        self._shown_thumbnails = {}
+        self.file_monitors = {}
+        # Files created or written since the last monitor flush
+        self._changed_files = set()
+        self._changed_files_id = None
 
         # Variable to control the selection (similar to AppLauncher)
         self.selected_index = -1
@@ -129,12 +152,22 @@ class WallpaperSelector(Box):
         )
         self.random_wall.connect("clicked", self.set_random_wallpaper) # <--- AÑADIDO
 
+        # Sorts the grid by how much of each wallpaper is near the slider's hue
+        self.hue_sort_active = False
+        self._hue_sort_id = None
+        self.hue_sort_button = Button(
+            name="hue-sort-button",
+            child=Label(name="hue-sort-label", markup=icons.sort),
+            tooltip_text="Sort by color",
+        )
+        self.hue_sort_button.connect("clicked", self.on_hue_sort_clicked)
+
         # Add the switcher to the header_box's start_children
         self.header_box = Box(
             name="header-box",
             spacing=8,
             orientation="h",
-            children=[self.random_wall, self.search_entry, self.scheme_dropdown, self.matugen_switcher],
+            children=[self.random_wall, self.search_entry, self.hue_sort_button, self.scheme_dropdown, self.matugen_switcher],
         )
 
         self.add(self.header_box)
@@ -154,6 +187,7 @@ class WallpaperSelector(Box):
         self.hue_slider.set_halign(Gtk.Align.FILL)
         self.hue_slider.set_vexpand(False) # Ensure it doesn't expand vertically
         self.hue_slider.set_valign(Gtk.Align.CENTER) # Center vertically within its box
+        self.hue_slider.connect("value-changed", self.on_hue_changed)
 
         self.apply_color_button = Button(name="apply-color-button", child=Label(name="apply-color-label", markup=icons.accept))
         self.apply_color_button.connect("clicked", self.on_apply_color_clicked)
@@ -175,62 +209,36 @@ class WallpaperSelector(Box):
 
         # Removed the old main_content_box and its add
 
-        self._start_thumbnail_thread()
         self.connect("map", self.on_map)
         self.setup_file_monitor()
+        # Show what the index knows right away, then catch up with the directory
+        self._make_thumbnails(list(self.files))
+        GLib.Thread.new("wallpaper-scan", self._scan_wallpapers, None)
         self.show_all()
         self.randomize_dice_icon()
         # Ensure the search entry gets focus when starting
         self.search_entry.grab_focus()
 
-    def _load_wallpapers_async(self):
-        """Non-blocking wallpaper processing."""
-
-        # Process old wallpapers: use os.scandir for efficiency and only loop
-        # over image files that actually need renaming (they're not already lowercase
-        # and with hyphens instead of spaces)
-        with os.scandir(data.WALLPAPERS_DIR) as entries:
-            for entry in entries:
-                if entry.is_file() and self._is_image(entry.name):
-                    # Check if the file needs renaming: file should be lowercase and have hyphens instead of spaces
-                    if entry.name != entry.name.lower() or " " in entry.name:
-                        new_name = entry.name.lower().replace(" ", "-")
-                        full_path = os.path.join(data.WALLPAPERS_DIR, entry.name)
-                        new_full_path = os.path.join(data.WALLPAPERS_DIR, new_name)
-                        try:
-                            os.rename(full_path, new_full_path)
-                            print(
-                                f"Renamed old wallpaper '{full_path}' to '{new_full_path}'"
-                            )
-                        except Exception as e:
-                            print(f"Error renaming file {full_path}: {e}")
-                        yield
-
-        # Process files in small batches to keep UI responsive
-        file_list = os.listdir(data.WALLPAPERS_DIR)
-        batch_size = 20
-
-        # Process files in batches
-        for i in range(0, len(file_list), batch_size):
-            batch = file_list[i : i + batch_size]
-            for filename in batch:
-                if self._is_image(filename):
-                    self.files.append(filename)
-
-            # Sort the current batch to maintain order
-            self.files.sort()
-
-            # Yield to let the main loop process events
-            yield True
-
-        # Final sort of the complete list
-        self.files.sort()
-
-        # Start thumbnail loading after files are processed
-        self._start_thumbnail_thread()
-
-        # Return False to stop the idle callback
-        yield False
+    def _scan_wallpapers(self, _data):
+        scan = self.wallpaper_index.scan()
+        GLib.idle_add(self._apply_scan, scan)
+
+    def _apply_scan(self, scan):
+        added, changed, stale = self.wallpaper_index.reconcile(scan)
+        for file_name, key in stale.items():
+            self._drop_thumbnail(file_name, key)
+        if stale:
+            self.arrange_viewport(self.search_entry.get_text())
+        if added or changed:
+            self._make_thumbnails(added + changed)
+        for relative_dir in scan.directories:
+            self.setup_file_monitor(relative_dir)
+
+        # Every current wallpaper has its key now; anything else is stale
+        GLib.Thread.new(
+            "wallpaper-thumbnail-gc", self._collect_thumbnails, self.wallpaper_index.thumbnail_keys()
+        )
+        return False
 
     def randomize_dice_icon(self):
         dice_icons = [
@@ -261,7 +269,7 @@ class WallpaperSelector(Box):
         os.symlink(full_path, current_wall)
 
         if self.matugen_switcher.get_active():
-            exec_shell_command_async(f'matugen image "{full_path}" -t {selected_scheme}')
+            self.matugen_cache.apply_image(full_path, selected_scheme)
         else:
             exec_shell_command_async(
                 f'swww img "{full_path}" -t outer --transition-duration 1.5 --transition-step 255 --transition-fps 60 -f Nearest'
@@ -274,50 +282,69 @@ class WallpaperSelector(Box):
 
         self.randomize_dice_icon()
 
-    def setup_file_monitor(self):
-        gfile = Gio.File.new_for_path(data.WALLPAPERS_DIR)
-        self.file_monitor = gfile.monitor_directory(Gio.FileMonitorFlags.NONE, None)
-        self.file_monitor.connect("changed", self.on_directory_changed)
+    def setup_file_monitor(self, relative_dir=""):
+        if relative_dir in self.file_monitors:
+            return
+        gfile = Gio.File.new_for_path(os.path.join(data.WALLPAPERS_DIR, relative_dir))
+        monitor = gfile.monitor_directory(Gio.FileMonitorFlags.NONE, None)
+        monitor.connect("changed", self.on_directory_changed)
+        self.file_monitors[relative_dir] = monitor
 
     def on_directory_changed(self, monitor, file, other_file, event_type):
-        file_name = file.get_basename()
+        file_name = os.path.relpath(file.get_path(), data.WALLPAPERS_DIR)
         if event_type == Gio.FileMonitorEvent.DELETED:
-            if file_name in self.files:
-                self.files.remove(file_name)
-                cache_path = self._get_cache_path(file_name)
-                if os.path.exists(cache_path):
-                    try:
-                        os.remove(cache_path)
-                    except Exception as e:
-                        print(f"Error deleting cache {cache_path}: {e}")
-                self.thumbnails = [(p, n) for p, n in self.thumbnails if n != file_name]
+            old_key = self.wallpaper_index.remove(file_name)
+            if old_key is not None:
+                self._drop_thumbnail(file_name, old_key)
                 GLib.idle_add(self.arrange_viewport, self.search_entry.get_text())
-        elif event_type == Gio.FileMonitorEvent.CREATED:
-            if self._is_image(file_name):
-                # Convert filename to lowercase and replace spaces with "-"
-                new_name = file_name.lower().replace(" ", "-")
-                full_path = os.path.join(data.WALLPAPERS_DIR, file_name)
-                new_full_path = os.path.join(data.WALLPAPERS_DIR, new_name)
-                if new_name != file_name:
-                    try:
-                        os.rename(full_path, new_full_path)
-                        file_name = new_name
-                        print(f"Renamed file '{full_path}' to '{new_full_path}')")
-                    except Exception as e:
-                        print(f"Error renaming file {full_path}: {e}")
-                if file_name not in self.files:
-                    self.files.append(file_name)
-                    self.files.sort()
-                    self.executor.submit(self._process_file, file_name)
-        elif event_type == Gio.FileMonitorEvent.CHANGED:
-            if self._is_image(file_name) and file_name in self.files:
-                cache_path = self._get_cache_path(file_name)
-                if os.path.exists(cache_path):
-                    try:
-                        os.remove(cache_path)
-                    except Exception as e:
-                        print(f"Error deleting cache for changed file {file_name}: {e}")
-                self.executor.submit(self._process_file, file_name)
+            elif file_name in self.file_monitors:
+                # A watched subdirectory went away along with whatever it held
+                self.file_monitors.pop(file_name).cancel()
+                GLib.Thread.new("wallpaper-scan", self._scan_wallpapers, None)
+        elif event_type in (
+            Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.CHANGED,
+            Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+        ):
+            if is_image(file_name):
+                # A copy or a large write fires many events; handle the file once it settles
+                self._changed_files.add(file_name)
+                if self._changed_files_id is not None:
+                    GLib.source_remove(self._changed_files_id)
+                self._changed_files_id = GLib.timeout_add(
+                    self.MONITOR_SETTLE_MS, self._flush_changed_files
+                )
+            elif (
+                event_type == Gio.FileMonitorEvent.CREATED
+                and self.wallpaper_index.recursive
+                and os.path.isdir(file.get_path())
+            ):
+                # A whole directory may have been moved in; rescan to pick it up
+                GLib.Thread.new("wallpaper-scan", self._scan_wallpapers, None)
+
+    def _flush_changed_files(self):
+        self._changed_files_id = None
+        changed_files, self._changed_files = self._changed_files, set()
+        updated_files = []
+        dropped = False
+        for file_name in sorted(changed_files):
+            if not os.path.isfile(os.path.join(data.WALLPAPERS_DIR, file_name)):
+                continue
+            # Convert filename to lowercase and replace spaces with "-"
+            file_name = self.wallpaper_index.normalize(file_name)
+            updated, old_key = self.wallpaper_index.update(file_name)
+            if not updated:
+                continue
+            if old_key is not None:
+                self._drop_thumbnail(file_name, old_key)
+                dropped = True
+            updated_files.append(file_name)
+        if dropped:
+            self.arrange_viewport(self.search_entry.get_text())
+        if updated_files:
+            # One batch for the helper rather than one per file
+            self._make_thumbnails(updated_files)
+        return False
 
     def arrange_viewport(self, query: str = ""):
         model = self.viewport.get_model()
@@ -327,7 +354,11 @@ class WallpaperSelector(Box):
             for thumb, name in self.thumbnails
             if query.casefold() in name.casefold()
         ]
-        filtered_thumbnails.sort(key=lambda x: x[1].lower())
+        if self.hue_sort_active:
+            scores = self.wallpaper_index.hue_scores(self.hue_slider.get_value())
+            filtered_thumbnails.sort(key=lambda x: (-scores.get(x[1], 0.0), x[1].lower()))
+        else:
+            filtered_thumbnails.sort(key=lambda x: x[1].lower())
         for pixbuf, file_name in filtered_thumbnails:
             model.append([pixbuf, file_name])
         # If the search entry is empty, no icon is selected; otherwise, select the first one.
@@ -348,7 +379,7 @@ class WallpaperSelector(Box):
         os.symlink(full_path, current_wall)
         if self.matugen_switcher.get_active():
             # Matugen is enabled: run the normal command.
-            exec_shell_command_async(f'matugen image "{full_path}" -t {selected_scheme}')
+            self.matugen_cache.apply_image(full_path, selected_scheme)
         else:
             # Matugen is disabled: run the alternative swww command.
             exec_shell_command_async(
@@ -472,56 +503,82 @@ class WallpaperSelector(Box):
         self.viewport.scroll_to_path(path, False, 0.5, 0.5)  # Ensure the selected icon is visible
         self.selected_index = new_index
 
-    def _start_thumbnail_thread(self):
-        thread = GLib.Thread.new("thumbnail-loader", self._preload_thumbnails, None)
-
-    def _preload_thumbnails(self, _data):
-        futures = [self.executor.submit(self._process_file, file_name) for file_name in self.files]
-        concurrent.futures.wait(futures)
+    def _make_thumbnails(self, file_names):
+        """Show thumbnails for file_names, generating the missing ones in the pipeline"""
+        # Keys are read here, on the main loop, which owns the index
+        index = self.wallpaper_index
+        keyed = [(name, index.thumbnail_key(name), index.has_signature(name)) for name in file_names]
+        GLib.Thread.new("thumbnail-loader", self._prepare_thumbnails, keyed)
+
+    def _prepare_thumbnails(self, keyed):
+        jobs = []
+        for file_name, key, has_signature in keyed:
+            if key is None:
+                continue
+            cache_path = self.thumbnail_cache.lookup(key)
+            if cache_path is not None:
+                self.thumbnail_queue.append((cache_path, file_name))
+                if not has_signature:
+                    # Thumbnails cached before signatures existed only need reading
+                    self._pending_thumbnails[cache_path] = (file_name, key, False)
+                    jobs.append((None, cache_path))
+            else:
+                cache_path = self.thumbnail_cache.path_for(key)
+                self._pending_thumbnails[cache_path] = (file_name, key, True)
+                jobs.append((os.path.join(data.WALLPAPERS_DIR, file_name), cache_path))
         GLib.idle_add(self._process_batch)
+        if jobs:
+            self.thumbnail_pipeline.generate(jobs, self._on_thumbnail_made)
 
-    def _process_file(self, file_name):
-        full_path = os.path.join(data.WALLPAPERS_DIR, file_name)
-        cache_path = self._get_cache_path(file_name)
-        if not os.path.exists(cache_path):
-            try:
-                with Image.open(full_path) as img:
-                    width, height = img.size
-                    side = min(width, height)
-                    left = (img.width - side) // 2
-                    top = (height - side) // 2
-                    right = left + side
-                    bottom = top + side
-                    img_cropped = img.crop((left, top, right, bottom))
-                    img_cropped.thumbnail((96, 96), Image.Resampling.LANCZOS)
-                    img_cropped.save(cache_path, "PNG")
-            except Exception as e:
-                print(f"Error processing {file_name}: {e}")
-                return
-        self.thumbnail_queue.append((cache_path, file_name))
-        GLib.idle_add(self._process_batch)
+    def _on_thumbnail_made(self, cache_path, error, signature):
+        """Stream a finished thumbnail into the grid as soon as it is written"""
+        file_name, key, generated = self._pending_thumbnails.pop(cache_path, (None, None, False))
+        if file_name is None:
+            return
+        if error is not None:
+            print(f"Error processing {file_name}: {error}")
+            return
+        if signature is not None and self.wallpaper_index.set_signature(file_name, key, signature):
+            if self.hue_sort_active:
+                self._schedule_hue_sort()
+        if generated and self.thumbnail_cache.add(key):
+            self.thumbnail_queue.append((cache_path, file_name))
+            if len(self.thumbnail_queue) == 1:
+                GLib.idle_add(self._process_batch)
+
+    def _collect_thumbnails(self, keys):
+        removed = self.thumbnail_cache.retain(keys)
+        if removed:
+            print(f"Removed {removed} stale wallpaper thumbnails")
 
     def _process_batch(self):
         batch = self.thumbnail_queue[:10]
         del self.thumbnail_queue[:10]
         for cache_path, file_name in batch:
+            key = self.wallpaper_index.thumbnail_key(file_name)
+            # Skip thumbnails of files deleted or changed since they were queued
+            if key is None or self.thumbnail_cache.path_for(key) != cache_path:
+                continue
+            if self._shown_thumbnails.get(file_name) == cache_path:
+                continue
             try:
                 pixbuf = GdkPixbuf.Pixbuf.new_from_file(cache_path)
                 self.thumbnails.append((pixbuf, file_name))
+                self._shown_thumbnails[file_name] = cache_path
                 self.viewport.get_model().append([pixbuf, file_name])
             except Exception as e:
                 print(f"Error loading thumbnail {cache_path}: {e}")
+                self.thumbnail_cache.discard(key)
         if self.thumbnail_queue:
             GLib.idle_add(self._process_batch)
         return False
 
-    def _get_cache_path(self, file_name: str) -> str:
-        file_hash = hashlib.md5(file_name.encode("utf-8")).hexdigest()
-        return os.path.join(self.CACHE_DIR, f"{file_hash}.png")
-
-    @staticmethod
-    def _is_image(file_name: str) -> bool:
-        return file_name.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'))
+    def _drop_thumbnail(self, file_name: str, key):
+        """Take a removed or replaced wallpaper out of the grid and the thumbnail cache"""
+        if key is not None:
+            self.thumbnail_cache.discard(key)
+        if self._shown_thumbnails.pop(file_name, None) is not None:
+            self.thumbnails = [(p, n) for p, n in self.thumbnails if n != file_name]
 
     def on_search_entry_focus_out(self, widget, event):
         if self.get_mapped():
@@ -531,7 +588,33 @@ class WallpaperSelector(Box):
     def on_map(self, widget):
         """Handles the map signal to set initial visibility of the color selector."""
         # Set visibility based on the loaded state when the widget becomes visible
-        self.custom_color_selector_box.set_visible(not self.matugen_enabled)
+        self._update_color_selector_visibility()
+
+    def _update_color_selector_visibility(self):
+        # The slider picks a matugen color, and also the hue to sort by
+        self.custom_color_selector_box.set_visible(not self.matugen_enabled or self.hue_sort_active)
+
+    def on_hue_sort_clicked(self, button):
+        self.hue_sort_active = not self.hue_sort_active
+        if self.hue_sort_active:
+            self.hue_sort_button.add_style_class("active")
+        else:
+            self.hue_sort_button.remove_style_class("active")
+        self._update_color_selector_visibility()
+        self.arrange_viewport(self.search_entry.get_text())
+
+    def on_hue_changed(self, scale):
+        if self.hue_sort_active:
+            self._schedule_hue_sort()
+
+    def _schedule_hue_sort(self):
+        if self._hue_sort_id is None:
+            self._hue_sort_id = GLib.timeout_add(self.HUE_SORT_DELAY_MS, self._apply_hue_sort)
+
+    def _apply_hue_sort(self):
+        self._hue_sort_id = None
+        self.arrange_viewport(self.search_entry.get_text())
+        return False
 
     def hsl_to_rgb_hex(self, h: float, s: float = 1.0, l: float = 0.5) -> str:
         """Converts HSL color value to RGB HEX string."""
@@ -553,7 +636,7 @@ class WallpaperSelector(Box):
         is_active = switch.get_active()
         self.matugen_enabled = is_active
         # self.scheme_dropdown.set_sensitive(is_active)
-        self.custom_color_selector_box.set_visible(not is_active) # Toggle visibility
+        self._update_color_selector_visibility() # Toggle visibility
 
         # Save the state to the dedicated file
         try:
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark for the notification popups under a flood of notifications.
+
+Starts a private D-Bus session bus, serves org.freedesktop.Notifications
+on it with the shell's popup container, and fires synthetic notifications
+at it from a client thread. Reports how long each notification took to
+reach its popup, how much CPU the main loop spent and how long it stalled.
+Needs a graphical session; the user's bus, history and caches are left
+alone.
+
+    python scripts/notification_storm.py --scenario storm --count 1000 --rate 100
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Add the Ax-Shell directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gio, GLib, Gtk
+
+BUS_NAME = "org.freedesktop.Notifications"
+OBJECT_PATH = "/org/freedesktop/Notifications"
+SCENARIOS = ("storm", "apps", "updates")
+STALL_PROBE_MS = 10
+
+
+def synthetic_notification(scenario, i):
+    """(app name, replaces the first one, summary, body) of the i-th notification"""
+    if scenario == "storm":
+        # One app repeating itself
+        return "storm", False, "Build failed", "The same message once more"
+    if scenario == "apps":
+        # Distinct notifications from a handful of apps
+        return f"app-{i % 8}", False, f"Message {i}", f"Body of message {i}"
+    # One progress notification updated in place
+    return "progress", i > 0, "Downloading", f"{i} files done"
+
+
+def fire(address, scenario, count, rate, sent_at):
+    connection = Gio.DBusConnection.new_for_address_sync(
+        address,
+        Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+        | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+        None,
+        None,
+    )
+    while not connection.call_sync(
+        "org.freedesktop.DBus",
+        "/org/freedesktop/DBus",
+        "org.freedesktop.DBus",
+        "NameHasOwner",
+        GLib.Variant("(s)", (BUS_NAME,)),
+        GLib.VariantType("(b)"),
+        Gio.DBusCallFlags.NONE,
+        -1,
+        None,
+    ).unpack()[0]:
+        time.sleep(0.05)
+
+    first_id = 0
+    start = time.perf_counter()
+    for i in range(count):
+        if rate > 0:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        app_name, replaces, summary, body = synthetic_notification(scenario, i)
+        sent_at.append(time.perf_counter())
+        reply = connection.call_sync(
+            BUS_NAME,
+            OBJECT_PATH,
+            BUS_NAME,
+            "Notify",
+            GLib.Variant(
+                "(susssasa{sv}i)",
+                (app_name, first_id if replaces else 0, "", summary, body, [], {}, -1),
+            ),
+            GLib.VariantType("(u)"),
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+        )
+        first_id = first_id or reply.unpack()[0]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(args, address, tmp_dir):
+    # Imported only now: they must see the private bus and the scratch dirs
+    import utils.thumbnail_cache as thumbnail_cache
+
+    thumbnail_cache.THUMBNAILS_DIR = os.path.join(tmp_dir, "thumbnails")
+    import modules.notifications as notifications
+
+    notifications.HISTORY_JOURNAL_FILE = os.path.join(tmp_dir, "history.jsonl")
+    notifications.PERSISTENT_HISTORY_FILE = os.path.join(tmp_dir, "history.json")
+
+    history = notifications.NotificationHistory()
+    container = notifications.NotificationContainer(notification_history_instance=history)
+    window = Gtk.Window(title="notification-storm")
+    window.add(container)
+    window.show_all()
+
+    sent_at, shown_at = [], []
+    # Connected after the container's handler, so it runs once the popup is updated
+    container._server.connect(
+        "notification-added", lambda *_: shown_at.append(time.perf_counter())
+    )
+
+    stall = {"last": time.perf_counter(), "max": 0.0}
+
+    def probe():
+        now = time.perf_counter()
+        stall["max"] = max(stall["max"], now - stall["last"])
+        stall["last"] = now
+        return True
+
+    def finish():
+        if len(shown_at) < args.count and time.perf_counter() - finish.started < 10:
+            return True
+        wall = time.perf_counter() - finish.started_all
+        cpu = time.thread_time() - cpu_start
+        latencies = [(shown - sent) * 1000 for sent, shown in zip(sent_at, shown_at)]
+        print(f"scenario {args.scenario}: {len(shown_at)}/{args.count} notifications in {wall:.2f} s")
+        if latencies:
+            print(
+                "popup latency ms: "
+                f"mean {statistics.mean(latencies):.2f}  "
+                f"p50 {percentile(latencies, 0.5):.2f}  "
+                f"p95 {percentile(latencies, 0.95):.2f}  "
+                f"p99 {percentile(latencies, 0.99):.2f}  "
+                f"max {max(latencies):.2f}"
+            )
+        print(f"main thread CPU: {cpu:.2f} s ({100 * cpu / wall:.1f}% of wall time)")
+        print(f"longest main loop stall: {stall['max'] * 1000:.1f} ms")
+        print(f"popups on screen: {len(container.notifications)}, history entries: {len(history.store)}")
+        Gtk.main_quit()
+        return False
+
+    def client_done():
+        finish.started = time.perf_counter()
+        GLib.timeout_add(50, finish)
+        return False
+
+    def client():
+        fire(address, args.scenario, args.count, args.rate, sent_at)
+        GLib.idle_add(client_done)
+
+    GLib.timeout_add(STALL_PROBE_MS, probe)
+    cpu_start = time.thread_time()
+    finish.started_all = time.perf_counter()
+    threading.Thread(target=client, daemon=True).start()
+    Gtk.main()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="storm")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument(
+        "--rate", type=float, default=100, help="notifications per second, 0 for as fast as possible"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ax-shell-storm-") as tmp_dir:
+        bus = Gio.TestDBus.new(Gio.TestDBusFlags.NONE)
+        # Points DBUS_SESSION_BUS_ADDRESS of this process at the private bus
+        bus.up()
+        try:
+            run(args, bus.get_bus_address(), tmp_dir)
+        finally:
+            bus.down()
+
+
+if __name__ == "__main__":
+    main()
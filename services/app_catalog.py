@@ -0,0 +1,421 @@
+"""
+Shared catalog of installed desktop applications.
+
+The .desktop files are parsed once per process and the result is persisted
+to a compact index keyed by file mtimes, so warm starts only stat files.
+Gio.AppInfoMonitor triggers incremental re-validation when applications are
+installed or removed. Every module resolves window classes and app ids
+through the same normalized lookup table.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import gi
+
+gi.require_version("GdkPixbuf", "2.0")
+from fabric.core.service import Service, Signal
+from fabric.utils import DesktopApp
+from gi.repository import GdkPixbuf, Gio, GLib
+from loguru import logger
+
+import config.data as data
+from utils.icon_resolver import IconResolver
+
+APP_INDEX_FILE = os.path.join(data.CACHE_DIR, "apps.json")
+APP_INDEX_VERSION = 1
+
+# Suffixes stripped from window classes / executables before matching
+WINDOW_CLASS_SUFFIXES = (".bin", ".exe", ".so", "-bin", "-gtk")
+
+# Fields persisted for every application, in index order
+APP_FIELDS = (
+    "id",
+    "filename",
+    "mtime",
+    "hidden",
+    "name",
+    "display_name",
+    "generic_name",
+    "description",
+    "executable",
+    "command_line",
+    "window_class",
+    "icon_name",
+)
+
+
+def normalize_window_class(class_name: Optional[str]) -> str:
+    """Lowercase a window class or app id and strip common binary suffixes."""
+    if not class_name:
+        return ""
+    normalized = class_name.lower()
+    for suffix in WINDOW_CLASS_SUFFIXES:
+        if normalized.endswith(suffix):
+            normalized = normalized[: -len(suffix)]
+    return normalized
+
+
+def classes_match(class1: Optional[str], class2: Optional[str]) -> bool:
+    """Check whether two window classes refer to the same application."""
+    if not class1 or not class2:
+        return False
+    return normalize_window_class(class1) == normalize_window_class(class2)
+
+
+def command_basename(command_line: Optional[str]) -> str:
+    """Return the program name of a command line without path or arguments."""
+    if not command_line:
+        return ""
+    parts = command_line.split()
+    return parts[0].split("/")[-1] if parts else ""
+
+
+def get_application_dirs() -> List[str]:
+    """XDG application directories, highest precedence first."""
+    data_dirs = [GLib.get_user_data_dir(), *GLib.get_system_data_dirs()]
+    seen = []
+    for data_dir in data_dirs:
+        app_dir = os.path.join(data_dir, "applications")
+        if app_dir not in seen:
+            seen.append(app_dir)
+    return seen
+
+
+class CatalogApp:
+    """
+    Lightweight stand-in for fabric's DesktopApp built from the index.
+
+    Exposes the same attributes; the underlying Gio.DesktopAppInfo is only
+    loaded when the application is launched.
+    """
+
+    __slots__ = (*APP_FIELDS, "_desktop_app")
+
+    def __init__(self, **fields):
+        for field in APP_FIELDS:
+            setattr(self, field, fields.get(field))
+        self._desktop_app = None
+
+    @classmethod
+    def from_app_info(cls, app_info: Gio.DesktopAppInfo, app_id: str, mtime: float) -> "CatalogApp":
+        icon = app_info.get_icon()
+        return cls(
+            id=app_id,
+            filename=app_info.get_filename(),
+            mtime=mtime,
+            hidden=not app_info.should_show(),
+            name=app_info.get_name(),
+            display_name=app_info.get_display_name(),
+            generic_name=app_info.get_generic_name(),
+            description=app_info.get_description(),
+            executable=app_info.get_executable(),
+            command_line=app_info.get_commandline(),
+            window_class=app_info.get_startup_wm_class(),
+            icon_name=icon.to_string() if icon is not None else None,
+        )
+
+    def to_row(self) -> list:
+        return [getattr(self, field) for field in APP_FIELDS]
+
+    @classmethod
+    def from_row(cls, row: list) -> "CatalogApp":
+        return cls(**dict(zip(APP_FIELDS, row)))
+
+    @property
+    def desktop_app(self) -> Optional[DesktopApp]:
+        if self._desktop_app is None:
+            app_info = Gio.DesktopAppInfo.new_from_filename(self.filename)
+            if app_info is not None:
+                self._desktop_app = DesktopApp(app_info)
+        return self._desktop_app
+
+    def launch(self) -> bool:
+        desktop_app = self.desktop_app
+        return bool(desktop_app and desktop_app.launch())
+
+    def get_icon_pixbuf(
+        self,
+        size: int = 48,
+        default_icon: Optional[str] = "image-missing",
+        scale: int = 1,
+    ) -> Optional[GdkPixbuf.Pixbuf]:
+        """Load the application icon through the shared IconResolver pixbuf cache."""
+        pixbuf = IconResolver.load_icon(self.icon_name, size, scale) if self.icon_name else None
+        if pixbuf is None and default_icon:
+            pixbuf = IconResolver.load_icon(default_icon, size, scale)
+        return pixbuf
+
+    def __repr__(self) -> str:
+        return f"CatalogApp({self.id!r})"
+
+
+class AppCatalog(Service):
+    """Process-wide application catalog with an O(1) identifier lookup."""
+
+    @Signal
+    def changed(self) -> None: ...
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._apps: Dict[str, CatalogApp] = {}
+        self._visible_apps: List[CatalogApp] = []
+        self._identifiers: Dict[str, CatalogApp] = {}
+        self._dir_mtimes: Dict[str, float] = {}
+        self._revalidate_id: Optional[int] = None
+
+        if not self._load_index():
+            self._scan_all()
+            self._save_index()
+        elif self._revalidate():
+            self._save_index()
+        self._rebuild_lookup()
+
+        self._app_monitor = Gio.AppInfoMonitor.get()
+        self._app_monitor.connect("changed", self._on_apps_changed)
+
+    # ------------------------------------------------------------------
+    # Index persistence
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> bool:
+        try:
+            with open(APP_INDEX_FILE, "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if index.get("version") != APP_INDEX_VERSION or index.get("fields") != list(APP_FIELDS):
+            return False
+        self._dir_mtimes = index.get("dirs", {})
+        self._apps = {}
+        for row in index.get("apps", []):
+            app = CatalogApp.from_row(row)
+            self._apps[app.id] = app
+        return True
+
+    def _save_index(self):
+        index = {
+            "version": APP_INDEX_VERSION,
+            "fields": list(APP_FIELDS),
+            "dirs": dict(self._dir_mtimes),
+            "apps": [app.to_row() for app in self._apps.values()],
+        }
+
+        def write_index(_user_data):
+            tmp_path = f"{APP_INDEX_FILE}.tmp"
+            try:
+                os.makedirs(os.path.dirname(APP_INDEX_FILE), exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(index, f, separators=(",", ":"))
+                os.replace(tmp_path, APP_INDEX_FILE)
+            except OSError as e:
+                logger.warning(f"[AppCatalog] Could not write app index: {e}")
+
+        GLib.Thread.new("app-catalog-save", write_index, None)
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _walk_app_dirs(self) -> Dict[str, float]:
+        """Return the mtime of every application directory, including subdirectories."""
+        dir_mtimes = {}
+        for app_dir in get_application_dirs():
+            for root, _dirs, _files in os.walk(app_dir):
+                mtime = self._mtime(root)
+                if mtime is not None:
+                    dir_mtimes[root] = mtime
+        return dir_mtimes
+
+    def _scan_all(self):
+        """Cold start: let GIO parse every .desktop file once."""
+        self._apps = {}
+        for app_info in Gio.AppInfo.get_all():
+            if not isinstance(app_info, Gio.DesktopAppInfo):
+                continue
+            filename = app_info.get_filename()
+            app_id = app_info.get_id()
+            if not filename or not app_id:
+                continue
+            self._apps[app_id] = CatalogApp.from_app_info(app_info, app_id, self._mtime(filename) or 0)
+        self._dir_mtimes = self._walk_app_dirs()
+
+    def _desktop_id(self, app_dir: str, path: str) -> str:
+        return os.path.relpath(path, app_dir).replace(os.sep, "-")
+
+    def _parse_file(self, app_id: str, path: str) -> Optional[CatalogApp]:
+        app_info = Gio.DesktopAppInfo.new_from_filename(path)
+        if app_info is None:
+            return None
+        return CatalogApp.from_app_info(app_info, app_id, self._mtime(path) or 0)
+
+    def _revalidate(self) -> bool:
+        """
+        Re-parse only the .desktop files that changed since the index was
+        written. Returns True when the catalog changed.
+        """
+        changed = False
+        dir_mtimes = self._walk_app_dirs()
+
+        # Modified or removed files
+        for app_id, app in list(self._apps.items()):
+            mtime = self._mtime(app.filename)
+            if mtime is not None and mtime == app.mtime:
+                continue
+            parsed = self._parse_file(app_id, app.filename) if mtime is not None else None
+            if parsed is None:
+                # A file of the same id in a lower-precedence directory shows through
+                parsed = self._resolve(app_id, dir_mtimes, exclude=app.filename)
+            if parsed is None:
+                del self._apps[app_id]
+            else:
+                self._apps[app_id] = parsed
+            changed = True
+
+        # New files only appear in directories whose mtime changed
+        known_files = {app.filename for app in self._apps.values()}
+        for app_dir in get_application_dirs():
+            for root, mtime in dir_mtimes.items():
+                if not (root == app_dir or root.startswith(app_dir + os.sep)):
+                    continue
+                if self._dir_mtimes.get(root) == mtime:
+                    continue
+                try:
+                    entries = list(os.scandir(root))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if not entry.name.endswith(".desktop") or entry.path in known_files:
+                        continue
+                    app_id = self._desktop_id(app_dir, entry.path)
+                    existing = self._apps.get(app_id)
+                    # Directories earlier in XDG order take precedence
+                    if existing is not None and self._dir_rank(existing.filename) <= self._dir_rank(entry.path):
+                        continue
+                    parsed = self._parse_file(app_id, entry.path)
+                    if parsed is not None:
+                        self._apps[app_id] = parsed
+                        known_files.add(entry.path)
+                        changed = True
+
+        if dir_mtimes != self._dir_mtimes:
+            self._dir_mtimes = dir_mtimes
+            changed = True
+        return changed
+
+    def _resolve(self, app_id: str, dir_mtimes: Dict[str, float], exclude: str) -> Optional[CatalogApp]:
+        """Parse the highest-precedence .desktop file for app_id other than exclude, across all directories."""
+        for app_dir in get_application_dirs():
+            for root in dir_mtimes:
+                if not (root == app_dir or root.startswith(app_dir + os.sep)):
+                    continue
+                # Desktop ids join subdirectories with dashes
+                relative = os.path.relpath(root, app_dir)
+                prefix = "" if relative == "." else relative.replace(os.sep, "-") + "-"
+                if not app_id.startswith(prefix):
+                    continue
+                path = os.path.join(root, app_id[len(prefix):])
+                if path == exclude or self._mtime(path) is None:
+                    continue
+                parsed = self._parse_file(app_id, path)
+                if parsed is not None:
+                    return parsed
+        return None
+
+    @staticmethod
+    def _dir_rank(path: str) -> int:
+        for rank, app_dir in enumerate(get_application_dirs()):
+            if path.startswith(app_dir + os.sep):
+                return rank
+        return len(get_application_dirs())
+
+    def _on_apps_changed(self, *_):
+        # AppInfoMonitor fires once per file operation; coalesce bursts
+        if self._revalidate_id is not None:
+            GLib.source_remove(self._revalidate_id)
+        self._revalidate_id = GLib.timeout_add(500, self._revalidate_now)
+
+    def _revalidate_now(self):
+        self._revalidate_id = None
+        if self._revalidate():
+            self._rebuild_lookup()
+            self._save_index()
+            self.emit("changed")
+        return False
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _rebuild_lookup(self):
+        self._visible_apps = [app for app in self._apps.values() if not app.hidden]
+        identifiers: Dict[str, CatalogApp] = {}
+        for app in self._visible_apps:
+            keys = [
+                app.name,
+                app.display_name,
+                app.window_class,
+                app.executable.split("/")[-1] if app.executable else None,
+                command_basename(app.command_line),
+                app.id[: -len(".desktop")] if app.id.endswith(".desktop") else app.id,
+            ]
+            for key in keys:
+                if key:
+                    identifiers[key.lower()] = app
+        # Normalized aliases never override an exact identifier
+        for key, app in list(identifiers.items()):
+            identifiers.setdefault(normalize_window_class(key), app)
+        self._identifiers = identifiers
+
+    def get_apps(self) -> List[CatalogApp]:
+        """All applications that should be shown to the user."""
+        return list(self._visible_apps)
+
+    def find(self, identifier: Optional[str]) -> Optional[CatalogApp]:
+        """Resolve a window class, app id, executable or name in O(1)."""
+        if not identifier:
+            return None
+        key = str(identifier).lower()
+        app = self._identifiers.get(key)
+        if app is None:
+            app = self._identifiers.get(normalize_window_class(key))
+        return app
+
+    def find_any(self, identifiers: Iterable[Optional[str]]) -> Optional[CatalogApp]:
+        """Return the first application matched by any of the identifiers."""
+        for identifier in identifiers:
+            app = self.find(identifier)
+            if app is not None:
+                return app
+        return None
+
+    def find_by_substring(self, identifier: Optional[str]) -> Optional[CatalogApp]:
+        """Slow fallback: first application whose fields contain the identifier."""
+        if not identifier:
+            return None
+        needle = str(identifier).lower()
+        for app in self._visible_apps:
+            for value in (app.name, app.display_name, app.window_class, app.executable, app.command_line):
+                if value and needle in value.lower():
+                    return app
+        return None
+
+
+# Singleton accessor
+_app_catalog_instance = None
+
+
+def get_app_catalog() -> AppCatalog:
+    """Get the global AppCatalog instance."""
+    global _app_catalog_instance
+    if _app_catalog_instance is None:
+        _app_catalog_instance = AppCatalog()
+    return _app_catalog_instance
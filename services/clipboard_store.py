@@ -0,0 +1,291 @@
+"""
+Built-in clipboard history, an alternative to the cliphist binary.
+
+Entries live in one SQLite database in the cache dir. Content is
+deduplicated by SHA-1, so copying something again only moves the existing
+entry to the top. Text entries are also kept in an FTS5 trigram index,
+which lets search match anywhere in the full text rather than only in the
+preview line. New entries come from `wl-paste --watch`, one process per
+content kind, or from add() for any other producer.
+"""
+
+import base64
+import hashlib
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from fabric.core.service import Service, Signal
+from gi.repository import GLib
+from loguru import logger
+
+import config.data as data
+
+CLIPBOARD_DB_FILE = os.path.join(data.CACHE_DIR, "clipboard.db")
+
+# Same default as cliphist's max-items
+MAX_ENTRIES = 750
+# Larger copies are not kept
+MAX_ENTRY_BYTES = 16 * 1024 * 1024
+PREVIEW_LENGTH = 100
+# Shortest query the trigram index can answer; shorter ones scan with LIKE
+FTS_MIN_QUERY = 3
+
+TEXT_MIME = "text/plain;charset=utf-8"
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+# Each change is written as one line: clipboard state, a space, base64 content
+_WATCH_SCRIPT = 'printf "%s " "${CLIPBOARD_STATE:-data}"; base64 -w0; echo'
+_WHITESPACE = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hash TEXT NOT NULL UNIQUE,
+    mime TEXT NOT NULL,
+    preview TEXT NOT NULL,
+    content BLOB NOT NULL,
+    stamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_stamp ON entries (stamp);
+"""
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KiB"
+    return f"{size / (1024 * 1024):.1f} MiB"
+
+
+def sniff_image_mime(content: bytes) -> Optional[str]:
+    """Image mime type from the content's magic bytes, or None."""
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    return next((m for signature, m in IMAGE_SIGNATURES if content.startswith(signature)), None)
+
+
+def make_preview(content: bytes, mime: str) -> str:
+    """One-line description in the style of `cliphist list`."""
+    if mime.startswith("image/"):
+        return f"[[ binary data {_format_size(len(content))} {mime.split('/', 1)[1]} ]]"
+    text = _WHITESPACE.sub(" ", content.decode("utf-8", errors="replace")).strip()
+    return text[:PREVIEW_LENGTH]
+
+
+class ClipboardStore(Service):
+    """SQLite-backed clipboard history with content dedupe and full-text search."""
+
+    @Signal
+    def changed(self) -> None: ...
+
+    def __init__(self, path: str = CLIPBOARD_DB_FILE, **kwargs):
+        super().__init__(**kwargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared between the watcher threads, the picker's loader and the main loop
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._watchers: List[subprocess.Popen] = []
+        self._changed_id: Optional[int] = None
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            self._fts = self._create_fts()
+
+    def _create_fts(self) -> bool:
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts "
+                "USING fts5(text, tokenize='trigram')"
+            )
+            return True
+        except sqlite3.OperationalError:
+            logger.warning("[ClipboardStore] No FTS5 trigram support, searching with LIKE")
+            return False
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+
+    def add(self, content: bytes, mime: Optional[str] = None) -> Optional[int]:
+        """
+        Record a clipboard entry and return its id. Content already in the
+        history moves to the top instead of being stored twice. mime is
+        sniffed when omitted.
+        """
+        if not content or len(content) > MAX_ENTRY_BYTES:
+            return None
+        if mime is None:
+            mime = sniff_image_mime(content) or TEXT_MIME
+        if not mime.startswith("image/") and not content.strip():
+            return None
+
+        digest = hashlib.sha1(content).hexdigest()
+        stamp = time.time_ns()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM entries WHERE hash = ?", (digest,)).fetchone()
+            if row is not None:
+                entry_id = row[0]
+                self._db.execute("UPDATE entries SET stamp = ? WHERE id = ?", (stamp, entry_id))
+            else:
+                cursor = self._db.execute(
+                    "INSERT INTO entries (hash, mime, preview, content, stamp) VALUES (?, ?, ?, ?, ?)",
+                    (digest, mime, make_preview(content, mime), content, stamp),
+                )
+                entry_id = cursor.lastrowid
+                if self._fts and not mime.startswith("image/"):
+                    self._db.execute(
+                        "INSERT INTO entries_fts (rowid, text) VALUES (?, ?)",
+                        (entry_id, content.decode("utf-8", errors="replace")),
+                    )
+                self._trim()
+        self._notify_changed()
+        return entry_id
+
+    def _trim(self):
+        stale = self._db.execute(
+            "SELECT id FROM entries ORDER BY stamp DESC LIMIT -1 OFFSET ?", (MAX_ENTRIES,)
+        ).fetchall()
+        if stale:
+            self._db.executemany("DELETE FROM entries WHERE id = ?", stale)
+            if self._fts:
+                self._db.executemany("DELETE FROM entries_fts WHERE rowid = ?", stale)
+
+    def start_watching(self):
+        """Feed the store from `wl-paste --watch`, for text and for images."""
+        if self._watchers:
+            return
+        for kind in ("text", "image"):
+            try:
+                watcher = subprocess.Popen(
+                    ["wl-paste", "--type", kind, "--watch", "sh", "-c", _WATCH_SCRIPT],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            except OSError as e:
+                logger.warning(f"[ClipboardStore] Could not start wl-paste: {e}")
+                return
+            self._watchers.append(watcher)
+            GLib.Thread.new(f"clipboard-watch-{kind}", self._watch, (watcher, kind))
+
+    def _watch(self, args: Tuple[subprocess.Popen, str]):
+        watcher, kind = args
+        for line in watcher.stdout:
+            state, _, payload = line.partition(b" ")
+            # Password managers mark their copies; those stay out of the history
+            if state.strip() != b"data":
+                continue
+            try:
+                content = base64.b64decode(payload.strip(), validate=True)
+            except ValueError:
+                continue
+            if kind == "image":
+                mime = sniff_image_mime(content) or "image/png"
+            else:
+                mime = TEXT_MIME
+            try:
+                self.add(content, mime)
+            except sqlite3.Error as e:
+                logger.warning(f"[ClipboardStore] Could not store entry: {e}")
+
+    def stop_watching(self):
+        watchers, self._watchers = self._watchers, []
+        for watcher in watchers:
+            if watcher.poll() is None:
+                watcher.terminate()
+
+    def _notify_changed(self):
+        with self._lock:
+            if self._changed_id is not None:
+                return
+            self._changed_id = GLib.idle_add(self._emit_changed)
+
+    def _emit_changed(self):
+        with self._lock:
+            self._changed_id = None
+        self.emit("changed")
+        return False
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def iter_lines(self) -> Iterator[str]:
+        """Entries newest first as `cliphist list` lines: id, tab, preview."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, preview FROM entries ORDER BY stamp DESC"
+            ).fetchall()
+        for entry_id, preview in rows:
+            yield f"{entry_id}\t{preview}"
+
+    def get(self, entry_id: str) -> Optional[Tuple[bytes, str]]:
+        """(content, mime) of an entry, or None if it is gone."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content, mime FROM entries WHERE id = ?", (int(entry_id),)
+            ).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def search(self, query: str) -> List[str]:
+        """Ids of the entries containing query anywhere, newest first."""
+        query = query.strip()
+        if not query:
+            return []
+        with self._lock:
+            if self._fts and len(query) >= FTS_MIN_QUERY:
+                # A quoted phrase is matched literally by the trigram tokenizer
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self._db.execute(
+                    "SELECT e.id FROM entries_fts f JOIN entries e ON e.id = f.rowid "
+                    "WHERE entries_fts MATCH ? ORDER BY e.stamp DESC",
+                    (phrase,),
+                ).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = self._db.execute(
+                    "SELECT id FROM entries WHERE mime NOT LIKE 'image/%' "
+                    "AND CAST(content AS TEXT) LIKE ? ESCAPE '\\' ORDER BY stamp DESC",
+                    (pattern,),
+                ).fetchall()
+        return [str(row[0]) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Removal
+    # ------------------------------------------------------------------
+
+    def delete(self, entry_id: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries WHERE id = ?", (int(entry_id),))
+            if self._fts:
+                self._db.execute("DELETE FROM entries_fts WHERE rowid = ?", (int(entry_id),))
+        self._notify_changed()
+
+    def wipe(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries")
+            if self._fts:
+                self._db.execute("DELETE FROM entries_fts")
+        self._notify_changed()
+
+
+# Singleton accessor
+_clipboard_store_instance = None
+
+
+def get_clipboard_store() -> ClipboardStore:
+    """Get the global ClipboardStore instance."""
+    global _clipboard_store_instance
+    if _clipboard_store_instance is None:
+        _clipboard_store_instance = ClipboardStore()
+    return _clipboard_store_instance
@@ -0,0 +1,396 @@
+"""
+Asynchronous client for Hyprland's request socket (.socket.sock).
+
+Requests are written and read with Gio's async stream API on the GLib main
+loop, so callers never block the UI on a hyprctl fork or a socket round
+trip. Dispatches issued in the same main loop iteration are merged into a
+single ``[[BATCH]]`` request. Queries run concurrently, while requests that
+change Hyprland's state reach it one at a time, in the order they were made.
+"""
+
+import json
+import os
+import socket
+from collections import deque
+from typing import Callable, List, Optional
+
+from gi.repository import Gio, GLib
+from loguru import logger
+
+DEFAULT_TIMEOUT_MS = 2000
+# Hyprland closes the request socket after every reply, so connections cannot
+# be reused; the pool bounds how many queries are in flight at once.
+MAX_IN_FLIGHT = 4
+READ_CHUNK_SIZE = 65536
+# Requests that only read state; everything else is sent in order, one at a time
+READ_ONLY_COMMANDS = frozenset(
+    (
+        "activewindow",
+        "activeworkspace",
+        "animations",
+        "binds",
+        "clients",
+        "configerrors",
+        "cursorpos",
+        "decorations",
+        "descriptions",
+        "devices",
+        "getoption",
+        "globalshortcuts",
+        "instances",
+        "layers",
+        "layouts",
+        "locked",
+        "monitors",
+        "rollinglog",
+        "splash",
+        "submap",
+        "systeminfo",
+        "version",
+        "workspacerules",
+        "workspaces",
+    )
+)
+# Commands answering "ok" or an error message
+OK_REPLY_COMMANDS = ("dispatch", "keyword")
+
+
+def get_hyprland_socket_path(socket_name: str = ".socket.sock") -> str:
+    """Return the path of one of Hyprland's sockets for this instance."""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE", "")
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+    path = os.path.join(runtime_dir, "hypr", signature, socket_name)
+    if os.path.exists(path):
+        return path
+    # Hyprland < 0.40 kept its sockets under /tmp
+    return os.path.join("/tmp", "hypr", signature, socket_name)
+
+
+def _command_name(payload: str) -> str:
+    """'dispatch' for '/dispatch workspace 1', 'clients' for 'j/clients'."""
+    if payload.startswith("[[BATCH]]"):
+        return "[[BATCH]]"
+    return payload.split(" ", 1)[0].split("/", 1)[-1]
+
+
+def _split_replies(reply: bytes, count: int) -> Optional[List[bytes]]:
+    """The replies of the count commands of a batch; None if they cannot be told apart."""
+    text = reply.strip()
+    parts = [part.strip() for part in text.split(b"\n\n")]
+    if len(parts) == count:
+        return parts
+    # Older Hyprland joins the replies without a separator
+    if text == b"ok" * count:
+        return [b"ok"] * count
+    return None
+
+
+class CommandTimeoutError(TimeoutError):
+    """Raised when Hyprland does not answer a request in time."""
+
+
+class CommandFuture:
+    """Result of a Hyprland request. Callbacks always run on the main loop."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.reply: Optional[bytes] = None
+        self.error: Optional[Exception] = None
+        self.done = False
+        self._callbacks: List[Callable[["CommandFuture"], None]] = []
+
+    @property
+    def is_ok(self) -> bool:
+        return self.done and self.error is None
+
+    def add_done_callback(self, callback: Callable[["CommandFuture"], None]):
+        if self.done:
+            GLib.idle_add(lambda: (callback(self), False)[1])
+        else:
+            self._callbacks.append(callback)
+
+    def result(self) -> bytes:
+        if not self.done:
+            raise RuntimeError(f"Request '{self.command}' has not finished yet")
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+    def json(self):
+        return json.loads(self.result().decode())
+
+    def _resolve(self, reply: Optional[bytes] = None, error: Optional[Exception] = None):
+        if self.done:
+            return
+        self.done = True
+        self.reply = reply
+        self.error = error
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"[HyprlandCommands] Error in callback for '{self.command}': {e}")
+
+
+class _Request:
+    def __init__(self, payload: str, timeout_ms: int, futures: List[CommandFuture], ok_replies: int = 0):
+        self.payload = payload
+        self.timeout_ms = timeout_ms
+        # One future for the whole request, or one per command of a batch
+        self.futures = futures
+        # Number of commands answering "ok" or an error; 0 if the reply is data
+        self.ok_replies = ok_replies
+        self.serial = _command_name(payload) not in READ_ONLY_COMMANDS
+        self.cancellable = Gio.Cancellable()
+        self.timeout_id: Optional[int] = None
+        self.connection: Optional[Gio.SocketConnection] = None
+        self.chunks: List[bytes] = []
+        self.finished = False
+
+
+class HyprlandCommandClient:
+    """Non-blocking, batching client for Hyprland commands."""
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT):
+        self._socket_client = Gio.SocketClient.new()
+        self._max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._queue: deque = deque()
+        # Requests changing Hyprland's state, and the one of them in flight
+        self._serial_queue: deque = deque()
+        self._serial_request: Optional[_Request] = None
+        self._pending_dispatches: List[tuple] = []
+        self._flush_id: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def send(
+        self,
+        command: str,
+        callback: Optional[Callable[[CommandFuture], None]] = None,
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    ) -> CommandFuture:
+        """Send a raw request such as 'j/clients' or '/dispatch workspace 1'."""
+        future = CommandFuture(command)
+        if callback:
+            future.add_done_callback(callback)
+        ok_replies = 1 if _command_name(command) in OK_REPLY_COMMANDS else 0
+        self._enqueue(_Request(command, timeout_ms, [future], ok_replies))
+        return future
+
+    def send_json(
+        self,
+        command: str,
+        callback: Callable[[object], None],
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    ) -> CommandFuture:
+        """Send a JSON request (e.g. 'j/monitors') and pass the decoded reply, or None on failure."""
+
+        def on_done(future: CommandFuture):
+            try:
+                value = future.json()
+            except Exception as e:
+                logger.warning(f"[HyprlandCommands] '{command}' failed: {e}")
+                value = None
+            callback(value)
+
+        return self.send(command, on_done, timeout_ms)
+
+    def dispatch(
+        self,
+        dispatcher: str,
+        callback: Optional[Callable[[CommandFuture], None]] = None,
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    ) -> CommandFuture:
+        """
+        Queue a dispatcher call, e.g. 'focuswindow address:0x1234'.
+
+        All dispatches queued before the main loop becomes idle are sent as a
+        single [[BATCH]] request.
+        """
+        future = CommandFuture(f"dispatch {dispatcher}")
+        if callback:
+            future.add_done_callback(callback)
+        self._pending_dispatches.append((dispatcher, future, timeout_ms))
+        if self._flush_id is None:
+            self._flush_id = GLib.idle_add(self._flush_dispatches, priority=GLib.PRIORITY_HIGH_IDLE)
+        return future
+
+    def batch(
+        self,
+        commands: List[str],
+        callback: Optional[Callable[[CommandFuture], None]] = None,
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    ) -> CommandFuture:
+        """Send several commands ('dispatch ...', 'keyword ...') in one [[BATCH]] request."""
+        future = CommandFuture("[[BATCH]]" + ";".join(commands))
+        if callback:
+            future.add_done_callback(callback)
+        self._enqueue(_Request(future.command, timeout_ms, [future], len(commands)))
+        return future
+
+    def send_sync(self, command: str, timeout_ms: int = DEFAULT_TIMEOUT_MS) -> bytes:
+        """
+        Blocking request over the socket, for the few startup paths that need
+        an answer before the main loop runs. Prefer send() everywhere else.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout_ms / 1000)
+            sock.connect(get_hyprland_socket_path())
+            sock.sendall(command.encode())
+            chunks = []
+            while chunk := sock.recv(READ_CHUNK_SIZE):
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _flush_dispatches(self):
+        self._flush_id = None
+        pending, self._pending_dispatches = self._pending_dispatches, []
+        if not pending:
+            return False
+        timeout_ms = max(timeout for _, _, timeout in pending)
+        futures = [future for _, future, _ in pending]
+        if len(pending) == 1:
+            payload = f"/dispatch {pending[0][0]}"
+        else:
+            payload = "[[BATCH]]" + ";".join(f"dispatch {dispatcher}" for dispatcher, _, _ in pending)
+        self._enqueue(_Request(payload, timeout_ms, futures, len(pending)))
+        return False
+
+    def _enqueue(self, request: _Request):
+        if request.serial:
+            # Dispatches queued earlier must not be overtaken
+            if self._flush_id is not None:
+                GLib.source_remove(self._flush_id)
+                self._flush_dispatches()
+            self._serial_queue.append(request)
+        else:
+            self._queue.append(request)
+        self._start_next()
+
+    def _start_next(self):
+        if self._serial_queue and self._serial_request is None:
+            self._serial_request = self._serial_queue.popleft()
+            self._start(self._serial_request)
+        while self._queue and self._in_flight < self._max_in_flight:
+            self._in_flight += 1
+            self._start(self._queue.popleft())
+
+    def _start(self, request: _Request):
+        request.timeout_id = GLib.timeout_add(request.timeout_ms, self._on_timeout, request)
+        address = Gio.UnixSocketAddress.new(get_hyprland_socket_path())
+        self._socket_client.connect_async(address, request.cancellable, self._on_connected, request)
+
+    def _on_connected(self, client, result, request: _Request):
+        try:
+            connection = client.connect_finish(result)
+        except GLib.Error as e:
+            self._finish(request, error=e)
+            return
+        request.connection = connection
+        connection.get_output_stream().write_all_async(
+            request.payload.encode(),
+            GLib.PRIORITY_DEFAULT,
+            request.cancellable,
+            self._on_written,
+            request,
+        )
+
+    def _on_written(self, stream, result, request: _Request):
+        try:
+            stream.write_all_finish(result)
+        except GLib.Error as e:
+            self._finish(request, error=e)
+            return
+        self._read_next(request)
+
+    def _read_next(self, request: _Request):
+        request.connection.get_input_stream().read_bytes_async(
+            READ_CHUNK_SIZE,
+            GLib.PRIORITY_DEFAULT,
+            request.cancellable,
+            self._on_read,
+            request,
+        )
+
+    def _on_read(self, stream, result, request: _Request):
+        try:
+            data = stream.read_bytes_finish(result).get_data()
+        except GLib.Error as e:
+            self._finish(request, error=e)
+            return
+        if data:
+            request.chunks.append(data)
+            self._read_next(request)
+        else:
+            self._finish(request, reply=b"".join(request.chunks))
+
+    def _on_timeout(self, request: _Request):
+        request.timeout_id = None
+        self._finish(
+            request,
+            error=CommandTimeoutError(f"Hyprland did not answer '{request.payload}' in {request.timeout_ms} ms"),
+        )
+        return False
+
+    def _finish(self, request: _Request, reply: Optional[bytes] = None, error: Optional[Exception] = None):
+        if request.finished:
+            return
+        request.finished = True
+        if request.timeout_id is not None:
+            GLib.source_remove(request.timeout_id)
+            request.timeout_id = None
+        request.cancellable.cancel()
+        if request.connection is not None:
+            request.connection.close_async(GLib.PRIORITY_DEFAULT, None, None, None)
+
+        if request is self._serial_request:
+            self._serial_request = None
+        else:
+            self._in_flight -= 1
+
+        if error is None and request.ok_replies:
+            self._resolve_ok_replies(request, reply)
+        else:
+            for future in request.futures:
+                future._resolve(reply, error)
+
+        self._start_next()
+
+    def _resolve_ok_replies(self, request: _Request, reply: bytes):
+        replies = _split_replies(reply, request.ok_replies)
+        if replies is None:
+            error = RuntimeError(reply.decode(errors="replace").strip() or "empty reply")
+            replies, errors = [reply] * request.ok_replies, [error] * request.ok_replies
+        else:
+            errors = [
+                None if part == b"ok" else RuntimeError(part.decode(errors="replace") or "empty reply")
+                for part in replies
+            ]
+        if len(request.futures) == request.ok_replies:
+            # Merged dispatches: every caller gets the reply to its own command
+            for future, part, error in zip(request.futures, replies, errors):
+                future._resolve(part, error)
+        else:
+            error = next((error for error in errors if error is not None), None)
+            for future in request.futures:
+                future._resolve(reply, error)
+
+
+# Singleton accessor
+_hyprland_command_client_instance = None
+
+
+def get_hyprland_commands() -> HyprlandCommandClient:
+    """Get the global HyprlandCommandClient instance."""
+    global _hyprland_command_client_instance
+    if _hyprland_command_client_instance is None:
+        _hyprland_command_client_instance = HyprlandCommandClient()
+    return _hyprland_command_client_instance
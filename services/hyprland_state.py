@@ -0,0 +1,448 @@
+"""
+Process-wide cache of Hyprland state.
+
+Loads one snapshot of clients, workspaces and monitors and then keeps the
+tables current from the Hyprland event socket, so widgets read from memory
+instead of asking the compositor for full JSON dumps on every event.
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from fabric.core.service import Service, Signal
+from fabric.hyprland.widgets import get_hyprland_connection
+from gi.repository import GLib
+from loguru import logger
+
+from services.hyprland_commands import get_hyprland_commands
+
+# Hyprland does not report window geometry in its events, so anything that can
+# move or resize windows schedules one coalesced "j/clients" refresh.
+CLIENTS_REFRESH_DELAY_MS = 16
+
+
+def normalize_address(address: str) -> str:
+    """Events send bare hex addresses while JSON replies prefix them with 0x."""
+    address = address.strip()
+    if not address:
+        return ""
+    return address if address.startswith("0x") else f"0x{address}"
+
+
+class HyprlandState(Service):
+    """Event-fed, in-memory view of Hyprland clients, workspaces and monitors."""
+
+    @Signal
+    def clients_changed(self) -> None: ...
+
+    @Signal
+    def workspaces_changed(self) -> None: ...
+
+    @Signal
+    def monitors_changed(self) -> None: ...
+
+    @Signal
+    def active_window_changed(self, address: str) -> str: ...
+
+    @Signal
+    def active_workspace_changed(self, workspace_id: int) -> int: ...
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._clients: Dict[str, dict] = {}
+        self._workspaces: Dict[int, dict] = {}
+        self._monitors: Dict[int, dict] = {}
+        self._active_address = ""
+        self._active_class = ""
+        self._active_title = ""
+        self._clients_refresh_id: Optional[int] = None
+        self._loaded = False
+
+        self.conn = get_hyprland_connection()
+
+        handlers = {
+            "openwindow": self._on_open_window,
+            "closewindow": self._on_close_window,
+            "movewindowv2": self._on_move_window,
+            "windowtitlev2": self._on_window_title,
+            "activewindow": self._on_active_window,
+            "activewindowv2": self._on_active_window_v2,
+            "changefloatingmode": self._on_change_floating_mode,
+            "fullscreen": self._on_layout_event,
+            "pin": self._on_pin,
+            "workspacev2": self._on_workspace,
+            "focusedmon": self._on_focused_monitor,
+            "createworkspacev2": self._on_create_workspace,
+            "destroyworkspacev2": self._on_destroy_workspace,
+            "moveworkspacev2": self._on_move_workspace,
+            "renameworkspace": self._on_rename_workspace,
+            "activespecial": self._on_active_special,
+            "monitoradded": self._on_monitors_event,
+            "monitorremoved": self._on_monitors_event,
+            "configreloaded": self.refresh,
+        }
+        for event_name, handler in handlers.items():
+            self.conn.connect(f"event::{event_name}", handler)
+
+        if self.conn.ready:
+            self.refresh()
+        else:
+            self.conn.connect("event::ready", self.refresh)
+
+    # ------------------------------------------------------------------
+    # Snapshot loading
+    # ------------------------------------------------------------------
+
+    def _query(self, command: str):
+        try:
+            return json.loads(self.conn.send_command(command).reply.decode())
+        except (json.JSONDecodeError, AttributeError, UnicodeDecodeError) as e:
+            logger.warning(f"[HyprlandState] Could not query '{command}': {e}")
+            return None
+
+    def refresh(self, *_):
+        """Reload every table from Hyprland. Used at startup and on config reloads."""
+        self._load_monitors()
+        self._load_workspaces()
+        self._load_clients()
+
+        active = self._query("j/activewindow") or {}
+        self._active_address = active.get("address", "")
+        self._active_class = active.get("initialClass", "") or active.get("class", "")
+        self._active_title = active.get("title", "")
+        self._loaded = True
+
+        self.emit("monitors-changed")
+        self.emit("workspaces-changed")
+        self.emit("clients-changed")
+        self.emit("active-window-changed", self._active_address)
+
+    def _load_monitors(self):
+        monitors = self._query("j/monitors")
+        if monitors is not None:
+            self._monitors = {monitor["id"]: monitor for monitor in monitors}
+
+    def _load_workspaces(self):
+        workspaces = self._query("j/workspaces")
+        if workspaces is not None:
+            self._workspaces = {ws["id"]: ws for ws in workspaces}
+
+    def _load_clients(self):
+        clients = self._query("j/clients")
+        if clients is not None:
+            self._set_clients(clients)
+
+    def _set_clients(self, clients: List[dict]):
+        self._clients = {client["address"]: client for client in clients}
+
+    def _schedule_clients_refresh(self):
+        if self._clients_refresh_id is None:
+            self._clients_refresh_id = GLib.timeout_add(
+                CLIENTS_REFRESH_DELAY_MS, self._refresh_clients
+            )
+
+    def refresh_clients(self):
+        """Schedule a coalesced re-fetch of the clients, for changes Hyprland sends no event for."""
+        self._schedule_clients_refresh()
+
+    def _refresh_clients(self):
+        self._clients_refresh_id = None
+        get_hyprland_commands().send_json("j/clients", self._on_clients_loaded)
+        return False
+
+    def _on_clients_loaded(self, clients):
+        if clients is None:
+            return
+        clients = {client["address"]: client for client in clients}
+        # Polled refreshes mostly find nothing new
+        if clients == self._clients:
+            return
+        self._clients = clients
+        self.emit("clients-changed")
+
+    # ------------------------------------------------------------------
+    # Event handlers
+    # ------------------------------------------------------------------
+
+    def _workspace_id_from_name(self, name: str) -> int:
+        for ws in self._workspaces.values():
+            if ws.get("name") == name:
+                return ws["id"]
+        try:
+            return int(name)
+        except ValueError:
+            return 0
+
+    def _focused_monitor(self) -> Optional[dict]:
+        for monitor in self._monitors.values():
+            if monitor.get("focused"):
+                return monitor
+        return None
+
+    def _on_open_window(self, _, event):
+        if len(event.data) < 3:
+            return
+        address = normalize_address(event.data[0])
+        workspace_name = event.data[1]
+        window_class = event.data[2]
+        title = ",".join(event.data[3:])
+        monitor = self._focused_monitor()
+        self._clients[address] = {
+            "address": address,
+            "mapped": True,
+            "hidden": False,
+            "at": [0, 0],
+            "size": [0, 0],
+            "workspace": {
+                "id": self._workspace_id_from_name(workspace_name),
+                "name": workspace_name,
+            },
+            "floating": False,
+            "fullscreen": 0,
+            "pinned": False,
+            "monitor": monitor["id"] if monitor else 0,
+            "class": window_class,
+            "title": title,
+            "initialClass": window_class,
+            "initialTitle": title,
+        }
+        self.emit("clients-changed")
+        self._schedule_clients_refresh()
+
+    def _on_close_window(self, _, event):
+        address = normalize_address(event.data[0]) if event.data else ""
+        if self._clients.pop(address, None) is not None:
+            self.emit("clients-changed")
+        if address == self._active_address:
+            self._active_address = ""
+        self._schedule_clients_refresh()
+
+    def _on_move_window(self, _, event):
+        if len(event.data) < 3:
+            return
+        client = self._clients.get(normalize_address(event.data[0]))
+        if client is not None:
+            try:
+                workspace_id = int(event.data[1])
+            except ValueError:
+                workspace_id = self._workspace_id_from_name(event.data[2])
+            client["workspace"] = {"id": workspace_id, "name": ",".join(event.data[2:])}
+            self.emit("clients-changed")
+        self._schedule_clients_refresh()
+
+    def _on_window_title(self, _, event):
+        if len(event.data) < 2:
+            return
+        address = normalize_address(event.data[0])
+        client = self._clients.get(address)
+        if client is not None:
+            client["title"] = ",".join(event.data[1:])
+        if address == self._active_address:
+            self._active_title = ",".join(event.data[1:])
+
+    def _on_active_window(self, _, event):
+        # "activewindow" carries class and title and arrives right before
+        # "activewindowv2", which tells us the address.
+        self._active_class = event.data[0] if event.data else ""
+        self._active_title = ",".join(event.data[1:])
+        self._active_address = ""
+
+    def _on_active_window_v2(self, _, event):
+        address = normalize_address(event.data[0]) if event.data else ""
+        previous = self._clients.get(self._active_address)
+        self._active_address = address
+        client = self._clients.get(address)
+        # Floating windows are moved and resized without any event; focus
+        # moving to or from one is the cheapest hint that it may have
+        if any(c is not None and c.get("floating") for c in (previous, client)):
+            self._schedule_clients_refresh()
+        if client is not None:
+            self._active_class = client.get("initialClass", "") or client.get("class", "")
+            self._active_title = client.get("title", "")
+        elif not address:
+            self._active_class = ""
+            self._active_title = ""
+        self.emit("active-window-changed", address)
+
+    def _on_change_floating_mode(self, _, event):
+        if len(event.data) >= 2:
+            client = self._clients.get(normalize_address(event.data[0]))
+            if client is not None:
+                client["floating"] = event.data[1] == "1"
+        self._schedule_clients_refresh()
+
+    def _on_pin(self, _, event):
+        if len(event.data) >= 2:
+            client = self._clients.get(normalize_address(event.data[0]))
+            if client is not None:
+                client["pinned"] = event.data[1] == "1"
+
+    def _on_layout_event(self, *_):
+        self._schedule_clients_refresh()
+
+    def _on_workspace(self, _, event):
+        try:
+            workspace_id = int(event.data[0])
+        except (IndexError, ValueError):
+            return
+        name = ",".join(event.data[1:]) or str(workspace_id)
+        monitor = self._focused_monitor()
+        if monitor is not None:
+            monitor["activeWorkspace"] = {"id": workspace_id, "name": name}
+        self.emit("active-workspace-changed", workspace_id)
+
+    def _on_focused_monitor(self, _, event):
+        if not event.data:
+            return
+        monitor_name = event.data[0]
+        workspace_name = ",".join(event.data[1:])
+        for monitor in self._monitors.values():
+            monitor["focused"] = monitor.get("name") == monitor_name
+            if monitor["focused"] and workspace_name:
+                monitor["activeWorkspace"] = {
+                    "id": self._workspace_id_from_name(workspace_name),
+                    "name": workspace_name,
+                }
+        self.emit("monitors-changed")
+        self.emit("active-workspace-changed", self.get_active_workspace_id())
+
+    def _on_create_workspace(self, _, event):
+        try:
+            workspace_id = int(event.data[0])
+        except (IndexError, ValueError):
+            return
+        monitor = self._focused_monitor()
+        self._workspaces[workspace_id] = {
+            "id": workspace_id,
+            "name": ",".join(event.data[1:]) or str(workspace_id),
+            "monitor": monitor.get("name", "") if monitor else "",
+            "monitorID": monitor["id"] if monitor else 0,
+        }
+        self.emit("workspaces-changed")
+
+    def _on_destroy_workspace(self, _, event):
+        try:
+            workspace_id = int(event.data[0])
+        except (IndexError, ValueError):
+            return
+        if self._workspaces.pop(workspace_id, None) is not None:
+            self.emit("workspaces-changed")
+
+    def _on_move_workspace(self, _, event):
+        if len(event.data) < 3:
+            return
+        try:
+            workspace = self._workspaces.get(int(event.data[0]))
+        except ValueError:
+            return
+        if workspace is not None:
+            monitor_name = event.data[-1]
+            monitor = self.get_monitor_by_name(monitor_name)
+            workspace["monitor"] = monitor_name
+            workspace["monitorID"] = monitor["id"] if monitor else workspace.get("monitorID", 0)
+            self.emit("workspaces-changed")
+        self._schedule_clients_refresh()
+
+    def _on_rename_workspace(self, _, event):
+        try:
+            workspace = self._workspaces.get(int(event.data[0]))
+        except (IndexError, ValueError):
+            return
+        if workspace is not None:
+            workspace["name"] = ",".join(event.data[1:])
+            self.emit("workspaces-changed")
+
+    def _on_active_special(self, _, event):
+        if len(event.data) < 2:
+            return
+        monitor = self.get_monitor_by_name(event.data[-1])
+        if monitor is not None:
+            name = ",".join(event.data[:-1])
+            monitor["specialWorkspace"] = {
+                "id": self._workspace_id_from_name(name) if name else 0,
+                "name": name,
+            }
+            self.emit("monitors-changed")
+
+    def _on_monitors_event(self, *_):
+        self._load_monitors()
+        self._load_workspaces()
+        self.emit("monitors-changed")
+        self.emit("workspaces-changed")
+        self._schedule_clients_refresh()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get_clients(self) -> List[dict]:
+        """Return all known clients. The dicts are shared; treat them as read-only."""
+        return list(self._clients.values())
+
+    def get_client(self, address: str) -> Optional[dict]:
+        return self._clients.get(normalize_address(address))
+
+    def get_workspace_clients(self, workspace_id: int) -> List[dict]:
+        return [
+            client
+            for client in self._clients.values()
+            if client.get("workspace", {}).get("id") == workspace_id
+        ]
+
+    def get_workspaces(self) -> List[dict]:
+        return sorted(self._workspaces.values(), key=lambda ws: ws["id"])
+
+    def get_workspace(self, workspace_id: int) -> Optional[dict]:
+        return self._workspaces.get(workspace_id)
+
+    def get_monitors(self) -> List[dict]:
+        return [self._monitors[monitor_id] for monitor_id in sorted(self._monitors)]
+
+    def get_monitor(self, monitor_id: int) -> Optional[dict]:
+        return self._monitors.get(monitor_id)
+
+    def get_monitor_by_name(self, name: str) -> Optional[dict]:
+        for monitor in self._monitors.values():
+            if monitor.get("name") == name:
+                return monitor
+        return None
+
+    def get_focused_monitor(self) -> Optional[dict]:
+        return self._focused_monitor()
+
+    def get_active_workspace_id(self) -> int:
+        monitor = self._focused_monitor()
+        if monitor is None:
+            return 0
+        return monitor.get("activeWorkspace", {}).get("id", 0)
+
+    def get_active_window_address(self) -> str:
+        return self._active_address
+
+    def get_active_window(self) -> Optional[dict]:
+        return self._clients.get(self._active_address)
+
+    def get_active_window_class(self) -> str:
+        client = self.get_active_window()
+        if client is not None:
+            return client.get("initialClass", "") or client.get("class", "")
+        return self._active_class
+
+    def get_active_window_title(self) -> str:
+        return self._active_title
+
+
+# Singleton accessor
+_hyprland_state_instance = None
+
+
+def get_hyprland_state() -> HyprlandState:
+    """Get the global HyprlandState instance."""
+    global _hyprland_state_instance
+    if _hyprland_state_instance is None:
+        _hyprland_state_instance = HyprlandState()
+    return _hyprland_state_instance
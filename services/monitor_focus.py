@@ -1,8 +1,15 @@
-import json
-import subprocess
-import threading
+import socket
 from typing import Optional
 
+from gi.repository import GLib
+
+from services.hyprland_commands import get_hyprland_socket_path
+
+# Focus sweeps produce bursts of events; dispatch at most once per frame.
+DISPATCH_INTERVAL_MS = 16
+RECONNECT_DELAY_MS = 1000
+READ_CHUNK_SIZE = 65536
+
 
 class Signal:
     """Simple signal implementation for monitor focus service."""
@@ -27,8 +34,10 @@ class MonitorFocusService:
     """
     Service to track monitor focus changes through Hyprland events.
     
-    Listens to 'focusedmon' and 'workspace' events and emits signals
-    when monitor focus changes.
+    Reads 'focusedmon' and 'workspace' events from Hyprland's event socket
+    on the GLib main loop and emits signals when monitor focus changes.
+    Events are parsed in batches per read, and bursts are coalesced so that
+    only the latest event of each type is dispatched once per frame.
     """
     
     _instance = None
@@ -48,7 +57,12 @@ class MonitorFocusService:
         self._current_workspace = 1
         self._current_monitor_name = ""
         self._listening = False
-        self._thread = None
+        self._socket = None
+        self._watch_id = None
+        self._reconnect_id = None
+        self._dispatch_id = None
+        self._buffer = b""
+        self._pending_events = {}
         
         # Signals
         self.monitor_focused = Signal()
@@ -86,41 +100,115 @@ class MonitorFocusService:
             self._monitor_info = {}
     
     def start_listening(self):
-        """Start listening to Hyprland events in a separate thread."""
+        """Start reading Hyprland events on the main loop."""
         if self._listening:
             return
         
         self._listening = True
-        self._thread = threading.Thread(target=self._listen_to_hyprland, daemon=True)
-        self._thread.start()
+        self._connect()
     
     def stop_listening(self):
         """Stop listening to Hyprland events."""
         self._listening = False
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=1.0)
+        for source_id in (self._reconnect_id, self._dispatch_id):
+            if source_id is not None:
+                GLib.source_remove(source_id)
+        self._reconnect_id = None
+        self._dispatch_id = None
+        self._pending_events = {}
+        self._disconnect()
     
-    def _listen_to_hyprland(self):
-        """Listen to Hyprland events via socat."""
+    def _connect(self):
+        """Connect to the event socket and watch it for incoming data."""
+        self._reconnect_id = None
+        if not self._listening:
+            return False
+        
         try:
-            process = subprocess.Popen(
-                ["socat", "-U", "-", "UNIX-CONNECT:/tmp/hypr/$HYPRLAND_INSTANCE_SIGNATURE/.socket2.sock"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
-            )
-            
-            while self._listening and process.poll() is None:
-                if process.stdout:
-                    line = process.stdout.readline()
-                    if line:
-                        self._handle_hyprland_event(line.strip())
-                    
-        except (subprocess.SubprocessError, FileNotFoundError) as e:
-            print(f"MonitorFocusService: Error listening to Hyprland: {e}")
-        except Exception as e:
-            print(f"MonitorFocusService: Unexpected error: {e}")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(get_hyprland_socket_path(".socket2.sock"))
+            sock.setblocking(False)
+        except OSError as e:
+            print(f"MonitorFocusService: Error connecting to Hyprland: {e}")
+            self._schedule_reconnect()
+            return False
+        
+        self._socket = sock
+        self._buffer = b""
+        self._watch_id = GLib.io_add_watch(
+            sock.fileno(),
+            GLib.PRIORITY_DEFAULT,
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self._on_socket_ready,
+        )
+        return False
+    
+    def _disconnect(self):
+        if self._watch_id is not None:
+            GLib.source_remove(self._watch_id)
+            self._watch_id = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        self._buffer = b""
+    
+    def _schedule_reconnect(self):
+        if self._listening and self._reconnect_id is None:
+            self._reconnect_id = GLib.timeout_add(RECONNECT_DELAY_MS, self._connect)
+    
+    def _on_socket_ready(self, fd, condition):
+        """Drain everything readable and queue the complete event lines."""
+        chunks = []
+        closed = False
+        # Read first: on a hangup the last events Hyprland wrote are still queued
+        while True:
+            try:
+                chunk = self._socket.recv(READ_CHUNK_SIZE)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                print(f"MonitorFocusService: Error reading Hyprland events: {e}")
+                closed = True
+                break
+            if not chunk:
+                closed = True
+                break
+            chunks.append(chunk)
+        if condition & (GLib.IOCondition.HUP | GLib.IOCondition.ERR):
+            closed = True
+        
+        if chunks:
+            self._buffer += b"".join(chunks)
+            *lines, self._buffer = self._buffer.split(b"\n")
+            for line in lines:
+                self._queue_hyprland_event(line.decode("utf-8", errors="replace"))
+        
+        if closed:
+            # Returning False removes this watch
+            self._watch_id = None
+            self._disconnect()
+            self._schedule_reconnect()
+            return False
+        return True
+    
+    def _queue_hyprland_event(self, event_line: str):
+        """Keep only the latest event of each type until the next dispatch."""
+        event_type, sep, _ = event_line.partition('>>')
+        if not sep or event_type not in ("focusedmon", "workspace"):
+            return
+        
+        # Re-insert so dispatch follows the order of the latest occurrences
+        self._pending_events.pop(event_type, None)
+        self._pending_events[event_type] = event_line
+        if self._dispatch_id is None:
+            self._dispatch_id = GLib.timeout_add(DISPATCH_INTERVAL_MS, self._dispatch_pending_events)
+    
+    def _dispatch_pending_events(self):
+        self._dispatch_id = None
+        pending, self._pending_events = self._pending_events, {}
+        for event_line in pending.values():
+            self._handle_hyprland_event(event_line)
+        return False
     
     def _handle_hyprland_event(self, event_line: str):
         """Parse and handle Hyprland event."""
@@ -0,0 +1,315 @@
+"""
+Ranked fuzzy search over desktop applications for the launcher.
+
+Every field is casefolded and tokenized once when the app list changes.
+Character, token-prefix, bigram and trigram postings are stored as integer
+bitsets, so a query narrows the candidate set with a few AND operations
+before any scoring. Queries of one or two characters are answered from
+rankings of token-prefix matches built along with the postings, and the
+fuzzy pass scores a bounded number of matches. Extending the previous
+query only rescores the previous matches.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+_TOKEN = re.compile(r"[^\W_]+")
+_TOKEN_START = re.compile(r"(?<![^\W_])[^\W_]")
+
+# (attribute, weight) pairs; matches in heavier fields rank higher
+FIELD_WEIGHTS = (
+    ("display_name", 1.0),
+    ("name", 0.9),
+    ("command", 0.8),
+    ("executable", 0.7),
+    ("generic_name", 0.6),
+    ("command_line", 0.3),
+)
+
+# Scores for the kind of match found inside a single field
+SCORE_EXACT = 1.0
+SCORE_PREFIX = 0.9
+SCORE_TOKEN_PREFIX = 0.8
+SCORE_SUBSTRING = 0.6
+SCORE_FUZZY = 0.4
+
+# Largest bonus usage history can add on top of the match score
+FRECENCY_WEIGHT = 0.3
+
+# Queries up to this length are looked up in token-prefix and bigram
+# postings and skip the fuzzy pass. A single letter only matches token
+# prefixes; matching it anywhere in a name is noise.
+SHORT_QUERY_LENGTH = 2
+# Fields at least this heavy take part in fuzzy subsequence matching
+FUZZY_MIN_WEIGHT = 0.6
+# At most this many apps are scored by the fuzzy pass per query
+FUZZY_MAX_MATCHES = 64
+
+
+def extract_command_name(command_line: str) -> str:
+    """Extract base command name from command line, removing paths and arguments"""
+    if not command_line:
+        return ""
+    # Wrapped commands like "/bin/sh -c "\$SHELL -i -c scrcpy"" carry no useful name
+    if command_line.startswith("/bin/sh -c"):
+        return ""
+    parts = command_line.split()
+    return parts[0].split("/")[-1] if parts else ""
+
+
+def _iter_bits(mask: int):
+    # Scanning the binary string stays linear for masks of thousands of bits
+    bits = bin(mask)[:1:-1]
+    i = bits.find("1")
+    while i != -1:
+        yield i
+        i = bits.find("1", i + 1)
+
+
+class _Field:
+    __slots__ = ("text", "weight", "boundaries")
+
+    def __init__(self, text: str, weight: float):
+        self.text = text
+        self.weight = weight
+        # Positions where a token starts; fuzzy hits there count more
+        self.boundaries = frozenset(m.start() for m in _TOKEN_START.finditer(text))
+
+    def score_at(self, query: str, pos: int) -> float:
+        """Score a substring occurrence of the query starting at pos."""
+        if pos == 0:
+            if len(query) == len(self.text):
+                return SCORE_EXACT * self.weight
+            return SCORE_PREFIX * self.weight
+        if pos in self.boundaries:
+            return SCORE_TOKEN_PREFIX * self.weight
+        return SCORE_SUBSTRING * self.weight
+
+    def fuzzy(self, query: str, start: int = 0) -> float:
+        """Greedy subsequence match from start rewarding token starts and consecutive runs."""
+        pos = start - 1
+        previous = start - 2
+        points = 0
+        for ch in query:
+            pos = self.text.find(ch, pos + 1)
+            if pos == -1:
+                return 0.0
+            points += 1
+            if pos in self.boundaries:
+                points += 2
+            if pos == previous + 1:
+                points += 1
+            previous = pos
+        # Normalize to (0, 1] and penalize matches spread over long fields
+        quality = points / (4 * len(query))
+        spread = len(query) / (previous + 1 - start)
+        return SCORE_FUZZY * quality * (0.5 + 0.5 * spread) * self.weight
+
+
+class AppSearchIndex:
+    """Incremental, ranked search index over a list of applications."""
+
+    def __init__(self, apps: Sequence = ()):
+        self.set_apps(apps)
+
+    def set_apps(self, apps: Sequence):
+        # Bit i of every posting is the i-th app in alphabetical order, so
+        # ties in score and the bounded fuzzy pass both go alphabetically
+        self._apps = sorted(apps, key=lambda app: (app.display_name or "").casefold())
+        self._index_by_id = {getattr(app, "id", None): i for i, app in enumerate(self._apps)}
+        self._fields: List[List[_Field]] = []
+        self._fuzzy_fields: List[_Field] = []
+        # All fields of an app joined in weight order, with their start offsets
+        self._haystacks: List[str] = []
+        self._offsets: List[List[int]] = []
+        self._char_postings: Dict[str, int] = {}
+        self._prefix_postings: Dict[str, int] = {}
+        # Bigrams of the main fields only: two letters inside a command line
+        # are noise
+        self._bigram_postings: Dict[str, int] = {}
+        self._trigram_postings: Dict[str, int] = {}
+        # Characters starting a token of the fuzzy text
+        self._fuzzy_start_postings: Dict[str, int] = {}
+        # Short token prefix -> {app: best score of a token starting with it}
+        prefix_scores: Dict[str, Dict[int, float]] = {}
+        self._all_mask = (1 << len(self._apps)) - 1
+        self._last_query = ""
+        self._last_mask = self._all_mask
+
+        for i, app in enumerate(self._apps):
+            bit = 1 << i
+            fields = []
+            for attribute, weight in FIELD_WEIGHTS:
+                if attribute == "command":
+                    value = extract_command_name(app.command_line)
+                elif attribute == "executable":
+                    value = (app.executable or "").split("/")[-1]
+                else:
+                    value = getattr(app, attribute, None) or ""
+                text = value.casefold().strip()
+                if not text:
+                    continue
+                field = _Field(text, weight)
+                fields.append(field)
+                for ch in set(text):
+                    self._char_postings[ch] = self._char_postings.get(ch, 0) | bit
+                for token in _TOKEN.finditer(text):
+                    for j in range(1, min(len(token.group()), SHORT_QUERY_LENGTH) + 1):
+                        prefix = token.group()[:j]
+                        self._prefix_postings[prefix] = (
+                            self._prefix_postings.get(prefix, 0) | bit
+                        )
+                        scores = prefix_scores.setdefault(prefix, {})
+                        score = field.score_at(prefix, token.start())
+                        if score > scores.get(i, 0.0):
+                            scores[i] = score
+                if weight >= FUZZY_MIN_WEIGHT:
+                    for j in range(len(text) - 1):
+                        bigram = text[j : j + 2]
+                        self._bigram_postings[bigram] = self._bigram_postings.get(bigram, 0) | bit
+                for j in range(len(text) - 2):
+                    trigram = text[j : j + 3]
+                    self._trigram_postings[trigram] = (
+                        self._trigram_postings.get(trigram, 0) | bit
+                    )
+            self._fields.append(fields)
+            offsets = []
+            position = 0
+            for field in fields:
+                offsets.append(position)
+                position += len(field.text) + 1
+            self._haystacks.append("\0".join(f.text for f in fields))
+            self._offsets.append(offsets)
+            # One subsequence pass over the main fields instead of one per field
+            fuzzy_field = _Field(
+                " ".join(f.text for f in fields if f.weight >= FUZZY_MIN_WEIGHT),
+                sum(f.weight for f in fields if f.weight >= FUZZY_MIN_WEIGHT)
+                / max(1, sum(1 for f in fields if f.weight >= FUZZY_MIN_WEIGHT)),
+            )
+            self._fuzzy_fields.append(fuzzy_field)
+            for ch in {fuzzy_field.text[j] for j in fuzzy_field.boundaries}:
+                self._fuzzy_start_postings[ch] = self._fuzzy_start_postings.get(ch, 0) | bit
+
+        # (-score, app) pairs, ready to be merged into results
+        self._prefix_ranked = {
+            prefix: sorted((-score, i) for i, score in scores.items())
+            for prefix, scores in prefix_scores.items()
+        }
+
+    def _candidates(self, query: str) -> int:
+        # Reuse the previous result set when the query was only extended and
+        # both are matched by the same rules: single letters only match token
+        # prefixes and two letters skip the fuzzy pass, so their results lack
+        # what a longer query finds
+        if (
+            self._last_query
+            and query.startswith(self._last_query)
+            and min(len(self._last_query), SHORT_QUERY_LENGTH + 1)
+            == min(len(query), SHORT_QUERY_LENGTH + 1)
+        ):
+            mask = self._last_mask
+        else:
+            mask = self._all_mask
+        if len(query) == 1:
+            return mask & self._prefix_postings.get(query, 0)
+        if len(query) == 2:
+            return mask & (self._prefix_postings.get(query, 0) | self._bigram_postings.get(query, 0))
+        for ch in set(query):
+            mask &= self._char_postings.get(ch, 0)
+            if not mask:
+                break
+        return mask
+
+    def _rank_substrings(self, mask: int, query: str, ranked: List) -> int:
+        """Add the apps of mask containing query to ranked; returns the mask of those."""
+        haystacks, offsets, fields = self._haystacks, self._offsets, self._fields
+        for i in _iter_bits(mask):
+            # Fields are joined in weight order, so the first occurrence lies
+            # in the heaviest field containing the query.
+            pos = haystacks[i].find(query)
+            if pos == -1:
+                mask &= ~(1 << i)
+                continue
+            starts = offsets[i]
+            k = bisect_right(starts, pos) - 1
+            ranked.append((-fields[i][k].score_at(query, pos - starts[k]), i))
+        return mask
+
+    def search(self, query: str, frecency: Optional[Dict[str, float]] = None) -> List:
+        """
+        Return matching apps, best match first; all apps alphabetically for an
+        empty query. frecency maps desktop ids to decayed use counts and is
+        blended into the match score.
+        """
+        query = query.casefold().strip()
+        if not query:
+            self._last_query = ""
+            self._last_mask = self._all_mask
+            return list(self._apps)
+
+        mask = self._candidates(query)
+        # (-score, app) pairs
+        ranked = []
+
+        if len(query) <= SHORT_QUERY_LENGTH:
+            # Token-prefix matches come ranked from the index; a second letter
+            # also finds the query inside the words of the main fields ("fi"
+            # in Bonfire)
+            prefix_mask = self._prefix_postings.get(query, 0)
+            # Never narrowed from a previous query: no shorter one follows the
+            # same rules
+            ranked = list(self._prefix_ranked.get(query, ()))
+            matched = prefix_mask | self._rank_substrings(mask & ~prefix_mask, query, ranked)
+            next_mask = matched
+        else:
+            # Only apps holding every trigram of the query can contain it as a
+            # substring
+            substring_mask = mask
+            for j in range(len(query) - 2):
+                substring_mask &= self._trigram_postings.get(query[j : j + 3], 0)
+            matched = next_mask = self._rank_substrings(substring_mask, query, ranked)
+
+            # Fuzzy matches start at a token start of a main field. Only the
+            # first FUZZY_MAX_MATCHES are scored; the rest stay candidates for
+            # a longer query.
+            first = re.escape(query[0])
+            # The lookbehind checks for a token start. Each gap excludes the
+            # character ending it, so a failing text is given up without
+            # backtracking.
+            subsequence = re.compile(
+                first
+                + f"(?<![^\\W_]{first})"
+                + "".join(f"[^{re.escape(ch)}]*{re.escape(ch)}" for ch in query[1:])
+            )
+            fuzzy_mask = mask & ~matched & self._fuzzy_start_postings.get(query[0], 0)
+            scored = 0
+            for i in _iter_bits(fuzzy_mask):
+                if scored == FUZZY_MAX_MATCHES:
+                    next_mask |= fuzzy_mask >> i << i
+                    break
+                fuzzy_field = self._fuzzy_fields[i]
+                found = subsequence.search(fuzzy_field.text)
+                if found is None:
+                    continue
+                scored += 1
+                best = fuzzy_field.fuzzy(query, found.start())
+                if best > 0:
+                    matched |= 1 << i
+                    next_mask |= 1 << i
+                    ranked.append((-best, i))
+
+        self._last_query = query
+        self._last_mask = next_mask
+
+        if frecency:
+            bonus = {}
+            for app_id, uses in frecency.items():
+                i = self._index_by_id.get(app_id)
+                if uses and i is not None and matched >> i & 1:
+                    bonus[i] = FRECENCY_WEIGHT * uses / (uses + 1)
+            if bonus:
+                ranked = [(score - bonus.get(i, 0.0), i) for score, i in ranked]
+
+        ranked.sort()
+        return [self._apps[i] for _, i in ranked]
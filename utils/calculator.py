@@ -0,0 +1,210 @@
+"""
+Sandboxed evaluation of launcher calculator expressions.
+
+Expressions are evaluated by a separate Python worker process that keeps
+numpy imported between requests and runs under an address space limit.
+The shell waits for answers on a background thread and kills the worker
+when an evaluation exceeds the time limit or a newer request supersedes
+it; a fresh worker is started on the next request. Results of recent
+expressions are memoized.
+"""
+
+import json
+import math
+import os
+import re
+import select
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from gi.repository import GLib
+
+TIME_LIMIT_SECONDS = 2.0
+MEMORY_LIMIT_BYTES = 1024 * 1024 * 1024
+CACHE_SIZE = 128
+
+REPLACEMENTS = {
+    "^": "**",
+    "×": "*",
+    "÷": "/",
+    "π": "np.pi",
+    "pi": "np.pi",
+    "e": "np.e",
+    "sin(": "np.sin(",
+    "cos(": "np.cos(",
+    "tan(": "np.tan(",
+    "log(": "np.log10(",
+    "ln(": "np.log(",
+    "sqrt(": "np.sqrt(",
+    "abs(": "np.abs(",
+    "exp(": "np.exp(",
+}
+
+
+def prepare_expression(expr: str) -> str:
+    """Translate calculator notation into a numpy expression."""
+    for old, new in REPLACEMENTS.items():
+        expr = expr.replace(old, new)
+
+    expr = re.sub(r"(\d+)!", r"np.factorial(\1)", expr)
+
+    for old, new in [("[", "("), ("]", ")"), ("{", "("), ("}", ")")]:
+        expr = expr.replace(old, new)
+    return expr
+
+
+def evaluate_expression(expr: str) -> str:
+    """Evaluate a prepared expression and format the result for display."""
+    import numpy as np
+
+    safe_dict = {
+        "np": np,
+        "math": math,
+        "arange": np.arange,
+        "linspace": np.linspace,
+        "array": np.array,
+    }
+
+    try:
+        result = eval(expr, {"__builtins__": None}, safe_dict)
+
+        if isinstance(result, np.ndarray):
+            if result.size > 10:
+                return f"Array of shape {result.shape}"
+            return str(result)
+        if isinstance(result, (int, float, np.number)):
+            if isinstance(result, (int, np.integer)) or result.is_integer():
+                return str(int(result))
+            return f"{float(result):.10g}"
+        return str(result)
+    except MemoryError:
+        return "Error: Calculation needs too much memory"
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def serve():
+    """Worker loop: one JSON-encoded expression per stdin line, one result per stdout line."""
+    import resource
+
+    import numpy  # noqa: F401  (imported before the limit so its mappings fit)
+
+    resource.setrlimit(resource.RLIMIT_AS, (MEMORY_LIMIT_BYTES, MEMORY_LIMIT_BYTES))
+    for line in sys.stdin:
+        result = evaluate_expression(json.loads(line))
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+class _Job:
+    def __init__(self, expr: str, callback: Callable[[str], None]):
+        self.expr = expr
+        self.callback = callback
+        self.worker: Optional[subprocess.Popen] = None
+        self.cancelled = False
+
+
+class Calculator:
+    def __init__(self):
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._job: Optional[_Job] = None
+        self._worker: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def evaluate(self, text: str, callback: Callable[[str], None]):
+        """
+        Evaluate calculator input off the main thread. callback receives the
+        formatted result on the main loop, unless a newer evaluate() call
+        cancelled this one first.
+        """
+        self.cancel()
+        expr = prepare_expression(text)
+
+        if expr in self._cache:
+            self._cache.move_to_end(expr)
+            result = self._cache[expr]
+            GLib.idle_add(lambda: (callback(result), False)[1])
+            return
+
+        job = _Job(expr, callback)
+        self._job = job
+        GLib.Thread.new("calculator", self._run, job)
+
+    def cancel(self):
+        """Abandon the running evaluation, if any; its callback is never called."""
+        job, self._job = self._job, None
+        if job is None:
+            return
+        with self._lock:
+            job.cancelled = True
+            worker = job.worker
+        # eval() cannot be interrupted; the only way to stop it is the process
+        if worker is not None:
+            self._kill(worker)
+
+    def _spawn_worker(self) -> subprocess.Popen:
+        env = dict(os.environ, OPENBLAS_NUM_THREADS="1", OMP_NUM_THREADS="1")
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env,
+        )
+
+    def _kill(self, worker: subprocess.Popen):
+        with self._lock:
+            if self._worker is worker:
+                self._worker = None
+        if worker.poll() is None:
+            worker.kill()
+
+    def _run(self, job: _Job):
+        with self._lock:
+            if job.cancelled:
+                return
+            if self._worker is None or self._worker.poll() is not None:
+                self._worker = self._spawn_worker()
+            worker = job.worker = self._worker
+
+        # Timeouts and aborts depend on the moment, not the expression
+        cacheable = False
+        try:
+            worker.stdin.write(json.dumps(job.expr) + "\n")
+            worker.stdin.flush()
+            ready, _, _ = select.select([worker.stdout], [], [], TIME_LIMIT_SECONDS)
+            if ready:
+                line = worker.stdout.readline()
+                # An empty read means the worker died: killed or out of memory
+                result = json.loads(line) if line else "Error: Calculation aborted"
+                cacheable = bool(line)
+            else:
+                result = f"Error: Calculation took longer than {TIME_LIMIT_SECONDS:g}s"
+        except (OSError, ValueError):
+            result = "Error: Calculation aborted"
+
+        if not isinstance(result, str) or result.startswith("Error: Calculation"):
+            self._kill(worker)
+            worker.wait()
+
+        GLib.idle_add(self._finish, job, result, cacheable)
+
+    def _finish(self, job: _Job, result: str, cacheable: bool):
+        if job.cancelled:
+            return False
+        if self._job is job:
+            self._job = None
+        if cacheable:
+            self._cache[job.expr] = result
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        job.callback(result)
+        return False
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,4 +1,13 @@
-import requests
+import json
+import os
+import re
+import threading
+import time
+
+from loguru import logger
+
+import config.data as data
+from utils.currency_rates import get_currency_rate_store
 
 
 class Units():
@@ -94,15 +103,16 @@ class Units():
             "EB": 9223372036854775808,
         }
 
-        self.TEMPERATURE_CHART = {
-            "celsius": (lambda v: v + 273.15, lambda v: v - 273.15),
-            "c": (lambda v: v + 273.15, lambda v: v - 273.15),
-            "fahrenheit": (lambda v: (v - 32) * 5/9 + 273.15, lambda v: (v - 273.15) * 9/5 + 32),
-            "f": (lambda v: (v - 32) * 5/9 + 273.15, lambda v: (v - 273.15) * 9/5 + 32),
-            "kelvin": (lambda v: v, lambda v: v),
-            "k": (lambda v: v, lambda v: v),
-            "rankine": (lambda v: v * 5/9, lambda v: v * 9/5),
-            "reaumur": (lambda v: v * 5/4 + 273.15, lambda v: (v - 273.15) * 4/5),
+        # kelvin = value * scale + offset
+        self.TEMPERATURE_CHART: dict[str, tuple[float, float]] = {
+            "celsius": (1, 273.15),
+            "c": (1, 273.15),
+            "fahrenheit": (5/9, 273.15 - 32 * 5/9),
+            "f": (5/9, 273.15 - 32 * 5/9),
+            "kelvin": (1, 0),
+            "k": (1, 0),
+            "rankine": (5/9, 0),
+            "reaumur": (5/4, 273.15),
         }
 
         self.TIME_CHART: dict[str, float] = {
@@ -302,143 +312,245 @@ class Units():
 
         # Ya no usamos currency_converter aquí.
 
+    def charts(self) -> dict[str, dict]:
+        """Every unit chart by name, in lookup priority order."""
+        return {name: chart for name, chart in vars(self).items() if name.endswith("_CHART")}
+
+
+def _affine(chart_name: str, factor) -> tuple[float, float]:
+    """(scale, offset) taking a value in this unit to the chart's base unit."""
+    if chart_name == "TEMPERATURE_CHART":
+        return float(factor[0]), float(factor[1])
+    if chart_name == "WEIGHT_CHART":
+        return float(factor[0]), 0.0
+    return float(factor), 0.0
+
+
+def _plurals(alias: str) -> list[str]:
+    if alias.endswith(("s", "x", "z", "ch", "sh")):
+        return [alias + "es"]
+    if alias.endswith("y") and alias[-2:-1] not in "aeiou":
+        return [alias[:-1] + "ies", alias + "s"]
+    return [alias + "s"]
+
+
+class UnitTable:
+    """
+    Unit charts compiled for constant-time lookups.
+
+    Every spelling of a unit maps to its candidate (dimension, scale, offset)
+    triples, scale and offset taking a value to the dimension's base unit.
+    Units valid in several dimensions ("m", "oz") keep one candidate per
+    dimension in chart order. Spellings typed exactly as in the charts are
+    tried first; case-insensitive and plural spellings fill in the other
+    dimensions, and are left out when they would be ambiguous inside one.
+    """
+
+    def __init__(self, dimensions: list[str], exact: dict, folded: dict):
+        self.dimensions = dimensions
+        self._exact = exact
+        self._folded = folded
+
+    @classmethod
+    def compile(cls, units: "Units") -> "UnitTable":
+        charts = units.charts()
+        dimensions = list(charts)
+        exact: dict[str, list] = {}
+        folded: dict[str, dict[int, tuple]] = {}
+        ambiguous: set[tuple[str, int]] = set()
+
+        def add_folded(key: str, dim: int, entry: tuple):
+            if (key, dim) in ambiguous:
+                return
+            known = folded.setdefault(key, {})
+            if dim in known and known[dim] != entry:
+                ambiguous.add((key, dim))
+                del known[dim]
+            else:
+                known[dim] = entry
+
+        for dim, (chart_name, chart) in enumerate(charts.items()):
+            for alias, factor in chart.items():
+                scale, offset = _affine(chart_name, factor)
+                entry = (dim, scale, offset)
+                exact.setdefault(alias, []).append(entry)
+                spellings = [alias.casefold()]
+                if len(alias) > 1:
+                    spellings += _plurals(alias.casefold())
+                for spelling in spellings:
+                    add_folded(spelling, dim, entry)
+
+        folded = {key: list(entries.values()) for key, entries in folded.items() if entries}
+        # "F" is farad, but also fahrenheit when converting to a temperature
+        for alias, entries in exact.items():
+            dims = {entry[0] for entry in entries}
+            entries.extend(e for e in folded.get(alias.casefold(), []) if e[0] not in dims)
+        return cls(dimensions, exact, folded)
+
+    def to_dict(self) -> dict:
+        return {"dimensions": self.dimensions, "exact": self._exact, "folded": self._folded}
+
+    @classmethod
+    def from_dict(cls, stored: dict) -> "UnitTable":
+        return cls(stored["dimensions"], stored["exact"], stored["folded"])
+
+    def lookup(self, unit: str) -> list:
+        """Candidate [dimension, scale, offset] entries for a spelling; empty if unknown."""
+        entries = self._exact.get(unit)
+        if entries is None:
+            entries = self._folded.get(unit.casefold(), [])
+        return entries
+
+    def convert_terms(self, terms: list[tuple[float, str]], target: str) -> float:
+        """
+        Sum of every (value, unit) term expressed in target, in the first
+        dimension all of them share. Raises ValueError when there is none.
+        """
+        target_entries = self.lookup(target)
+        term_entries = [self.lookup(unit) for _, unit in terms]
+        if not target_entries or not all(term_entries):
+            raise ValueError(f"Unsupported conversion to {target}")
+
+        shared = {entry[0] for entry in target_entries}
+        for entries in term_entries:
+            shared &= {entry[0] for entry in entries}
+        if not shared:
+            raise ValueError(f"Unsupported conversion to {target}")
+        dim = next(entry[0] for entry in term_entries[0] if entry[0] in shared)
+
+        _, to_scale, to_offset = next(e for e in target_entries if e[0] == dim)
+        total = 0.0
+        for (value, _), entries in zip(terms, term_entries):
+            _, scale, offset = next(e for e in entries if e[0] == dim)
+            if offset or to_offset:
+                total += (value * scale + offset - to_offset) / to_scale
+            else:
+                total += value * (scale / to_scale)
+        return total
+
+
+UNIT_TABLE_FILE = os.path.join(data.CACHE_DIR, "units.json")
+UNIT_TABLE_VERSION = 1
+
+
+def _unit_table_source() -> list:
+    # The charts live in this file, so its identity stands in for their contents
+    stat = os.stat(__file__)
+    return [UNIT_TABLE_VERSION, stat.st_mtime_ns, stat.st_size]
+
+
+def _load_unit_table() -> UnitTable:
+    try:
+        source = _unit_table_source()
+    except OSError:
+        source = None
+
+    if source is not None:
+        try:
+            with open(UNIT_TABLE_FILE, "r") as f:
+                stored = json.load(f)
+            if stored.get("source") == source:
+                return UnitTable.from_dict(stored["table"])
+        except (OSError, json.JSONDecodeError, KeyError):
+            pass
+
+    table = UnitTable.compile(Units())
+    if source is not None:
+        tmp_path = f"{UNIT_TABLE_FILE}.tmp"
+        try:
+            os.makedirs(os.path.dirname(UNIT_TABLE_FILE), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"source": source, "table": table.to_dict()}, f, separators=(",", ":"))
+            os.replace(tmp_path, UNIT_TABLE_FILE)
+        except OSError as e:
+            logger.warning(f"[Conversion] Could not write {UNIT_TABLE_FILE}: {e}")
+    return table
+
+
+# Singleton accessor
+_unit_table_instance = None
+_unit_table_lock = threading.Lock()
+
+
+def get_unit_table() -> UnitTable:
+    """Get the global compiled UnitTable, loading or compiling it on first use."""
+    global _unit_table_instance
+    with _unit_table_lock:
+        if _unit_table_instance is None:
+            _unit_table_instance = _load_unit_table()
+        return _unit_table_instance
+
+
+# "5 ft and 3 in _ cm": one or more "value unit" terms, then "_" and the target
+_NUMBER = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+_UNIT = r"[^\W\d_][^\s,+_]*"
+_TERM = rf"({_NUMBER})\s*({_UNIT})"
+TERM_PATTERN = re.compile(_TERM)
+INPUT_PATTERN = re.compile(
+    rf"\s*(?P<terms>{_TERM}(?:(?:\s*(?:\band\b|\+|,)\s*|\s+){_TERM})*)"
+    rf"\s*_\s*(?P<target>{_UNIT})\s*"
+)
+
 
 class Conversion():
     def __init__(self):
-        self.units = Units()
+        self.rates = get_currency_rate_store()
 
     def convert(self, value: float, from_type: str, to_type: str):
         """
         Generalized conversion function que funciona con todas las categorías,
         incluyendo moneda via floatrates.com.
         """
-        # Colección de todos los charts no-monedas
-        charts = {
-            "WEIGHT_CHART": self.units.WEIGHT_CHART,
-            "LENGTH_CHART": self.units.LENGTH_CHART,
-            "TEMPERATURE_CHART": self.units.TEMPERATURE_CHART,
-            "TIME_CHART": self.units.TIME_CHART,
-            "LIQUID_VOLUME_CHART": self.units.LIQUID_VOLUME_CHART,
-            "STORAGE_TYPE_CHART": self.units.STORAGE_TYPE_CHART,
-            "ANGLE_CHART": self.units.ANGLE_CHART,
-            "ENERGY_CHART": self.units.ENERGY_CHART,
-            "SPEED_CHART": self.units.SPEED_CHART,  
-            "PRESSURE_CHART": self.units.PRESSURE_CHART,
-            "FORCE_CHART": self.units.FORCE_CHART,
-            "POWER_CHART": self.units.POWER_CHART,
-            "VOLTAGE_CHART": self.units.VOLTAGE_CHART,
-            "CURRENT_CHART": self.units.CURRENT_CHART,
-            "RESISTANCE_CHART": self.units.RESISTANCE_CHART,
-            "CAPACITANCE_CHART": self.units.CAPACITANCE_CHART,
-            "INDUCTANCE_CHART": self.units.INDUCTANCE_CHART,
-            "FREQUENCY_CHART": self.units.FREQUENCY_CHART,
-            "LUMINANCE_CHART": self.units.LUMINANCE_CHART,
-            "AREA_CHART": self.units.AREA_CHART,
-        }
+        return self._convert_terms([(value, from_type)], to_type)
+
+    def _convert_terms(self, terms: list[tuple[float, str]], to_type: str) -> float:
+        table = get_unit_table()
+        units_known = table.lookup(to_type) and all(table.lookup(unit) for _, unit in terms)
+        if units_known:
+            return table.convert_terms(terms, to_type)
+
+        # Solo si no es una unidad conocida se interpreta como moneda (p. ej. "USD", "ARS")
+        if self._is_currency(to_type) and all(self._is_currency(unit) for _, unit in terms):
+            return sum(self._convert_currency(value, unit, to_type) for value, unit in terms)
 
-        # 1) Revisar si está en alguno de los charts (no monedas)
-        for chart_name, chart in charts.items():
-            if from_type in chart and to_type in chart:
-                # Temperaturas usan lambdas
-                if chart_name == "TEMPERATURE_CHART":
-                    if from_type == to_type:
-                        return value
-                    to_kelvin = chart[from_type][0]
-                    from_kelvin = chart[to_type][1]
-                    return from_kelvin(to_kelvin(value))
-                
-                # Handle WEIGHT_CHART separately (tuple values)
-                if chart_name == "WEIGHT_CHART":
-                    if from_type == to_type:
-                        return value
-                    to_kg = chart[from_type][0]
-                    from_kg = chart[to_type][1]
-                    return value * to_kg * from_kg
-
-                # Cualquier otro chart numérico
-                if from_type == to_type:
-                    return value
-                return value * (chart[from_type] / chart[to_type])
-
-        # 2) Si ambos son códigos de moneda (p. ej. “USD”, “ARS”)
-        #    asumimos que están en mayúsculas y tienen 3 letras.
-        if len(from_type) == 3 and len(to_type) == 3 and from_type.isalpha() and to_type.isalpha():
-            return self._convert_currency_via_floatrates(value, from_type, to_type)
-
-        # 3) Si no cae en ningún caso, error.
-        raise ValueError(f"Unsupported conversion: {from_type} to {to_type}")
-
-    def _convert_currency_via_floatrates(self, value: float, from_code: str, to_code: str) -> float:
+        from_types = ", ".join(unit for _, unit in terms)
+        raise ValueError(f"Unsupported conversion: {from_types} to {to_type}")
+
+    def _convert_currency(self, value: float, from_code: str, to_code: str) -> float:
         """
-        Convierte usando el JSON de floatrates.com:
-        - Hace GET a https://www.floatrates.com/daily/{from_lower}.json
-        - Toma el rate de la clave to_lower y multiplica.
+        Convierte con la tabla de tasas en caché (ver utils/currency_rates).
+        Solo bloquea la primera vez que no hay ninguna tabla descargada.
         """
-        from_lower = from_code.lower()
-        to_lower = to_code.lower()
-
-        if from_lower == to_lower:
+        if from_code.lower() == to_code.lower():
             return value
+        rate, _ = self.rates.rate(from_code, to_code)
+        return value * rate
 
-        url = f"https://www.floatrates.com/daily/{from_lower}.json"
-        resp = requests.get(url, timeout=5)
-        if resp.status_code != 200:
-            raise ValueError(f"Error al obtener datos de floatrates para {from_code}")
+    def _currency_marker(self, *types: str) -> str:
+        """Sufijo para resultados calculados con tasas vencidas (p. ej. sin red)."""
+        if not all(self._is_currency(t) for t in types) or not self.rates.is_stale():
+            return ""
+        fetched = time.strftime("%b %d", time.localtime(self.rates.fetched_at))
+        return f" (stale rates from {fetched})"
 
-        data = resp.json()
-        if to_lower not in data:
-            raise ValueError(f"Moneda destino '{to_code}' no encontrada en la respuesta de floatrates para '{from_code}'")
-
-        rate = data[to_lower]["rate"]
-        return value * rate
+    @staticmethod
+    def _is_currency(type: str) -> bool:
+        return len(type) == 3 and type.isalpha()
 
     def parse_input_and_convert(self, input: str):
-        parts = input.split()
-        addition = "s" if parts[-1].endswith("s") else ""
-
-        if "and" in parts:  # valor unidad1 and valor2 unidad2 _ a unidad_destino
-            parts.remove("and")
-            if len(parts) != 6:
-                raise ValueError("Formato inválido. Esperado: 'value from_type and value2 from_type2 _ to_type'")
-            
-            value1, from_type1, value2, from_type2, _, to_type = parts
-            value1, value2 = float(value1), float(value2)
-            from_type1 = self.clean_type(from_type1)
-            from_type2 = self.clean_type(from_type2)
-            to_type = self.clean_type(to_type)
-
-            if from_type1 == from_type2:
-                return self.convert(value1 + value2, from_type1, to_type), to_type + addition
-            else:
-                res = 0
-                res += self.convert(value1, from_type1, to_type)
-                res += self.convert(value2, from_type2, to_type)
-                return res, to_type + addition
-        else:
-            if len(parts) != 4:
-                raise ValueError("Formato inválido. Esperado: 'value from_type _ to_type'")
-            value, from_type, _, to_type = parts
-            value = float(value)
-            from_type = self.clean_type(from_type)
-            to_type = self.clean_type(to_type)
-            return self.convert(value, from_type, to_type), to_type + addition
-
-    def clean_type(self, type: str) -> str:
-        """
-        Si es moneda (3 letras), lo pasa a mayúsculas. 
-        Si termina en 's' (y no es 'celsius'), le quita la 's' para 
-        las otras unidades. """
-        if len(type) == 3 and type.isalpha():
-            return type.upper()
-        if type.endswith("s") and type.lower() != "celsius":
-            # Para las tablas que tienen singular/plural
-            singular = type[:-1].lower()
-            # Si existe en STORAGE_TYPE_CHART, lo usamos; 
-            # si no, devolvemos singular en minúsculas para otros charts.
-            if singular in self.units.STORAGE_TYPE_CHART:
-                return singular
-            return singular.lower()
-        return type
+        """Convert 'value unit [and value unit ...] _ to_unit'; returns (value, unit label)."""
+        match = INPUT_PATTERN.fullmatch(input)
+        if match is None:
+            raise ValueError("Formato inválido. Esperado: 'value from_type [and value2 from_type2] _ to_type'")
+
+        terms = [(float(value), unit) for value, unit in TERM_PATTERN.findall(match.group("terms"))]
+        to_type = match.group("target")
+        result = self._convert_terms(terms, to_type)
+
+        if get_unit_table().lookup(to_type):
+            return result, to_type
+        units = [unit for _, unit in terms]
+        return result, to_type.upper() + self._currency_marker(*units, to_type)
 
 
 # Ejemplo rápido de uso:
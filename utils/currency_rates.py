@@ -0,0 +1,178 @@
+"""
+Offline-capable currency exchange rates.
+
+One table of rates against a base currency is fetched from floatrates.com
+and kept in memory and in the cache directory; cross rates between any two
+currencies are derived from it locally. Once the table is older than its
+TTL it is still served, flagged as stale, while a refresh runs in the
+background. Failed refreshes back off exponentially, so being offline
+costs one failed request every so often rather than one per conversion.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from gi.repository import GLib
+from loguru import logger
+
+import config.data as data
+
+RATES_FILE = os.path.join(data.CACHE_DIR, "currency_rates.json")
+RATES_VERSION = 1
+BASE_CURRENCY = "usd"
+RATES_URL = "https://www.floatrates.com/daily/{base}.json"
+
+# floatrates publishes once a day; a few hours keeps results close enough
+TTL_SECONDS = 6 * 3600
+REQUEST_TIMEOUT_SECONDS = 5
+# Delay before retrying a failed refresh, doubled after every failure
+RETRY_MIN_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+
+
+class CurrencyRateStore:
+    def __init__(self, path: str = RATES_FILE):
+        self._path = path
+        # currency code (lowercase) -> units per one BASE_CURRENCY
+        self._rates: Dict[str, float] = {}
+        self._fetched_at = 0.0
+        self._retry_at = 0.0
+        self._retry_delay = RETRY_MIN_SECONDS
+        self._refreshing = False
+        self._lock = threading.Lock()
+        # Signalled whenever a refresh finishes, successful or not
+        self._refreshed = threading.Condition(self._lock)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._path, "r") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if stored.get("version") == RATES_VERSION and stored.get("base") == BASE_CURRENCY:
+            self._rates = stored.get("rates", {})
+            self._fetched_at = stored.get("fetched_at", 0.0)
+
+    @property
+    def fetched_at(self) -> float:
+        """Unix time the current table was downloaded; 0 when there is none."""
+        return self._fetched_at
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self._fetched_at > TTL_SECONDS
+
+    def rate(self, from_code: str, to_code: str) -> Tuple[float, bool]:
+        """
+        Return (rate, stale): how many to_code one from_code buys, and whether
+        that comes from a table past its TTL. Only blocks, on a worker
+        thread, when no table has ever been downloaded; raises ValueError for
+        unknown currencies or when no rates are available at all.
+        """
+        from_lower = from_code.lower()
+        to_lower = to_code.lower()
+
+        if not self._rates:
+            # Nothing to serve yet, so the first download has to be waited for
+            self._wait_for_rates()
+            if not self._rates:
+                raise ValueError("Currency rates are unavailable")
+        elif self.is_stale():
+            self.refresh_in_background()
+
+        rates = self._rates
+        if from_lower not in rates:
+            raise ValueError(f"Unknown currency '{from_code}'")
+        if to_lower not in rates:
+            raise ValueError(f"Unknown currency '{to_code}'")
+        return rates[to_lower] / rates[from_lower], self.is_stale()
+
+    def refresh_in_background(self):
+        """Download a new table on a worker thread unless backing off or already refreshing."""
+        with self._lock:
+            if self._refreshing or time.time() < self._retry_at:
+                return
+            self._refreshing = True
+        GLib.Thread.new("currency-rates", self._refresh_worker, None)
+
+    def _refresh_worker(self, _data=None):
+        try:
+            self._fetch()
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._refreshed.notify_all()
+
+    def _wait_for_rates(self):
+        """Start or join a download and wait for it; never blocks the main loop."""
+        self.refresh_in_background()
+        if threading.current_thread() is threading.main_thread():
+            return
+        with self._lock:
+            self._refreshed.wait_for(
+                lambda: self._rates or not self._refreshing,
+                timeout=REQUEST_TIMEOUT_SECONDS + 1,
+            )
+
+    def _fetch(self):
+        url = RATES_URL.format(base=BASE_CURRENCY)
+        try:
+            resp = requests.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+            resp.raise_for_status()
+            rates = {
+                code: float(entry["rate"])
+                for code, entry in resp.json().items()
+                if entry.get("rate")
+            }
+        except (requests.RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+            with self._lock:
+                self._retry_at = time.time() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, RETRY_MAX_SECONDS)
+            logger.warning(f"[CurrencyRates] Refresh failed, retrying later: {e}")
+            return
+
+        rates[BASE_CURRENCY] = 1.0
+        fetched_at = time.time()
+        with self._lock:
+            # Swapped in whole so readers never see a half-updated table
+            self._rates = rates
+            self._fetched_at = fetched_at
+            self._retry_at = 0.0
+            self._retry_delay = RETRY_MIN_SECONDS
+        self._write(rates, fetched_at)
+
+    def _write(self, rates: Dict[str, float], fetched_at: float):
+        payload = json.dumps(
+            {
+                "version": RATES_VERSION,
+                "base": BASE_CURRENCY,
+                "fetched_at": fetched_at,
+                "rates": rates,
+            },
+            separators=(",", ":"),
+        )
+        tmp_path = f"{self._path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"[CurrencyRates] Could not write {self._path}: {e}")
+
+
+# Singleton accessor
+_currency_rate_store_instance = None
+
+
+def get_currency_rate_store() -> CurrencyRateStore:
+    """Get the global CurrencyRateStore instance."""
+    global _currency_rate_store_instance
+    if _currency_rate_store_instance is None:
+        _currency_rate_store_instance = CurrencyRateStore()
+    return _currency_rate_store_instance
@@ -0,0 +1,136 @@
+"""
+Persistent frecency (frequency + recency) store.
+
+Every key keeps a use count and an exponentially decayed score. The score
+is stored as log2 of the sum of 2^(t / half-life) over all uses, so an
+update only needs the previous value and no timestamps are kept. The
+whole store is one small JSON file that is loaded eagerly and written
+behind a debounce on a worker thread.
+"""
+
+import json
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from gi.repository import GLib
+from loguru import logger
+
+import config.data as data
+
+FRECENCY_FILE = os.path.join(data.CACHE_DIR, "frecency.json")
+FRECENCY_VERSION = 1
+
+# A use loses half of its weight after this many seconds
+HALF_LIFE_SECONDS = 3 * 24 * 3600
+# Entries kept per namespace; the weakest are dropped beyond this
+MAX_ENTRIES = 500
+SAVE_DELAY_MS = 1000
+
+# Namespaces used across the shell
+APPS = "apps"
+EMOJI = "emoji"
+CLIPBOARD = "clipboard"
+
+
+def _log2_add(a: float, b: float) -> float:
+    """Return log2(2^a + 2^b) without overflowing."""
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+class FrecencyStore:
+    def __init__(self, path: str = FRECENCY_FILE):
+        self._path = path
+        # namespace -> key -> [count, log2 decayed score]
+        self._entries: Dict[str, Dict[str, list]] = {}
+        self._save_id: Optional[int] = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._path, "r") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if stored.get("version") == FRECENCY_VERSION:
+            self._entries = stored.get("entries", {})
+
+    def record(self, namespace: str, key: str, now: Optional[float] = None):
+        """Register one use of key and schedule a write."""
+        if not key:
+            return
+        now = time.time() if now is None else now
+        entries = self._entries.setdefault(namespace, {})
+        weight = now / HALF_LIFE_SECONDS
+        entry = entries.get(key)
+        if entry is None:
+            entries[key] = [1, weight]
+        else:
+            entry[0] += 1
+            entry[1] = _log2_add(entry[1], weight)
+        if len(entries) > MAX_ENTRIES:
+            weakest = min(entries, key=lambda k: entries[k][1])
+            del entries[weakest]
+        self._schedule_save()
+
+    def forget(self, namespace: str, key: str):
+        if self._entries.get(namespace, {}).pop(key, None) is not None:
+            self._schedule_save()
+
+    def score(self, namespace: str, key: str, now: Optional[float] = None) -> float:
+        """Decayed use count of key; 0 for keys never used."""
+        entry = self._entries.get(namespace, {}).get(key)
+        if entry is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return 2 ** (entry[1] - now / HALF_LIFE_SECONDS)
+
+    def scores(self, namespace: str, now: Optional[float] = None) -> Dict[str, float]:
+        """Decayed use counts of every key in the namespace."""
+        now = time.time() if now is None else now
+        offset = now / HALF_LIFE_SECONDS
+        return {
+            key: 2 ** (entry[1] - offset)
+            for key, entry in self._entries.get(namespace, {}).items()
+        }
+
+    def count(self, namespace: str, key: str) -> int:
+        entry = self._entries.get(namespace, {}).get(key)
+        return entry[0] if entry else 0
+
+    def _schedule_save(self):
+        if self._save_id is None:
+            self._save_id = GLib.timeout_add(SAVE_DELAY_MS, self._save)
+
+    def _save(self):
+        self._save_id = None
+        payload = json.dumps(
+            {"version": FRECENCY_VERSION, "entries": self._entries},
+            separators=(",", ":"),
+        )
+        GLib.Thread.new("frecency-save", self._write, payload)
+        return False
+
+    def _write(self, payload: str):
+        tmp_path = f"{self._path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"[Frecency] Could not write {self._path}: {e}")
+
+
+# Singleton accessor
+_frecency_store_instance = None
+
+
+def get_frecency_store() -> FrecencyStore:
+    """Get the global FrecencyStore instance."""
+    global _frecency_store_instance
+    if _frecency_store_instance is None:
+        _frecency_store_instance = FrecencyStore()
+    return _frecency_store_instance
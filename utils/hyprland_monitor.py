@@ -1,4 +1,3 @@
-import json
 from typing import Dict
 
 import gi
@@ -10,6 +9,8 @@ from fabric.hyprland import Hyprland
 gi.require_version("Gdk", "3.0")
 from gi.repository import Gdk
 
+from services.hyprland_state import get_hyprland_state
+
 
 # IDC,  Gdk.Screen.get_monitor_plug_name is deprecated
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -35,8 +36,9 @@ class HyprlandWithMonitors(Hyprland):
         super().__init__(commands_only, **kwargs)
 
     # Add new arguments
+    # Monitor data comes from the shared state cache, not socket round trips
     def get_all_monitors(self) -> Dict:
-        monitors = json.loads(self.send_command("j/monitors").reply)
+        monitors = get_hyprland_state().get_monitors()
         return {monitor["id"]: monitor["name"] for monitor in monitors}
 
     def get_gdk_monitor_id_from_name(self, plug_name: str) -> int | None:
@@ -52,5 +54,7 @@ class HyprlandWithMonitors(Hyprland):
         return None
 
     def get_current_gdk_monitor_id(self) -> int | None:
-        active_workspace = json.loads(self.send_command("j/activeworkspace").reply)
-        return self.get_gdk_monitor_id_from_name(active_workspace["monitor"])
+        focused_monitor = get_hyprland_state().get_focused_monitor()
+        if focused_monitor is None:
+            return None
+        return self.get_gdk_monitor_id_from_name(focused_monitor["name"])
@@ -1,11 +1,12 @@
 import json
 import os
 import re
+from collections import OrderedDict
 
 import gi
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import GLib, Gtk
+from gi.repository import GdkPixbuf, GLib, Gtk
 from loguru import logger
 
 import config.data as data
@@ -14,20 +15,109 @@ ICON_CACHE_FILE = data.CACHE_DIR + "/icons.json"
 if not os.path.exists(data.CACHE_DIR):
     os.makedirs(data.CACHE_DIR)
 
+# Delay before new app id -> icon name entries are written to disk
+ICON_CACHE_SAVE_DELAY_MS = 2000
+# Maximum number of (icon_name, size, scale) pixbufs kept in memory
+PIXBUF_CACHE_SIZE = 256
+
+_TOKEN_SPLIT = re.compile(r"-|\.|_|\s")
+_MISSING = object()
+
+
+class _DesktopFileIndex:
+    """Token index over the .desktop file names of the XDG application dirs."""
+
+    def __init__(self):
+        self._dir_mtimes = {}
+        self._files = []  # (lowercase name, full path), in XDG precedence order
+        self._by_stem = {}
+        self._by_token = {}
+
+    @staticmethod
+    def _app_dirs():
+        data_dirs = [GLib.get_user_data_dir(), *GLib.get_system_data_dirs()]
+        return [os.path.join(data_dir, "applications") for data_dir in data_dirs]
+
+    def _current_mtimes(self):
+        mtimes = {}
+        for app_dir in self._app_dirs():
+            try:
+                mtimes[app_dir] = os.stat(app_dir).st_mtime
+            except OSError:
+                continue
+        return mtimes
+
+    def _ensure_fresh(self):
+        mtimes = self._current_mtimes()
+        if mtimes == self._dir_mtimes:
+            return
+        self._dir_mtimes = mtimes
+        self._files = []
+        self._by_stem = {}
+        self._by_token = {}
+        for app_dir in mtimes:
+            try:
+                names = sorted(os.listdir(app_dir))
+            except OSError:
+                continue
+            for name in names:
+                if not name.endswith(".desktop"):
+                    continue
+                lowered = name.lower()
+                path = os.path.join(app_dir, name)
+                self._files.append((lowered, path))
+                stem = lowered[: -len(".desktop")]
+                self._by_stem.setdefault(stem, path)
+                for token in filter(None, _TOKEN_SPLIT.split(stem)):
+                    self._by_token.setdefault(token, path)
+
+    def find(self, app_id: str) -> str | None:
+        self._ensure_fresh()
+        joined = "".join(app_id.lower().split())
+        if joined in self._by_stem:
+            return self._by_stem[joined]
+        if joined in self._by_token:
+            return self._by_token[joined]
+        # Substring matches are rare; scan the in-memory name list only
+        for name, path in self._files:
+            if joined in name:
+                return path
+        for word in filter(None, _TOKEN_SPLIT.split(app_id.lower())):
+            if word in self._by_token:
+                return self._by_token[word]
+            for name, path in self._files:
+                if word in name:
+                    return path
+        return None
+
 
 class IconResolver:
+    # Shared by every resolver instance (notch, dock, overview)
+    _icon_dict = None
+    _desktop_index = _DesktopFileIndex()
+    _pixbuf_cache: "OrderedDict[tuple, object]" = OrderedDict()
+    _save_timeout_id = None
+    _theme_handler_id = None
+
     def __init__(self, default_applicaiton_icon: str = "application-x-executable-symbolic"):
+        if IconResolver._icon_dict is None:
+            IconResolver._icon_dict = self._load_icon_dict()
+        if IconResolver._theme_handler_id is None:
+            IconResolver._theme_handler_id = Gtk.IconTheme.get_default().connect(
+                "changed", lambda *_: IconResolver._pixbuf_cache.clear()
+            )
+
+        self.default_applicaiton_icon = default_applicaiton_icon
+
+    @staticmethod
+    def _load_icon_dict():
         if os.path.exists(ICON_CACHE_FILE):
             with open(ICON_CACHE_FILE) as f:
                 try:
-                    self._icon_dict = json.load(f)
+                    return json.load(f)
                 except json.JSONDecodeError:
                     logger.info("[ICONS] Cache file does not exist or is corrupted")
-                    self._icon_dict = {}
-        else:
-            self._icon_dict = {}
-
-        self.default_applicaiton_icon = default_applicaiton_icon
+        return {}
 
     def get_icon_name(self, app_id: str):
         if app_id in self._icon_dict:
@@ -39,31 +129,65 @@ class IconResolver:
         self._store_new_icon(app_id, new_icon)
         return new_icon
 
-    def get_icon_pixbuf(self, app_id: str, size: int = 16):
-        icon_theme = Gtk.IconTheme.get_default()
+    def get_icon_pixbuf(self, app_id: str, size: int = 16, scale: int = 1):
         icon_name = self.get_icon_name(app_id)
-        try:
-            # Try to load the resolved icon.
-            return icon_theme.load_icon(icon_name, size, Gtk.IconLookupFlags.FORCE_SIZE)
-        except GLib.Error as primary_error:
-            logger.warning(
-                f"Warning: Icon '{icon_name}' not found in theme. Error: {primary_error}"
+        pixbuf = self.load_icon(icon_name, size, scale)
+        if pixbuf is not None:
+            return pixbuf
+        logger.warning(f"Warning: Icon '{icon_name}' not found in theme.")
+        # Fallback to the default application icon.
+        pixbuf = self.load_icon(self.default_applicaiton_icon, size, scale)
+        if pixbuf is None:
+            logger.error(
+                f"Error: Fallback icon '{self.default_applicaiton_icon}' also not found."
             )
-            try:
-                # Fallback to the default application icon.
-                return icon_theme.load_icon(
-                    self.default_applicaiton_icon, size, Gtk.IconLookupFlags.FORCE_SIZE
+        return pixbuf
+
+    @classmethod
+    def load_icon(cls, icon_name: str, size: int, scale: int = 1):
+        """Load an icon through the shared LRU. Returns None if it cannot be loaded."""
+        key = (icon_name, size, scale)
+        cache = cls._pixbuf_cache
+        if key in cache:
+            cache.move_to_end(key)
+            pixbuf = cache[key]
+            return None if pixbuf is _MISSING else pixbuf
+
+        try:
+            if os.path.isabs(icon_name):
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(
+                    icon_name, size * scale, size * scale
                 )
-            except GLib.Error as fallback_error:
-                logger.error(
-                    f"Error: Fallback icon '{self.default_applicaiton_icon}' also not found. Error: {fallback_error}"
+            else:
+                pixbuf = Gtk.IconTheme.get_default().load_icon_for_scale(
+                    icon_name, size, scale, Gtk.IconLookupFlags.FORCE_SIZE
                 )
-                return None
+        except GLib.Error:
+            pixbuf = None
+
+        cache[key] = _MISSING if pixbuf is None else pixbuf
+        while len(cache) > PIXBUF_CACHE_SIZE:
+            cache.popitem(last=False)
+        return pixbuf
 
     def _store_new_icon(self, app_id: str, icon: str):
         self._icon_dict[app_id] = icon
-        with open(ICON_CACHE_FILE, "w") as f:
-            json.dump(self._icon_dict, f)
+        if IconResolver._save_timeout_id is None:
+            IconResolver._save_timeout_id = GLib.timeout_add(
+                ICON_CACHE_SAVE_DELAY_MS, IconResolver._save_icon_dict
+            )
+
+    @classmethod
+    def _save_icon_dict(cls):
+        cls._save_timeout_id = None
+        tmp_path = ICON_CACHE_FILE + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(cls._icon_dict, f)
+            os.replace(tmp_path, ICON_CACHE_FILE)
+        except OSError as e:
+            logger.warning(f"[ICONS] Could not write icon cache: {e}")
+        return False
 
     def _get_icon_from_desktop_file(self, desktop_file_path: str):
         # Retrieve the icon specified in the [Desktop Entry] section.
@@ -74,19 +198,7 @@ class IconResolver:
             return self.default_applicaiton_icon
 
     def _get_desktop_file(self, app_id: str) -> str | None:
-        data_dirs = GLib.get_system_data_dirs()
-        for data_dir in data_dirs:
-            data_dir = os.path.join(data_dir, "applications")
-            if os.path.exists(data_dir):
-                files = os.listdir(data_dir)
-                matching = [s for s in files if "".join(app_id.lower().split()) in s.lower()]
-                if matching:
-                    return os.path.join(data_dir, matching[0])
-                for word in list(filter(None, re.split(r"-|\.|_|\s", app_id))):
-                    matching = [s for s in files if word.lower() in s.lower()]
-                    if matching:
-                        return os.path.join(data_dir, matching[0])
-        return None
+        return self._desktop_index.find(app_id)
 
     def _compositor_find_icon(self, app_id: str):
         icon_theme = Gtk.IconTheme.get_default()
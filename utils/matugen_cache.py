@@ -0,0 +1,218 @@
+"""
+Cache of matugen's generated color files.
+
+`matugen image` analyses the whole wallpaper and renders every template on
+each run. Its outputs only depend on the image content, the scheme, and
+the matugen config with its templates, so after a first run they are
+copied into the cache dir under a key made from those three hashes.
+Applying the same wallpaper and scheme again then only copies the files
+back, runs the templates' post hooks and sets the wallpaper the way
+matugen would have. Apps that watch their color files (Hyprland's sourced
+colors.conf) or have a post hook (the shell's CSS) pick the change up.
+
+Configs whose output paths are templated themselves cannot be captured
+this way; for those every apply simply runs matugen.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import toml
+from gi.repository import GLib
+from loguru import logger
+
+import config.data as data
+
+MATUGEN_CACHE_DIR = os.path.join(data.CACHE_DIR, "matugen")
+MATUGEN_CONFIG_FILE = os.path.expanduser("~/.config/matugen/config.toml")
+CACHE_VERSION = 1
+# Each entry is a few KiB; beyond this the least recently applied go
+MAX_ENTRIES = 200
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MatugenConfig:
+    """The parts of matugen's config.toml a cache hit has to reproduce."""
+
+    def __init__(self, path: str = MATUGEN_CONFIG_FILE):
+        with open(path, "rb") as f:
+            raw = f.read()
+        parsed = toml.loads(raw.decode("utf-8"))
+
+        digest = hashlib.sha1(raw)
+        # name -> (output path, post hook)
+        self.templates: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.cacheable = True
+        for name, template in sorted(parsed.get("templates", {}).items()):
+            output_path = template.get("output_path", "")
+            post_hook = template.get("post_hook")
+            # Templated paths and hooks depend on the colors matugen renders;
+            # a cache hit could not reproduce them
+            if not output_path or "{{" in output_path or (post_hook and "{{" in post_hook):
+                self.cacheable = False
+            self.templates[name] = (os.path.expanduser(output_path), post_hook)
+            # Editing a template has to invalidate its cached output too
+            input_path = os.path.expanduser(template.get("input_path", ""))
+            try:
+                digest.update(_hash_file(input_path).encode())
+            except OSError:
+                digest.update(b"-")
+        self.hash = digest.hexdigest()
+
+        wallpaper = parsed.get("config", {}).get("wallpaper", {})
+        self.wallpaper_command: Optional[List[str]] = None
+        if wallpaper.get("set", True) and wallpaper.get("command"):
+            self.wallpaper_command = [wallpaper["command"], *wallpaper.get("arguments", [])]
+
+
+class MatugenCache:
+    def __init__(self, cache_dir: str = MATUGEN_CACHE_DIR):
+        self._dir = cache_dir
+        # (path, size, mtime_ns) -> content hash, so unchanged wallpapers are read once
+        self._content_hashes: Dict[Tuple[str, int, int], str] = {}
+        # Held for a whole apply, matugen run included
+        self._run_lock = threading.Lock()
+        # Only the latest request is worth applying once the worker gets to it
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        os.makedirs(self._dir, exist_ok=True)
+
+    def apply_image(self, image_path: str, scheme: str):
+        """Theme the desktop from image_path like `matugen image -t scheme`, in the background."""
+        with self._generation_lock:
+            self._generation += 1
+            generation = self._generation
+        GLib.Thread.new("matugen", self._apply_worker, (image_path, scheme, generation))
+
+    def _apply_worker(self, args):
+        image_path, scheme, generation = args
+        with self._run_lock:
+            with self._generation_lock:
+                if generation != self._generation:
+                    return
+            try:
+                config = MatugenConfig()
+            except (OSError, ValueError, toml.TomlDecodeError) as e:
+                logger.warning(f"[MatugenCache] Could not read {MATUGEN_CONFIG_FILE}: {e}")
+                config = None
+
+            key = None
+            if config is not None and config.cacheable:
+                try:
+                    key = self._key(image_path, scheme, config)
+                except OSError as e:
+                    logger.warning(f"[MatugenCache] Could not hash {image_path}: {e}")
+
+            if key is not None and self._restore(key, image_path, config):
+                return
+            if self._run_matugen(image_path, scheme) and key is not None:
+                self._capture(key, config)
+
+    def _key(self, image_path: str, scheme: str, config: MatugenConfig) -> str:
+        real_path = os.path.realpath(image_path)
+        st = os.stat(real_path)
+        stat_key = (real_path, st.st_size, st.st_mtime_ns)
+        content_hash = self._content_hashes.get(stat_key)
+        if content_hash is None:
+            content_hash = _hash_file(real_path)
+            self._content_hashes[stat_key] = content_hash
+        return hashlib.sha1(
+            f"{CACHE_VERSION}\0{content_hash}\0{scheme}\0{config.hash}".encode()
+        ).hexdigest()
+
+    def _run_matugen(self, image_path: str, scheme: str) -> bool:
+        try:
+            subprocess.run(
+                ["matugen", "image", image_path, "-t", scheme],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            return True
+        except FileNotFoundError:
+            print("Error: matugen command not found. Please install matugen.")
+        except subprocess.CalledProcessError as e:
+            print(f"Error running matugen: {e.stderr.decode(errors='replace').strip()}")
+        return False
+
+    def _capture(self, key: str, config: MatugenConfig):
+        entry_dir = os.path.join(self._dir, key)
+        tmp_dir = f"{entry_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            os.makedirs(tmp_dir)
+            for name, (output_path, _) in config.templates.items():
+                shutil.copyfile(output_path, os.path.join(tmp_dir, name))
+            with open(os.path.join(tmp_dir, "entry.json"), "w") as f:
+                json.dump({"version": CACHE_VERSION, "templates": sorted(config.templates)}, f)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning(f"[MatugenCache] Could not cache matugen output: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self._prune()
+
+    def _restore(self, key: str, image_path: str, config: MatugenConfig) -> bool:
+        entry_dir = os.path.join(self._dir, key)
+        try:
+            with open(os.path.join(entry_dir, "entry.json"), "r") as f:
+                entry = json.load(f)
+            if entry.get("version") != CACHE_VERSION or entry.get("templates") != sorted(config.templates):
+                return False
+            for name, (output_path, _) in config.templates.items():
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                tmp_path = f"{output_path}.tmp"
+                shutil.copyfile(os.path.join(entry_dir, name), tmp_path)
+                # Replaced whole so watchers never read a half-written file
+                os.replace(tmp_path, output_path)
+            # Marks the entry as recently used for pruning
+            os.utime(entry_dir)
+        except (OSError, ValueError):
+            return False
+
+        if config.wallpaper_command:
+            try:
+                subprocess.Popen([*config.wallpaper_command, image_path])
+            except OSError as e:
+                logger.warning(f"[MatugenCache] Could not set wallpaper: {e}")
+        for _, post_hook in config.templates.values():
+            if post_hook:
+                subprocess.Popen(post_hook, shell=True)
+        return True
+
+    def _prune(self):
+        try:
+            with os.scandir(self._dir) as it:
+                entries = [e for e in it if e.is_dir() and not e.name.endswith(".tmp")]
+        except OSError:
+            return
+        if len(entries) <= MAX_ENTRIES:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[: len(entries) - MAX_ENTRIES]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# Singleton accessor
+_matugen_cache_instance = None
+
+
+def get_matugen_cache() -> MatugenCache:
+    """Get the global MatugenCache instance."""
+    global _matugen_cache_instance
+    if _matugen_cache_instance is None:
+        _matugen_cache_instance = MatugenCache()
+    return _matugen_cache_instance
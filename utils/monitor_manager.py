@@ -1,5 +1,4 @@
 import json
-import subprocess
 from typing import Dict, List, Optional, Tuple
 
 import gi
@@ -7,6 +6,8 @@ import gi
 gi.require_version("Gdk", "3.0")
 from gi.repository import Gdk
 
+from services.hyprland_commands import get_hyprland_commands
+
 
 class Signal:
     """Simple signal implementation for monitor manager."""
@@ -103,14 +104,9 @@ class MonitorManager:
         self._monitors = []
         
         try:
-            # Try Hyprland first for primary info (more accurate)
-            result = subprocess.run(
-                ["hyprctl", "monitors", "-j"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            hypr_monitors = json.loads(result.stdout)
+            # Try Hyprland first for primary info (more accurate). This runs
+            # before the main loop starts, so it is the one blocking query.
+            hypr_monitors = json.loads(get_hyprland_commands().send_sync("j/monitors"))
             
             for i, monitor in enumerate(hypr_monitors):
                 monitor_name = monitor.get('name', f'monitor-{i}')
@@ -134,7 +130,7 @@ class MonitorManager:
                     self._notch_states[i] = False
                     self._current_notch_module[i] = None
                     
-        except (subprocess.CalledProcessError, json.JSONDecodeError, FileNotFoundError):
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
             # Fallback to GTK only if Hyprland fails
             self._fallback_to_gtk()
         
@@ -0,0 +1,147 @@
+"""
+Deduplicated store for the images of notification history entries.
+
+Images are scaled to the size history shows them at and named after a
+hash of their pixels, so an app sending the same avatar hundreds of times
+stores it once. Each history entry holds a reference; an image is deleted
+when its last entry goes, and the underlying ThumbnailCache caps the total
+size least-recently-used first. PNG encoding and the disk sweeps happen in
+order on one writer thread; until an image is written the pixbuf is served
+from memory.
+"""
+
+import atexit
+import hashlib
+import os
+import queue
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+
+from gi.repository import GdkPixbuf, GLib
+from loguru import logger
+
+from utils.thumbnail_cache import ThumbnailCache
+
+IMAGE_SIZE = 48
+IMAGE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def pixel_key(pixbuf: GdkPixbuf.Pixbuf) -> str:
+    """Content key of a pixbuf: a hash of its geometry and pixel data."""
+    digest = hashlib.sha1(
+        f"{pixbuf.get_width()}x{pixbuf.get_height()}:{pixbuf.get_rowstride()}:"
+        f"{int(pixbuf.get_has_alpha())}:".encode()
+    )
+    digest.update(pixbuf.read_pixel_bytes().get_data())
+    return digest.hexdigest()
+
+
+class NotificationImageCache:
+    def __init__(self):
+        self._cache = ThumbnailCache("notifications", IMAGE_CACHE_BYTES)
+        self._refs: Counter = Counter()
+        # key -> pixbuf still being written
+        self._pending: Dict[str, GdkPixbuf.Pixbuf] = {}
+        self._lock = threading.Lock()
+        # One writer thread, so a sweep never runs ahead of the writes queued before it
+        self._jobs: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue()
+        self._writer_thread = GLib.Thread.new("notification-images", self._writer, None)
+        atexit.register(self.close)
+
+    def add(self, pixbuf: GdkPixbuf.Pixbuf) -> str:
+        """Take a reference on the image of pixbuf, storing it if new; returns its key."""
+        scaled = pixbuf.scale_simple(IMAGE_SIZE, IMAGE_SIZE, GdkPixbuf.InterpType.BILINEAR)
+        key = pixel_key(scaled)
+        self._refs[key] += 1
+        with self._lock:
+            if key in self._pending:
+                return key
+            if self._cache.lookup(key) is not None:
+                return key
+            self._pending[key] = scaled
+        self._jobs.put(lambda: self._write(key, scaled))
+        return key
+
+    def _writer(self, _data):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                job()
+            except Exception as e:
+                logger.warning(f"[NotificationImageCache] Background job failed: {e}")
+
+    def _write(self, key: str, scaled: GdkPixbuf.Pixbuf):
+        self._cache.store(key, scaled)
+        with self._lock:
+            self._pending.pop(key, None)
+        # Released while it was being written
+        if key not in self._refs:
+            self._cache.discard(key)
+
+    def retain(self, key: Optional[str]):
+        """Take a reference on an already stored image, e.g. for entries loaded from disk."""
+        if key:
+            self._refs[key] += 1
+
+    def release(self, key: Optional[str]):
+        """Drop a reference; the image is deleted with its last one."""
+        if not key or key not in self._refs:
+            return
+        self._refs[key] -= 1
+        if self._refs[key] <= 0:
+            del self._refs[key]
+            self._cache.discard(key)
+
+    def load(self, key: Optional[str]) -> Optional[GdkPixbuf.Pixbuf]:
+        if not key:
+            return None
+        with self._lock:
+            pixbuf = self._pending.get(key)
+        if pixbuf is not None:
+            return pixbuf
+        return self._cache.load(key)
+
+    def collect(self, live_keys: Iterable[str]):
+        """Delete images no entry refers to anymore; scans the cache dir, so runs on the writer thread."""
+        # Images still being written or referenced since are live too
+        keys = set(live_keys) | set(self._refs)
+        with self._lock:
+            keys.update(self._pending)
+        self._jobs.put(lambda: self._cache.retain(keys))
+
+    def sweep_legacy(self, directory: str, referenced: Iterable[str]):
+        """
+        Delete the notification_<uuid>.png files entries used to own, except
+        the referenced paths, on the writer thread.
+        """
+        keep = set(referenced)
+
+        def sweep():
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                return
+            removed = 0
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.startswith("notification_") and name.endswith(".png") and path not in keep:
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except OSError as e:
+                        logger.warning(f"[NotificationImageCache] Could not delete {path}: {e}")
+            if removed:
+                logger.info(f"[NotificationImageCache] Deleted {removed} orphaned legacy images")
+
+        self._jobs.put(sweep)
+
+    def close(self):
+        """Finish the queued writes; called at exit."""
+        if self._writer_thread is None:
+            return
+        self._jobs.put(None)
+        self._writer_thread.join()
+        self._writer_thread = None
@@ -0,0 +1,114 @@
+"""
+Building blocks for taking in notifications without letting a flood of
+them take the shell down.
+
+AppRateLimiter decides per app whether a notification still gets a popup
+of its own or is folded into that app's grouped popup. ExpiryScheduler
+runs every popup's timeout from a single GLib timer, so the number of
+popups does not multiply timer sources, and pausing or restarting them on
+hover is one call.
+
+All of it is meant for the main loop.
+"""
+
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from gi.repository import GLib
+
+# An app may show this many popups at once...
+RATE_BURST = 4
+# ...and then one more per this many seconds; beyond that it is grouped
+RATE_INTERVAL_SECONDS = 1.0
+
+
+class AppRateLimiter:
+    """Token bucket per app name."""
+
+    def __init__(self, burst: int = RATE_BURST, interval: float = RATE_INTERVAL_SECONDS):
+        self._burst = burst
+        self._interval = interval
+        # app name -> (tokens, time they were counted at)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def allow(self, app_name: str) -> bool:
+        """Take a token for app_name; False once the app is over its rate."""
+        now = time.monotonic()
+        tokens, then = self._buckets.get(app_name, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - then) / self._interval)
+        if tokens < 1:
+            self._buckets[app_name] = (tokens, now)
+            return False
+        self._buckets[app_name] = (tokens - 1, now)
+        return True
+
+
+class ExpiryScheduler:
+    """Calls back per key once its timeout runs out, all from one GLib timer."""
+
+    def __init__(self):
+        # key -> (deadline in monotonic µs, timeout in ms, callback)
+        self._entries: Dict[Hashable, Tuple[int, int, Callable[[], None]]] = {}
+        self._source_id: Optional[int] = None
+        self._armed_deadline = 0
+        self._paused = False
+
+    def schedule(self, key: Hashable, timeout_ms: int, callback: Callable[[], None]):
+        """(Re)start the timeout of key."""
+        deadline = GLib.get_monotonic_time() + timeout_ms * 1000
+        self._entries[key] = (deadline, timeout_ms, callback)
+        self._rearm()
+
+    def cancel(self, key: Hashable):
+        # The timer is left armed; firing early with nothing due just rearms it
+        self._entries.pop(key, None)
+
+    def pause(self):
+        """Hold every timeout, e.g. while the popups are hovered."""
+        self._paused = True
+        self._disarm()
+
+    def resume(self):
+        """Restart every timeout from its full length."""
+        self._paused = False
+        now = GLib.get_monotonic_time()
+        for key, (_, timeout_ms, callback) in list(self._entries.items()):
+            self._entries[key] = (now + timeout_ms * 1000, timeout_ms, callback)
+        self._rearm()
+
+    def clear(self):
+        """Forget every timeout and any pause."""
+        self._entries.clear()
+        self._paused = False
+        self._disarm()
+
+    def _disarm(self):
+        if self._source_id is not None:
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+
+    def _rearm(self):
+        if self._paused or not self._entries:
+            self._disarm()
+            return
+        deadline = min(entry[0] for entry in self._entries.values())
+        if self._source_id is not None and self._armed_deadline <= deadline:
+            return
+        self._disarm()
+        delay_ms = max(0, (deadline - GLib.get_monotonic_time() + 999) // 1000)
+        self._armed_deadline = deadline
+        self._source_id = GLib.timeout_add(delay_ms, self._fire)
+
+    def _fire(self):
+        self._source_id = None
+        now = GLib.get_monotonic_time()
+        due = [key for key, entry in self._entries.items() if entry[0] <= now]
+        for key in due:
+            # A callback may have cancelled or restarted another due key
+            entry = self._entries.get(key)
+            if entry is None or entry[0] > now:
+                continue
+            del self._entries[key]
+            entry[2]()
+        self._rearm()
+        return False
@@ -0,0 +1,128 @@
+"""
+In-memory search over notification history.
+
+Every entry's summary, body and app name are split into lowercase word
+tokens, which map to the ids of the entries containing them. Entries are
+added and removed one at a time as history changes, so the index never
+needs rebuilding. The distinct tokens are also kept sorted, so each query
+word matches tokens by prefix ("2f" finds "2fa") with a binary search
+instead of a scan; an entry matches when it has every query word.
+"""
+
+import bisect
+import html
+import re
+from typing import Dict, List, Optional, Sequence, Set
+
+from gi.repository import GLib
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_TOKEN_RE = re.compile(r"\w+")
+SEARCHED_FIELDS = ("summary", "body", "app_name")
+
+
+def plain_text(markup: Optional[str]) -> str:
+    """Notification text without its (Pango) markup."""
+    return html.unescape(_TAG_RE.sub("", markup or ""))
+
+
+def search_terms(query: str) -> List[str]:
+    return _TOKEN_RE.findall(query.lower())
+
+
+def highlight_markup(markup: Optional[str], terms: Sequence[str]) -> str:
+    """
+    Markup for a notification text with the words matching terms
+    highlighted. The text's own markup is dropped, as matches could
+    straddle it.
+    """
+    if not terms:
+        return markup or ""
+    text = plain_text(markup)
+    parts = []
+    last = 0
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group().lower()
+        length = max((len(term) for term in terms if word.startswith(term)), default=0)
+        if not length:
+            continue
+        start = match.start()
+        parts.append(GLib.markup_escape_text(text[last:start]))
+        parts.append(
+            '<span underline="single" weight="bold">'
+            f"{GLib.markup_escape_text(text[start:start + length])}</span>"
+        )
+        last = start + length
+    parts.append(GLib.markup_escape_text(text[last:]))
+    return "".join(parts)
+
+
+class NotificationSearchIndex:
+    def __init__(self):
+        # token -> ids of the entries containing it
+        self._postings: Dict[str, Set[str]] = {}
+        # id -> tokens of that entry, to take it out again
+        self._tokens: Dict[str, Set[str]] = {}
+        # Distinct tokens, sorted for prefix lookups
+        self._sorted_tokens: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def add(self, note: dict):
+        note_id = str(note["id"])
+        self.remove(note_id)
+        tokens = set()
+        for field in SEARCHED_FIELDS:
+            tokens.update(search_terms(plain_text(note.get(field))))
+        self._tokens[note_id] = tokens
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                bisect.insort(self._sorted_tokens, token)
+            ids.add(note_id)
+
+    def remove(self, note_id):
+        tokens = self._tokens.pop(str(note_id), None)
+        if not tokens:
+            return
+        for token in tokens:
+            ids = self._postings[token]
+            ids.discard(str(note_id))
+            if not ids:
+                del self._postings[token]
+                i = bisect.bisect_left(self._sorted_tokens, token)
+                del self._sorted_tokens[i]
+
+    def clear(self):
+        self._postings.clear()
+        self._tokens.clear()
+        self._sorted_tokens.clear()
+
+    def matches(self, note_id, terms: Sequence[str]) -> bool:
+        """Whether an indexed entry has every one of terms, e.g. to file a new entry under a running search."""
+        tokens = self._tokens.get(str(note_id), ())
+        return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+    def _prefix_ids(self, prefix: str) -> Set[str]:
+        ids: Set[str] = set()
+        i = bisect.bisect_left(self._sorted_tokens, prefix)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(prefix):
+            ids |= self._postings[self._sorted_tokens[i]]
+            i += 1
+        return ids
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """Ids of the entries matching every word of query; None for a query without words."""
+        terms = search_terms(query)
+        if not terms:
+            return None
+        # Longest terms first: they tend to narrow the most
+        matches: Optional[Set[str]] = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self._prefix_ids(term)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                break
+        return matches
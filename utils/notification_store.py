@@ -0,0 +1,253 @@
+"""
+Journaled notification history.
+
+History entries are kept in memory, oldest first, with an index per app,
+and persisted as a JSON Lines journal: every change is one appended line
+("add", "delete", "delete_app" or "clear"), so a burst of notifications
+costs a few appends rather than one full rewrite each. Appends are
+buffered and written on a worker thread, and flushed when the process
+exits. Once the journal holds more dead
+lines than live entries it is compacted, i.e. rewritten with just the live
+entries. Entries past the retention limit are dropped oldest first.
+
+All methods are meant to be called from the main loop.
+"""
+
+import atexit
+import json
+import os
+import queue
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from gi.repository import GLib
+from loguru import logger
+
+FLUSH_DELAY_MS = 500
+# Compaction is not worth it for small journals
+COMPACT_MIN_LINES = 200
+
+
+class NotificationStore:
+    def __init__(self, path: str, limit: int, legacy_path: Optional[str] = None):
+        self._path = path
+        self._limit = max(1, limit)
+        # id -> note dict, oldest first
+        self._notes: "OrderedDict[str, dict]" = OrderedDict()
+        # app name -> ids of that app's notes, oldest first
+        self._by_app: Dict[str, "OrderedDict[str, None]"] = {}
+        self._journal_lines = 0
+        self._pending: List[str] = []
+        self._compact_payload: Optional[str] = None
+        self._flush_id: Optional[int] = None
+        # One writer thread, so appends and compactions hit the file in order
+        self._writes: "queue.Queue" = queue.Queue()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._load(legacy_path)
+        self._writer_thread = GLib.Thread.new("notification-journal", self._writer, None)
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load(self, legacy_path: Optional[str]):
+        rewrite = False
+        try:
+            with open(self._path, "r") as f:
+                for line in f:
+                    self._journal_lines += 1
+                    try:
+                        self._replay(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        # A torn last line after a crash; appending after it
+                        # would corrupt the next record too
+                        rewrite = True
+        except FileNotFoundError:
+            if legacy_path:
+                rewrite = self._import_legacy(legacy_path)
+        except OSError as e:
+            logger.error(f"[NotificationStore] Could not read {self._path}: {e}")
+        self._trim()
+        self._maybe_compact(force=rewrite)
+
+    def _replay(self, record: dict):
+        op = record["op"]
+        if op == "add":
+            self._insert(record["note"])
+        elif op == "delete":
+            self._remove(record["id"])
+        elif op == "delete_app":
+            for note_id in list(self._by_app.get(record["app"], ())):
+                self._remove(note_id)
+        elif op == "clear":
+            self._notes.clear()
+            self._by_app.clear()
+
+    def _import_legacy(self, legacy_path: str) -> bool:
+        """Take over the history of the old single-file format, newest first."""
+        try:
+            with open(legacy_path, "r") as f:
+                notes = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for note in reversed(notes):
+            if note.get("id"):
+                self._insert(note)
+        try:
+            os.remove(legacy_path)
+        except OSError:
+            pass
+        return True
+
+    # ------------------------------------------------------------------
+    # In-memory index
+    # ------------------------------------------------------------------
+
+    def _insert(self, note: dict):
+        note_id = str(note["id"])
+        self._remove(note_id)
+        self._notes[note_id] = note
+        self._by_app.setdefault(note.get("app_name") or "", OrderedDict())[note_id] = None
+
+    def _remove(self, note_id: str) -> Optional[dict]:
+        note = self._notes.pop(note_id, None)
+        if note is not None:
+            app = note.get("app_name") or ""
+            ids = self._by_app.get(app)
+            if ids is not None:
+                ids.pop(note_id, None)
+                if not ids:
+                    del self._by_app[app]
+        return note
+
+    def _trim(self) -> List[dict]:
+        evicted = []
+        while len(self._notes) > self._limit:
+            oldest_id = next(iter(self._notes))
+            evicted.append(self._remove(oldest_id))
+        return evicted
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    def __contains__(self, note_id) -> bool:
+        return str(note_id) in self._notes
+
+    def get(self, note_id) -> Optional[dict]:
+        return self._notes.get(str(note_id))
+
+    def iter_newest(self) -> Iterator[dict]:
+        return reversed(self._notes.values())
+
+    def last(self, count: int, offset: int = 0) -> List[dict]:
+        """The count newest notes after skipping offset, newest first."""
+        return list(islice(reversed(self._notes.values()), offset, offset + count))
+
+    def for_app(self, app_name: str, count: Optional[int] = None) -> List[dict]:
+        """An app's notes, newest first, at most count of them."""
+        ids = self._by_app.get(app_name or "", ())
+        return [self._notes[note_id] for note_id in islice(reversed(ids), count)]
+
+    def ids(self) -> List[str]:
+        return list(self._notes)
+
+    # ------------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------------
+
+    def add(self, note: dict) -> List[dict]:
+        """Record a note as the newest entry; returns the old notes dropped to stay within the limit."""
+        self._insert(note)
+        self._append({"op": "add", "note": note})
+        evicted = self._trim()
+        # Journaled too: a replay that later deletes make room for must not revive them
+        for old_note in evicted:
+            self._append({"op": "delete", "id": str(old_note["id"])})
+        return evicted
+
+    def delete(self, note_id) -> Optional[dict]:
+        note = self._remove(str(note_id))
+        if note is not None:
+            self._append({"op": "delete", "id": str(note_id)})
+        return note
+
+    def delete_app(self, app_name: str) -> List[dict]:
+        """Remove every note of an app and return them."""
+        removed = [self._remove(note_id) for note_id in list(self._by_app.get(app_name or "", ()))]
+        if removed:
+            self._append({"op": "delete_app", "app": app_name or ""})
+        return removed
+
+    def clear(self) -> List[dict]:
+        removed = list(self._notes.values())
+        self._notes.clear()
+        self._by_app.clear()
+        self._append({"op": "clear"})
+        return removed
+
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+
+    def _append(self, record: dict):
+        self._pending.append(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal_lines += 1
+        if self._flush_id is None:
+            self._flush_id = GLib.timeout_add(FLUSH_DELAY_MS, self._flush)
+
+    def _maybe_compact(self, force: bool = False):
+        dead = self._journal_lines - len(self._notes)
+        if not force and (self._journal_lines < COMPACT_MIN_LINES or dead <= len(self._notes)):
+            return
+        # Snapshotted here so the worker never sees the dicts change under it
+        self._compact_payload = "".join(
+            json.dumps({"op": "add", "note": note}, separators=(",", ":")) + "\n"
+            for note in self._notes.values()
+        )
+        self._pending = []
+        self._journal_lines = len(self._notes)
+        if self._flush_id is None:
+            self._flush_id = GLib.timeout_add(FLUSH_DELAY_MS, self._flush)
+
+    def _flush(self):
+        self._flush_id = None
+        self._maybe_compact()
+        lines, self._pending = self._pending, []
+        compact_payload, self._compact_payload = self._compact_payload, None
+        self._writes.put((compact_payload, lines))
+        return False
+
+    def close(self):
+        """Write out what is still buffered and stop the writer; the store is not usable afterwards."""
+        if self._writer_thread is None:
+            return
+        if self._flush_id is not None:
+            GLib.source_remove(self._flush_id)
+        self._flush()
+        self._writes.put(None)
+        self._writer_thread.join()
+        self._writer_thread = None
+
+    def _writer(self, _data):
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            compact_payload, lines = item
+            try:
+                if compact_payload is not None:
+                    tmp_path = f"{self._path}.tmp"
+                    with open(tmp_path, "w") as f:
+                        f.write(compact_payload)
+                    os.replace(tmp_path, self._path)
+                if lines:
+                    with open(self._path, "a") as f:
+                        f.writelines(lines)
+            except OSError as e:
+                logger.error(f"[NotificationStore] Could not write {self._path}: {e}")
@@ -1,58 +1,45 @@
-import subprocess
-import json
+from typing import Dict, Optional, Set, Tuple
+
+from fabric.core.service import Service, Signal
+from gi.repository import GLib
 
 import config.data as data
+from services.hyprland_state import get_hyprland_state
+
+EDGES = ("top", "bottom", "left", "right")
+# Hyprland sends no event when a floating window is moved or resized, so
+# clients are re-fetched this often while a floating window shares a
+# workspace with a watched region
+FLOATING_POLL_MS = 500
 
 def get_current_workspace():
     """
-    Get the current workspace ID using hyprctl.
+    Get the current workspace ID from the shared Hyprland state.
     """
-    try:
-        result = subprocess.run(
-            ["hyprctl", "activeworkspace"],
-            capture_output=True,
-            text=True
-        )
-        # Assume the output similar to: "ID <number>"
-        # Extracting the number from the output
-        parts = result.stdout.split()
-        for i, part in enumerate(parts):
-            if part == "ID" and i + 1 < len(parts):
-                return int(parts[i+1])
-    except Exception as e:
-        print(f"Error getting current workspace: {e}")
-    return -1
-
-def get_screen_dimensions():
+    workspace_id = get_hyprland_state().get_active_workspace_id()
+    return workspace_id if workspace_id else -1
+
+def get_screen_dimensions(workspace=None):
     """
-    Get screen dimensions from hyprctl.
+    Get screen dimensions from the shared Hyprland state.
     
     Returns:
-        tuple: (width, height) of the monitor containing the current workspace
+        tuple: (width, height) of the monitor containing the given (or current) workspace
     """
-    try:
-        # Get current workspace
-        workspace_id = get_current_workspace()
-        
-        # Get monitor information
-        result = subprocess.run(
-            ["hyprctl", "-j", "monitors"],
-            capture_output=True,
-            text=True
-        )
-        monitors = json.loads(result.stdout)
-        
-        # Find the monitor containing our workspace
-        for monitor in monitors:
-            if monitor.get("activeWorkspace", {}).get("id") == workspace_id:
-                return monitor.get("width", data.CURRENT_WIDTH), monitor.get("height", data.CURRENT_HEIGHT)
-                
-        # Fallback to first monitor
-        if monitors:
-            return monitors[0].get("width", data.CURRENT_WIDTH), monitors[0].get("height", data.CURRENT_HEIGHT)
-    except Exception as e:
-        print(f"Error getting screen dimensions: {e}")
-    
+    if workspace is None:
+        workspace = get_current_workspace()
+
+    monitors = get_hyprland_state().get_monitors()
+
+    # Find the monitor containing our workspace
+    for monitor in monitors:
+        if monitor.get("activeWorkspace", {}).get("id") == workspace:
+            return monitor.get("width", data.CURRENT_WIDTH), monitor.get("height", data.CURRENT_HEIGHT)
+
+    # Fallback to first monitor
+    if monitors:
+        return monitors[0].get("width", data.CURRENT_WIDTH), monitors[0].get("height", data.CURRENT_HEIGHT)
+
     # Default fallback values
     return data.CURRENT_WIDTH, data.CURRENT_HEIGHT
 
@@ -78,7 +65,7 @@ def check_occlusion(occlusion_region, workspace=None):
         side, size = occlusion_region
         if isinstance(side, str):
             # Convert side-based format to coordinates
-            screen_width, screen_height = get_screen_dimensions()
+            screen_width, screen_height = get_screen_dimensions(workspace)
             
             if side.lower() == "bottom":
                 occlusion_region = (0, screen_height - size, screen_width, size)
@@ -94,16 +81,7 @@ def check_occlusion(occlusion_region, workspace=None):
         print(f"Invalid occlusion region format: {occlusion_region}")
         return False
 
-    try:
-        result = subprocess.run(
-            ["hyprctl", "-j", "clients"],
-            capture_output=True,
-            text=True
-        )
-        clients = json.loads(result.stdout)
-    except Exception as e:
-        print(f"Error retrieving client windows: {e}")
-        return False
+    clients = get_hyprland_state().get_workspace_clients(workspace)
 
     occ_x, occ_y, occ_width, occ_height = occlusion_region
     occ_x2 = occ_x + occ_width
@@ -135,3 +113,174 @@ def check_occlusion(occlusion_region, workspace=None):
             return True  # Occlusion region is occupied
 
     return False  # No window overlaps the occlusion region
+
+
+def _monitor_layout_rect(monitor: dict) -> Tuple[float, float, float, float]:
+    """Return the monitor rectangle (x, y, width, height) in layout coordinates."""
+    width = monitor.get("width", data.CURRENT_WIDTH)
+    height = monitor.get("height", data.CURRENT_HEIGHT)
+    # Rotated outputs swap their logical width and height
+    if monitor.get("transform", 0) % 2 == 1:
+        width, height = height, width
+    scale = monitor.get("scale", 1.0) or 1.0
+    return monitor.get("x", 0), monitor.get("y", 0), width / scale, height / scale
+
+
+def _edge_rect(monitor: dict, edge: str, size: int) -> Tuple[float, float, float, float]:
+    """Return the (x1, y1, x2, y2) strip of a monitor edge in layout coordinates."""
+    x, y, width, height = _monitor_layout_rect(monitor)
+    if edge == "bottom":
+        return x, y + height - size, x + width, y + height
+    if edge == "left":
+        return x, y, x + size, y + height
+    if edge == "right":
+        return x + width - size, y, x + width, y + height
+    return x, y, x + width, y + size
+
+
+def _client_rect(client: dict) -> Optional[Tuple[int, int, int, int]]:
+    if not client.get("mapped", False) or client.get("hidden", False):
+        return None
+    position = client.get("at")
+    size = client.get("size")
+    if not position or not size or not size[0] or not size[1]:
+        return None
+    return position[0], position[1], position[0] + size[0], position[1] + size[1]
+
+
+class OcclusionEngine(Service):
+    """
+    Event-driven occlusion tracking for monitor edge regions.
+
+    Keeps a per-workspace index of window rectangles fed by HyprlandState and
+    re-evaluates only the watched regions whose workspace changed, emitting
+    ``occlusion-changed`` when a region flips between free and covered.
+    Monitor IDs are the shell's monitor indices (see MonitorManager).
+    """
+
+    @Signal
+    def occlusion_changed(self, monitor_id: int, edge: str, occluded: bool) -> None: ...
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._state = get_hyprland_state()
+        # workspace id -> client address -> (x1, y1, x2, y2)
+        self._index: Dict[int, Dict[str, Tuple[int, int, int, int]]] = {}
+        # (monitor id, edge) -> strip size in pixels
+        self._regions: Dict[Tuple[int, str], int] = {}
+        # (monitor id, edge) -> last reported occlusion
+        self._occluded: Dict[Tuple[int, str], bool] = {}
+        # Workspaces holding a floating window
+        self._floating_workspaces: Set[int] = set()
+        self._floating_poll_id: Optional[int] = None
+
+        self._rebuild_index()
+        self._state.connect("clients-changed", self._on_clients_changed)
+        self._state.connect("monitors-changed", self._on_layout_changed)
+        self._state.connect("active-workspace-changed", self._on_layout_changed)
+
+    def watch(self, monitor_id: int, edge: str, size: int) -> bool:
+        """Start tracking an edge region and return its current occlusion."""
+        if edge not in EDGES:
+            raise ValueError(f"Invalid occlusion edge: {edge}")
+        key = (monitor_id, edge)
+        self._regions[key] = max(size, self._regions.get(key, 0))
+        self._occluded[key] = self._compute(monitor_id, edge)
+        self._update_floating_poll()
+        return self._occluded[key]
+
+    def unwatch(self, monitor_id: int, edge: str):
+        self._regions.pop((monitor_id, edge), None)
+        self._occluded.pop((monitor_id, edge), None)
+        self._update_floating_poll()
+
+    def is_occluded(self, monitor_id: int, edge: str) -> bool:
+        return self._occluded.get((monitor_id, edge), False)
+
+    def _rebuild_index(self):
+        index: Dict[int, Dict[str, Tuple[int, int, int, int]]] = {}
+        floating_workspaces = set()
+        for client in self._state.get_clients():
+            rect = _client_rect(client)
+            if rect is not None:
+                workspace_id = client.get("workspace", {}).get("id", 0)
+                index.setdefault(workspace_id, {})[client["address"]] = rect
+                if client.get("floating", False):
+                    floating_workspaces.add(workspace_id)
+        self._floating_workspaces = floating_workspaces
+        changed = {
+            workspace_id
+            for workspace_id in index.keys() | self._index.keys()
+            if index.get(workspace_id) != self._index.get(workspace_id)
+        }
+        self._index = index
+        return changed
+
+    def _on_clients_changed(self, *_):
+        changed = self._rebuild_index()
+        if changed:
+            self._evaluate(changed)
+        self._update_floating_poll()
+
+    def _on_layout_changed(self, *_):
+        self._evaluate()
+        self._update_floating_poll()
+
+    def _update_floating_poll(self):
+        monitors = self._state.get_monitors()
+        needed = any(
+            0 <= monitor_id < len(monitors)
+            and not self._floating_workspaces.isdisjoint(self._monitor_workspaces(monitors[monitor_id]))
+            for monitor_id, _ in self._regions
+        )
+        if needed and self._floating_poll_id is None:
+            self._floating_poll_id = GLib.timeout_add(FLOATING_POLL_MS, self._poll_floating)
+        elif not needed and self._floating_poll_id is not None:
+            GLib.source_remove(self._floating_poll_id)
+            self._floating_poll_id = None
+
+    def _poll_floating(self):
+        self._state.refresh_clients()
+        return True
+
+    def _monitor_workspaces(self, monitor: dict) -> Tuple[int, ...]:
+        active = monitor.get("activeWorkspace", {}).get("id", 0)
+        special = monitor.get("specialWorkspace", {}).get("id", 0)
+        return (active, special) if special else (active,)
+
+    def _compute(self, monitor_id: int, edge: str) -> bool:
+        monitors = self._state.get_monitors()
+        if not 0 <= monitor_id < len(monitors):
+            return False
+        monitor = monitors[monitor_id]
+        size = self._regions.get((monitor_id, edge), 0)
+        occ_x1, occ_y1, occ_x2, occ_y2 = _edge_rect(monitor, edge, size)
+        for workspace_id in self._monitor_workspaces(monitor):
+            for win_x1, win_y1, win_x2, win_y2 in self._index.get(workspace_id, {}).values():
+                if not (win_x2 <= occ_x1 or win_x1 >= occ_x2 or win_y2 <= occ_y1 or win_y1 >= occ_y2):
+                    return True
+        return False
+
+    def _evaluate(self, workspaces=None):
+        monitors = self._state.get_monitors()
+        for monitor_id, edge in list(self._regions):
+            if workspaces is not None:
+                if not 0 <= monitor_id < len(monitors):
+                    continue
+                if workspaces.isdisjoint(self._monitor_workspaces(monitors[monitor_id])):
+                    continue
+            occluded = self._compute(monitor_id, edge)
+            if occluded != self._occluded.get((monitor_id, edge)):
+                self._occluded[(monitor_id, edge)] = occluded
+                self.emit("occlusion-changed", monitor_id, edge, occluded)
+
+
+# Singleton accessor
+_occlusion_engine_instance = None
+
+def get_occlusion_engine() -> OcclusionEngine:
+    """Get the global OcclusionEngine instance."""
+    global _occlusion_engine_instance
+    if _occlusion_engine_instance is None:
+        _occlusion_engine_instance = OcclusionEngine()
+    return _occlusion_engine_instance
@@ -0,0 +1,195 @@
+"""
+On-disk thumbnail store with a size cap.
+
+Thumbnails are PNG files named after a hash of their key, in one directory
+per cache. A small manifest keeps them in least-recently-used order with
+their sizes, so lookups and staying under the cap never touch the disk.
+Keys should change whenever the source does (e.g. include its size and
+mtime); retain() then garbage-collects what no longer has a source. The
+store is safe to use from worker threads.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from gi.repository import GdkPixbuf, GLib
+from loguru import logger
+
+import config.data as data
+
+THUMBNAILS_DIR = os.path.join(data.CACHE_DIR, "thumbnails")
+MANIFEST_VERSION = 1
+SAVE_DELAY_MS = 2000
+
+
+class ThumbnailCache:
+    def __init__(self, name: str, max_bytes: int):
+        self._dir = os.path.join(THUMBNAILS_DIR, name)
+        self._manifest_path = os.path.join(self._dir, "manifest.json")
+        self._max_bytes = max_bytes
+        # file name -> size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._save_id: Optional[int] = None
+        os.makedirs(self._dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._manifest_path, "r") as f:
+                stored = json.load(f)
+            if stored.get("version") != MANIFEST_VERSION:
+                raise ValueError("outdated manifest")
+            entries = stored["entries"]
+        except (OSError, ValueError, KeyError):
+            # Rebuild from the files themselves, oldest first
+            entries = []
+            with os.scandir(self._dir) as it:
+                files = [e for e in it if e.name.endswith(".png") and e.is_file()]
+            for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+                entries.append([entry.name, entry.stat().st_size])
+
+        for name, size in entries:
+            self._entries[name] = size
+            self._total += size
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest() + ".png"
+
+    def path_for(self, key: str) -> str:
+        """Where the thumbnail for key lives, whether or not it exists yet."""
+        return os.path.join(self._dir, self._file_name(key))
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Path of the thumbnail stored for key, marking it recently used; None
+        if absent. Only the manifest is consulted; callers that fail to read
+        the file should discard() the key.
+        """
+        name = self._file_name(key)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        self._schedule_save()
+        return os.path.join(self._dir, name)
+
+    def load(self, key: str) -> Optional[GdkPixbuf.Pixbuf]:
+        """The thumbnail stored for key as a pixbuf, or None."""
+        path = self.lookup(key)
+        if path is None:
+            return None
+        try:
+            return GdkPixbuf.Pixbuf.new_from_file(path)
+        except GLib.Error:
+            self.discard(key)
+            return None
+
+    def store(self, key: str, pixbuf: GdkPixbuf.Pixbuf) -> Optional[str]:
+        """Save pixbuf as the thumbnail for key, evicting old ones past the cap."""
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            pixbuf.savev(tmp_path, "png", [], [])
+            os.replace(tmp_path, path)
+        except (GLib.Error, OSError) as e:
+            logger.warning(f"[ThumbnailCache] Could not write {path}: {e}")
+            return None
+        return path if self.add(key) else None
+
+    def add(self, key: str) -> bool:
+        """Register a thumbnail written to path_for(key) by someone else."""
+        name = self._file_name(key)
+        try:
+            size = os.path.getsize(os.path.join(self._dir, name))
+        except OSError:
+            return False
+
+        evicted = []
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self._total > self._max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_name)
+        self._remove_files(evicted)
+        self._schedule_save()
+        return True
+
+    def retain(self, keys) -> int:
+        """
+        Delete every thumbnail whose key is not in keys, including stray
+        files missing from the manifest. Returns how many were removed.
+        Scans the directory, so call it from a worker thread.
+        """
+        live = {self._file_name(key) for key in keys}
+        with self._lock:
+            stale = [name for name in self._entries if name not in live]
+            for name in stale:
+                self._total -= self._entries.pop(name)
+            known = set(self._entries)
+        removed = set(stale)
+        with os.scandir(self._dir) as it:
+            stale += [
+                entry.name
+                for entry in it
+                if entry.name.endswith(".png")
+                and entry.name not in known
+                and entry.name not in live
+                and entry.name not in removed
+            ]
+        self._remove_files(stale)
+        if stale:
+            self._schedule_save()
+        return len(stale)
+
+    def _remove_files(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self._dir, name))
+            except OSError:
+                pass
+
+    def discard(self, key: str):
+        name = self._file_name(key)
+        self._forget(name)
+        self._remove_files([name])
+
+    def _forget(self, name: str):
+        with self._lock:
+            self._total -= self._entries.pop(name, 0)
+        self._schedule_save()
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_id is None:
+                self._save_id = GLib.timeout_add(SAVE_DELAY_MS, self._save)
+
+    def _save(self):
+        with self._lock:
+            self._save_id = None
+            payload = json.dumps(
+                {
+                    "version": MANIFEST_VERSION,
+                    "entries": [[name, size] for name, size in self._entries.items()],
+                },
+                separators=(",", ":"),
+            )
+        GLib.Thread.new("thumbnail-manifest", self._write, payload)
+        return False
+
+    def _write(self, payload: str):
+        tmp_path = f"{self._manifest_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._manifest_path)
+        except OSError as e:
+            logger.warning(f"[ThumbnailCache] Could not write {self._manifest_path}: {e}")
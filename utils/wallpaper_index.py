@@ -0,0 +1,315 @@
+"""
+Persistent index of the wallpapers directory.
+
+The index keeps every wallpaper's name (relative to the wallpapers
+directory), size and mtime in sorted order, and is saved to the cache dir
+so the selector can show its whole grid from a single read at startup.
+The directory is then scanned on a worker thread and only the difference
+is applied. Thumbnail cache keys are derived from the stored stat, so an
+unchanged file never needs to be stat'ed again to find its thumbnail.
+
+Each entry can also carry a color signature (a hue histogram computed
+from its thumbnail, see utils/wallpaper_thumbnails.py), which lets
+hue_scores() rank the whole collection by closeness to a hue with one
+matrix product and no image decoding.
+
+All mutating methods are meant for the main loop; scan() is the only part
+that touches the directory and may run anywhere.
+"""
+
+import bisect
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from gi.repository import GLib
+from loguru import logger
+
+import config.data as data
+from utils.wallpaper_thumbnails import HUE_BINS
+
+WALLPAPER_INDEX_FILE = os.path.join(data.CACHE_DIR, "wallpaper_index.json")
+INDEX_VERSION = 2
+SAVE_DELAY_MS = 2000
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp")
+# How far from the chosen hue a color still counts, in degrees
+HUE_SPREAD_DEGREES = 20.0
+
+
+class Stat(NamedTuple):
+    size: int
+    mtime_ns: int
+
+
+class ScanResult(NamedTuple):
+    files: Dict[str, Stat]
+    # Directories seen, relative to the root ("" for the root itself)
+    directories: List[str]
+
+
+def is_image(file_name: str) -> bool:
+    return file_name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def normalized_name(name: str) -> str:
+    """Wallpaper file names are kept lowercase with hyphens instead of spaces."""
+    head, tail = os.path.split(name)
+    return os.path.join(head, tail.lower().replace(" ", "-"))
+
+
+class WallpaperIndex:
+    def __init__(self, root: str, recursive: bool = False, path: str = WALLPAPER_INDEX_FILE):
+        self.root = root
+        self.recursive = recursive
+        self._path = path
+        self._stats: Dict[str, Stat] = {}
+        # name -> hue histogram; dropped whenever the file changes
+        self._signatures: Dict[str, List[float]] = {}
+        # (names, matrix) of the signatures, rebuilt after they change
+        self._signature_matrix = None
+        # Sorted; shared with callers, who must not modify it
+        self.names: List[str] = []
+        self._save_id: Optional[int] = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._path, "r") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        # An index of another directory or scan mode is only a scan away from useless
+        if (
+            stored.get("version") != INDEX_VERSION
+            or stored.get("root") != self.root
+            or stored.get("recursive") != self.recursive
+        ):
+            return
+        try:
+            for name, size, mtime_ns, signature in stored["files"]:
+                self._stats[name] = Stat(size, mtime_ns)
+                if signature is not None:
+                    self._signatures[name] = signature
+        except (KeyError, TypeError, ValueError):
+            self._stats = {}
+            self._signatures = {}
+        self.names[:] = sorted(self._stats)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stats
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def full_path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def thumbnail_key(self, name: str) -> Optional[str]:
+        """Thumbnail cache key of a wallpaper: path, size and mtime; None if not indexed"""
+        stat = self._stats.get(name)
+        if stat is None:
+            return None
+        return f"{self.full_path(name)}\0{stat.size}\0{stat.mtime_ns}"
+
+    def thumbnail_keys(self) -> List[str]:
+        return [self.thumbnail_key(name) for name in self.names]
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    def scan(self) -> ScanResult:
+        """
+        Walk the directory, normalizing file names on the way, and return
+        what is there. Does not modify the index; pass the result to
+        reconcile() on the main loop.
+        """
+        files: Dict[str, Stat] = {}
+        directories: List[str] = []
+        pending = [""]
+        while pending:
+            relative_dir = pending.pop()
+            directories.append(relative_dir)
+            try:
+                with os.scandir(os.path.join(self.root, relative_dir)) as entries:
+                    entries = list(entries)
+            except OSError as e:
+                logger.warning(f"[WallpaperIndex] Could not scan {relative_dir or self.root}: {e}")
+                continue
+            for entry in entries:
+                name = os.path.join(relative_dir, entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and not entry.name.startswith("."):
+                            pending.append(name)
+                        continue
+                    if not is_image(entry.name) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files[self.normalize(name)] = Stat(stat.st_size, stat.st_mtime_ns)
+        return ScanResult(files, directories)
+
+    def normalize(self, name: str) -> str:
+        """Rename a wallpaper to its normalized name if needed; returns the name it ends up with"""
+        new_name = normalized_name(name)
+        if new_name == name:
+            return name
+        full_path = self.full_path(name)
+        new_full_path = self.full_path(new_name)
+        try:
+            os.rename(full_path, new_full_path)
+            print(f"Renamed file '{full_path}' to '{new_full_path}'")
+            return new_name
+        except OSError as e:
+            print(f"Error renaming file {full_path}: {e}")
+            return name
+
+    def reconcile(self, scan: ScanResult) -> Tuple[List[str], List[str], Dict[str, str]]:
+        """
+        Apply a scan to the index. Returns (added, changed, removed): names
+        that are new, names whose content changed, and a mapping of removed
+        or changed names to their old thumbnail keys.
+        """
+        added, changed = [], []
+        stale: Dict[str, str] = {}
+        for name in list(self._stats):
+            if name not in scan.files:
+                stale[name] = self.thumbnail_key(name)
+                del self._stats[name]
+                self._forget_signature(name)
+        for name, stat in scan.files.items():
+            old_stat = self._stats.get(name)
+            if old_stat == stat:
+                continue
+            if old_stat is None:
+                added.append(name)
+            else:
+                stale[name] = self.thumbnail_key(name)
+                changed.append(name)
+                self._forget_signature(name)
+            self._stats[name] = stat
+
+        if added or stale:
+            # One sort for the whole difference rather than an insert per file
+            self.names[:] = sorted(self._stats)
+            self._schedule_save()
+        return added, changed, stale
+
+    # ------------------------------------------------------------------
+    # Single-file updates, for directory monitor events
+    # ------------------------------------------------------------------
+
+    def update(self, name: str) -> Tuple[bool, Optional[str]]:
+        """
+        Index name from its current stat. Returns (updated, old key):
+        whether the entry is new or changed, and its previous thumbnail key.
+        """
+        try:
+            st = os.stat(self.full_path(name))
+        except OSError:
+            return False, None
+        stat = Stat(st.st_size, st.st_mtime_ns)
+        old_stat = self._stats.get(name)
+        if old_stat == stat:
+            return False, None
+        old_key = self.thumbnail_key(name)
+        self._stats[name] = stat
+        self._forget_signature(name)
+        if old_stat is None:
+            bisect.insort(self.names, name)
+        self._schedule_save()
+        return True, old_key
+
+    def remove(self, name: str) -> Optional[str]:
+        """Drop name from the index and return its thumbnail key, or None if it was not indexed."""
+        old_key = self.thumbnail_key(name)
+        if old_key is None:
+            return None
+        del self._stats[name]
+        self._forget_signature(name)
+        i = bisect.bisect_left(self.names, name)
+        if i < len(self.names) and self.names[i] == name:
+            del self.names[i]
+        self._schedule_save()
+        return old_key
+
+    # ------------------------------------------------------------------
+    # Color signatures
+    # ------------------------------------------------------------------
+
+    def has_signature(self, name: str) -> bool:
+        return name in self._signatures
+
+    def set_signature(self, name: str, key: str, signature: List[float]) -> bool:
+        """
+        Store the color signature computed for the thumbnail with key.
+        Ignored, returning False, when the file has changed since.
+        """
+        if key is None or self.thumbnail_key(name) != key:
+            return False
+        self._signatures[name] = signature
+        self._signature_matrix = None
+        self._schedule_save()
+        return True
+
+    def _forget_signature(self, name: str):
+        if self._signatures.pop(name, None) is not None:
+            self._signature_matrix = None
+
+    def hue_scores(self, hue: float) -> Dict[str, float]:
+        """
+        How much of each wallpaper is close to hue (0-360), from 0 up.
+        Wallpapers without a signature yet are left out.
+        """
+        import numpy as np
+
+        if self._signature_matrix is None:
+            names = list(self._signatures)
+            matrix = np.array([self._signatures[name] for name in names], dtype=np.float32)
+            self._signature_matrix = (names, matrix.reshape(len(names), HUE_BINS))
+        names, matrix = self._signature_matrix
+        if not names:
+            return {}
+
+        centers = (np.arange(HUE_BINS) + 0.5) * (360.0 / HUE_BINS)
+        distance = np.abs(centers - hue % 360.0)
+        distance = np.minimum(distance, 360.0 - distance)
+        weights = np.exp(-0.5 * (distance / HUE_SPREAD_DEGREES) ** 2).astype(np.float32)
+        return dict(zip(names, (matrix @ weights).tolist()))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _schedule_save(self):
+        if self._save_id is None:
+            self._save_id = GLib.timeout_add(SAVE_DELAY_MS, self._save)
+
+    def _save(self):
+        self._save_id = None
+        payload = json.dumps(
+            {
+                "version": INDEX_VERSION,
+                "root": self.root,
+                "recursive": self.recursive,
+                "files": [
+                    [name, *self._stats[name], self._signatures.get(name)]
+                    for name in self.names
+                ],
+            },
+            separators=(",", ":"),
+        )
+        GLib.Thread.new("wallpaper-index", self._write, payload)
+        return False
+
+    def _write(self, payload: str):
+        tmp_path = f"{self._path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"[WallpaperIndex] Could not write {self._path}: {e}")
@@ -0,0 +1,277 @@
+"""
+Wallpaper thumbnail generation.
+
+Thumbnails are made by a helper process running this file, which spreads
+the work over a process pool on all cores and reports every thumbnail as
+soon as it is written. Keeping the pool in its own small process means
+its workers never fork or re-import the shell itself. The helper is kept
+running and fed every new batch while there is work, so a burst of
+directory events does not start a new interpreter and pool each.
+
+Full-size photos are never decoded: JPEGs are read at a reduced DCT scale
+with Image.draft, other formats are shrunk with Image.reduce before the
+final LANCZOS resample.
+
+Each job also yields the wallpaper's color signature, a hue histogram of
+the thumbnail's pixels, so sorting by color never has to decode an image.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gi.repository import GLib
+from PIL import Image
+
+THUMBNAIL_SIZE = 96
+# Color signatures are hue histograms with this many bins
+HUE_BINS = 24
+# The helper and its pool are stopped after this long without work
+HELPER_IDLE_SECONDS = 30
+
+
+def color_signature(img: Image.Image) -> List[float]:
+    """
+    Hue histogram of img, each pixel weighted by its chroma so greys count
+    for nothing, as fractions of the pixel count. A mostly grey picture
+    therefore has a small signature overall.
+    """
+    import numpy as np
+
+    rgb = np.asarray(img.convert("RGB"), dtype=np.float32).reshape(-1, 3) / 255.0
+    if not len(rgb):
+        return [0.0] * HUE_BINS
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    high = rgb.max(axis=1)
+    chroma = high - rgb.min(axis=1)
+    safe_chroma = np.where(chroma > 0, chroma, 1.0)
+    sector = np.where(
+        high == r,
+        ((g - b) / safe_chroma) % 6,
+        np.where(high == g, (b - r) / safe_chroma + 2, (r - g) / safe_chroma + 4),
+    )
+    bins = (sector * (HUE_BINS / 6)).astype(np.int64) % HUE_BINS
+    histogram = np.bincount(bins, weights=chroma, minlength=HUE_BINS) / len(rgb)
+    return [round(float(x), 4) for x in histogram]
+
+
+def make_thumbnail(src: str, dst: str, size: int = THUMBNAIL_SIZE) -> List[float]:
+    """Write a centered square thumbnail of src to dst as PNG and return its color signature."""
+    with Image.open(src) as img:
+        width, height = img.size
+        side = min(width, height)
+        if img.format == "JPEG":
+            # draft() picks the smallest scale that still covers the request
+            img.draft("RGB", (size * width // side, size * height // side))
+            width, height = img.size
+            side = min(width, height)
+
+        left = (width - side) // 2
+        top = (height - side) // 2
+        thumb = img.crop((left, top, left + side, top + side))
+        if thumb.mode not in ("RGB", "RGBA", "L", "LA"):
+            thumb = thumb.convert("RGBA")
+        # Cheap box reduction down to twice the target, LANCZOS for the rest
+        factor = side // (size * 2)
+        if factor > 1:
+            thumb = thumb.reduce(factor)
+        thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    tmp_path = f"{dst}.tmp"
+    thumb.save(tmp_path, "PNG")
+    os.replace(tmp_path, dst)
+    return color_signature(thumb)
+
+
+def _make_thumbnail_job(src: Optional[str], dst: str) -> Tuple[Optional[str], Optional[List[float]]]:
+    try:
+        if src is None:
+            # The thumbnail exists already; only its signature is wanted
+            with Image.open(dst) as img:
+                return None, color_signature(img)
+        return None, make_thumbnail(src, dst)
+    except Exception as e:
+        return str(e), None
+
+
+def serve():
+    """
+    Helper entry point: [src, dst] JSON lines in, [dst, error, signature]
+    lines out as they finish. Jobs are taken as they arrive, so one helper
+    and its pool serve every batch; it exits once its stdin is closed.
+    """
+    write_lock = threading.Lock()
+
+    with ProcessPoolExecutor() as pool:
+
+        def report(dst, future):
+            try:
+                error, signature = future.result()
+            except Exception as e:
+                error, signature = str(e), None
+            with write_lock:
+                sys.stdout.write(json.dumps([dst, error, signature]) + "\n")
+                sys.stdout.flush()
+
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            src, dst = json.loads(line)
+            future = pool.submit(_make_thumbnail_job, src, dst)
+            future.add_done_callback(lambda f, dst=dst: report(dst, f))
+
+
+class _Batch:
+    __slots__ = ("remaining", "on_finished")
+
+    def __init__(self, remaining: int, on_finished: Optional[Callable[[], None]]):
+        self.remaining = remaining
+        self.on_finished = on_finished
+
+
+class ThumbnailPipeline:
+    """
+    Feeds thumbnail jobs to one long-lived helper process, started on
+    demand and stopped after a while without work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        # dst -> (on_done, batch) of every job the helper still owes an answer for
+        self._outstanding: Dict[str, List[Tuple[Callable, _Batch]]] = {}
+        self._idle_id: Optional[int] = None
+
+    def generate(
+        self,
+        jobs: List[Tuple[Optional[str], str]],
+        on_done: Callable[[str, Optional[str], Optional[List[float]]], None],
+        on_finished: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Make thumbnails for (src, dst) pairs; a None src only reads the
+        color signature of an existing dst. on_done(dst, error, signature)
+        is called on the main loop for every job as it completes, error
+        being None on success; on_finished once the whole batch is over.
+        May be called from any thread.
+        """
+        if not jobs:
+            if on_finished is not None:
+                GLib.idle_add(self._call, on_finished)
+            return
+        batch = _Batch(len(jobs), on_finished)
+        payload = "".join(json.dumps([src, dst]) + "\n" for src, dst in jobs)
+        with self._lock:
+            try:
+                process = self._ensure_process()
+            except OSError as e:
+                for _, dst in jobs:
+                    self._outstanding.setdefault(dst, []).append((on_done, batch))
+                self._fail_all(str(e))
+                return
+            for _, dst in jobs:
+                self._outstanding.setdefault(dst, []).append((on_done, batch))
+            try:
+                process.stdin.write(payload)
+                process.stdin.flush()
+            except (OSError, ValueError) as e:
+                # The helper died; its reader fails whatever it still owed
+                self._stop(process)
+                self._fail_all(f"Thumbnail helper failed: {e}")
+
+    def _ensure_process(self) -> subprocess.Popen:
+        """Start the helper if it is not running; called with the lock held."""
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+        if self._process is not None:
+            # Died before its reader noticed; what it owed will never come
+            self._process = None
+            self._fail_all("Thumbnail helper exited")
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self._process = process
+        GLib.Thread.new("wallpaper-thumbnails", self._read, process)
+        return process
+
+    def _stop(self, process: subprocess.Popen):
+        """Close the helper's stdin so it exits; called with the lock held."""
+        if self._process is process:
+            self._process = None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+    def _read(self, process: subprocess.Popen):
+        for line in process.stdout:
+            try:
+                dst, error, signature = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            with self._lock:
+                waiting = self._outstanding.get(dst)
+                if not waiting:
+                    continue
+                on_done, batch = waiting.pop(0)
+                if not waiting:
+                    del self._outstanding[dst]
+                self._complete(on_done, batch, dst, error, signature)
+                if not self._outstanding:
+                    GLib.idle_add(self._schedule_idle_stop)
+        process.wait()
+        with self._lock:
+            # Anything still owed by a helper that went away will never come
+            if self._process is process or self._process is None:
+                self._process = None
+                self._fail_all("Thumbnail helper exited")
+
+    def _fail_all(self, error: str):
+        """Answer every outstanding job with error; called with the lock held."""
+        outstanding, self._outstanding = self._outstanding, {}
+        for dst, waiting in outstanding.items():
+            for on_done, batch in waiting:
+                self._complete(on_done, batch, dst, error, None)
+        if outstanding:
+            GLib.idle_add(self._schedule_idle_stop)
+
+    def _complete(self, on_done, batch, dst, error, signature):
+        """Called with the lock held."""
+        GLib.idle_add(self._deliver, on_done, dst, error, signature)
+        batch.remaining -= 1
+        if batch.remaining == 0 and batch.on_finished is not None:
+            GLib.idle_add(self._call, batch.on_finished)
+
+    def _schedule_idle_stop(self):
+        if self._idle_id is not None:
+            GLib.source_remove(self._idle_id)
+        self._idle_id = GLib.timeout_add_seconds(HELPER_IDLE_SECONDS, self._stop_if_idle)
+        return False
+
+    def _stop_if_idle(self):
+        self._idle_id = None
+        with self._lock:
+            if not self._outstanding and self._process is not None:
+                self._stop(self._process)
+        return False
+
+    @staticmethod
+    def _deliver(on_done, dst, error, signature):
+        on_done(dst, error, signature)
+        return False
+
+    @staticmethod
+    def _call(callback):
+        callback()
+        return False
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,154 @@
+import math
+from typing import Callable, Sequence
+
+from fabric.widgets.box import Box
+from gi.repository import Gtk
+
+
+class RecycledList(Box):
+    """
+    Vertical list that only creates widgets for the rows in view.
+
+    A fixed pool of rows, sized to the scrolled window's page, is rebound to
+    whichever items are visible; two spacer boxes stand in for the rows
+    above and below, so the scrollbar still reflects the full list. Rows
+    must all have the same height.
+    """
+
+    def __init__(
+        self,
+        scrolled_window: Gtk.ScrolledWindow,
+        create_row: Callable[[], Gtk.Widget],
+        bind_row: Callable[[Gtk.Widget, object], None],
+        spacing: int = 4,
+        row_height: int = 56,
+        overscan: int = 2,
+        **kwargs,
+    ):
+        super().__init__(orientation="v", spacing=spacing, **kwargs)
+        self._spacing = spacing
+        self._create_row = create_row
+        self._bind_row = bind_row
+        # Height of one row including the spacing below it, re-measured on allocation
+        self._row_height = row_height + spacing
+        self._overscan = overscan
+        self._items: Sequence = []
+        self._first = 0
+        self._bound = None
+        self._selected = -1
+        self._rows: list[Gtk.Widget] = []
+
+        self._top_spacer = Box(name="recycled-list-spacer", visible=False)
+        self._bottom_spacer = Box(name="recycled-list-spacer", visible=False)
+        self.add(self._top_spacer)
+        self.add(self._bottom_spacer)
+
+        self._adjustment = scrolled_window.get_vadjustment()
+        self._adjustment.connect("value-changed", lambda *_: self._relayout())
+        self._adjustment.connect("changed", lambda *_: self._relayout())
+
+    @property
+    def items(self) -> Sequence:
+        return self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def set_items(self, items: Sequence, keep_position: bool = False):
+        """
+        Show a new result set, reusing the existing row widgets. With
+        keep_position the scroll offset and selection survive, for lists
+        that grow while they are being looked at.
+        """
+        self._items = items
+        self._bound = None
+        if keep_position:
+            if self._selected >= len(items):
+                self._selected = -1
+        else:
+            self._selected = -1
+            self._adjustment.set_value(0)
+        self._relayout()
+
+    def get_row_for_index(self, index: int) -> Gtk.Widget | None:
+        offset = index - self._first
+        if 0 <= offset < len(self._rows) and self._rows[offset].get_visible():
+            return self._rows[offset]
+        return None
+
+    def set_selected(self, index: int):
+        """Mark the item at index as selected (-1 clears) and scroll it into view."""
+        previous = self.get_row_for_index(self._selected)
+        if previous is not None:
+            previous.get_style_context().remove_class("selected")
+        self._selected = index if 0 <= index < len(self._items) else -1
+        if self._selected == -1:
+            return
+        self.scroll_to_index(self._selected)
+        row = self.get_row_for_index(self._selected)
+        if row is not None:
+            row.get_style_context().add_class("selected")
+
+    def scroll_to_index(self, index: int):
+        top = index * self._row_height
+        bottom = top + self._row_height - self._spacing
+        value = self._adjustment.get_value()
+        page_size = self._adjustment.get_page_size()
+        if top < value:
+            self._adjustment.set_value(top)
+        elif page_size and bottom > value + page_size:
+            self._adjustment.set_value(bottom - page_size)
+
+    def _pool_size(self) -> int:
+        page_size = self._adjustment.get_page_size() or 10 * self._row_height
+        return math.ceil(page_size / self._row_height) + self._overscan * 2
+
+    def _ensure_pool(self, size: int):
+        # The pool only ever grows, up to what one page needs
+        while len(self._rows) < size:
+            row = self._create_row()
+            if not self._rows:
+                row.connect("size-allocate", self._on_row_allocated)
+            row.show_all()
+            self.add(row)
+            self.reorder_child(row, len(self._rows) + 1)
+            self._rows.append(row)
+
+    def _on_row_allocated(self, row, allocation):
+        row_height = allocation.height + self._spacing
+        if allocation.height > 1 and row_height != self._row_height:
+            self._row_height = row_height
+            self._bound = None
+            self._relayout()
+
+    def _set_spacer(self, spacer: Box, rows: int):
+        spacer.set_visible(rows > 0)
+        if rows > 0:
+            spacer.set_size_request(-1, rows * self._row_height - self._spacing)
+
+    def _relayout(self):
+        count = len(self._items)
+        pool_size = min(self._pool_size(), count)
+        self._ensure_pool(pool_size)
+
+        first = int(self._adjustment.get_value() // self._row_height) - self._overscan
+        first = max(0, min(first, count - pool_size))
+        if self._bound == (first, pool_size):
+            return
+        self._bound = (first, pool_size)
+        self._first = first
+
+        for offset, row in enumerate(self._rows):
+            index = first + offset
+            if offset < pool_size and index < count:
+                self._bind_row(row, self._items[index])
+                if index == self._selected:
+                    row.get_style_context().add_class("selected")
+                else:
+                    row.get_style_context().remove_class("selected")
+                row.set_visible(True)
+            else:
+                row.set_visible(False)
+
+        self._set_spacer(self._top_spacer, first)
+        self._set_spacer(self._bottom_spacer, count - first - pool_size)